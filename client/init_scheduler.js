@@ -0,0 +1,142 @@
+/**
+ * Initialization scheduler for MIZSelect elements.
+ *
+ * Instead of initializing every element at once, elements are queued and
+ * initialized in small, time-sliced batches. Between batches, the scheduler
+ * yields back to the browser (via `scheduler.yield` or `requestIdleCallback`)
+ * so that large pages or bulk-inserted formset rows do not cause long tasks.
+ *
+ * Elements that are visible in the viewport are initialized before elements
+ * that are not. An element that receives focus before it was initialized is
+ * initialized immediately.
+ *
+ * Configuration:
+ *   enabled: if false, elements are initialized immediately when scheduled
+ *   batchSize: the maximum number of elements to initialize per batch
+ *   frameBudget: the maximum time (in ms) to spend on a batch
+ *   idleTimeout: the maximum time (in ms) to wait for an idle period before
+ *     starting the next batch
+ *
+ * @param {Function} init the function that initializes a given element
+ * @param {Object} userOptions scheduler configuration
+ * @returns an object with a `schedule` and a `flush` method
+ */
+export default function createInitScheduler (init, userOptions) {
+  const options = Object.assign({
+    enabled: true,
+    batchSize: 10,
+    frameBudget: 8,
+    idleTimeout: 200
+  }, userOptions)
+
+  const queue = new Set()
+  const visible = new Set()
+  let running = false
+
+  // Move elements that scroll into view to the front of the queue.
+  const observer = 'IntersectionObserver' in window
+    ? new window.IntersectionObserver(entries => {
+      entries.forEach(entry => {
+        if (entry.isIntersecting && queue.has(entry.target)) visible.add(entry.target)
+        else visible.delete(entry.target)
+      })
+    })
+    : null
+
+  // Initialize queued elements right away when they receive focus.
+  document.addEventListener('focusin', (e) => {
+    if (!queue.has(e.target)) return
+    const elem = e.target
+    runNow(elem)
+    if (elem.tomselect) elem.tomselect.focus()
+  })
+
+  function dequeue (elem) {
+    queue.delete(elem)
+    visible.delete(elem)
+    if (observer) observer.unobserve(elem)
+  }
+
+  function runNow (elem) {
+    dequeue(elem)
+    // Skip elements that were removed before their turn came up.
+    if (!elem.isConnected) return
+    try {
+      init(elem)
+    } catch (error) {
+      // Do not let one broken element stop the initialization of the others.
+      console.error(error)
+    }
+  }
+
+  function next () {
+    if (visible.size) return visible.values().next().value
+    return queue.values().next().value
+  }
+
+  function waitForIdle () {
+    return new Promise(resolve => {
+      if ('requestIdleCallback' in window) {
+        window.requestIdleCallback(resolve, { timeout: options.idleTimeout })
+      } else {
+        setTimeout(resolve, 0)
+      }
+    })
+  }
+
+  function yieldToMain () {
+    if (window.scheduler && typeof window.scheduler.yield === 'function') {
+      return window.scheduler.yield()
+    }
+    return waitForIdle()
+  }
+
+  async function run () {
+    try {
+      await waitForIdle()
+      while (queue.size) {
+        const start = window.performance.now()
+        let count = 0
+        while (queue.size && count < options.batchSize && window.performance.now() - start < options.frameBudget) {
+          runNow(next())
+          count++
+        }
+        if (queue.size) await yieldToMain()
+      }
+    } finally {
+      running = false
+    }
+  }
+
+  return {
+    /**
+     * Add the given element to the initialization queue.
+     *
+     * @param {HTMLElement} elem the element to initialize
+     */
+    schedule (elem) {
+      if (!options.enabled) {
+        init(elem)
+        return
+      }
+      if (elem.tomselect || queue.has(elem)) return
+      queue.add(elem)
+      if (observer) observer.observe(elem)
+      if (document.activeElement === elem) {
+        runNow(elem)
+        return
+      }
+      if (!running) {
+        running = true
+        run()
+      }
+    },
+
+    /**
+     * Initialize all queued elements immediately.
+     */
+    flush () {
+      while (queue.size) runNow(next())
+    }
+  }
+}
@@ -0,0 +1,52 @@
+/**
+ * A map with a maximum size. When the maximum size is exceeded, the least
+ * recently used entries are removed.
+ */
+export default class LRUCache {
+  /**
+   * @param {number} maxSize the maximum number of entries
+   */
+  constructor (maxSize) {
+    this.maxSize = maxSize
+    this.map = new Map()
+  }
+
+  get size () {
+    return this.map.size
+  }
+
+  has (key) {
+    return this.map.has(key)
+  }
+
+  /**
+   * Return the value for the given key and mark the entry as recently used.
+   */
+  get (key) {
+    if (!this.map.has(key)) return undefined
+    const value = this.map.get(key)
+    this.map.delete(key)
+    this.map.set(key, value)
+    return value
+  }
+
+  /**
+   * Add or replace the entry for the given key and remove the least recently
+   * used entries if the cache is full.
+   */
+  set (key, value) {
+    this.map.delete(key)
+    this.map.set(key, value)
+    while (this.map.size > this.maxSize) {
+      this.map.delete(this.map.keys().next().value)
+    }
+  }
+
+  delete (key) {
+    return this.map.delete(key)
+  }
+
+  clear () {
+    this.map.clear()
+  }
+}
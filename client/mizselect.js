@@ -11,9 +11,19 @@ import edit_button from './plugins/edit_button'
 import dropdown_footer from './plugins/dropdown_footer'
 import add_button from './plugins/add_button'
 import changelist_button from './plugins/changelist_button'
+import dropdown_window from './plugins/dropdown_window'
+import bounded_options from './plugins/bounded_options'
+import partial_results from './plugins/partial_results'
 /* eslint-enable camelcase */
 
 import merge from 'lodash/merge'
+import createInitScheduler from './init_scheduler'
+import LRUCache from './lru'
+import createTelemetry from './telemetry'
+import { REQUEST_HEADER, purgeCache, registerServiceWorker } from './service_worker'
+import createVersionEvents from './version_events'
+import createStream, { TransportError } from './streaming'
+import { Throttled, backOff, backOffRemaining, parseRetryAfter } from './throttle'
 
 // TomSelect plugins
 TomSelect.define('clear_button', clear_button)
@@ -27,25 +37,160 @@ TomSelect.define('edit_button', edit_button)
 TomSelect.define('dropdown_footer', dropdown_footer)
 TomSelect.define('add_button', add_button)
 TomSelect.define('changelist_button', changelist_button)
+TomSelect.define('dropdown_window', dropdown_window)
+TomSelect.define('bounded_options', bounded_options)
+TomSelect.define('partial_results', partial_results)
+
+/**
+ * Return the page-wide MIZSelect configuration.
+ *
+ * The defaults (see the modules of the sections) can be overridden by defining
+ * a `window.MIZSelectConfig` object before the DOMContentLoaded event, for
+ * example:
+ *
+ *   window.MIZSelectConfig = { scheduler: { batchSize: 5 } }
+ */
+function getConfig () {
+  return merge({
+    scheduler: {},
+    telemetry: {},
+    serviceWorker: {},
+    versionEvents: {},
+    streaming: {}
+  }, window.MIZSelectConfig)
+}
+
+// Records client-side performance measurements; disabled until configured.
+let telemetry = createTelemetry()
+// Receives the version changes of models; disabled until configured.
+let versionEvents = createVersionEvents()
+// Sends autocomplete requests over a WebSocket; disabled until configured.
+let stream = createStream()
 
 document.addEventListener('DOMContentLoaded', (event) => {
+  const config = getConfig()
+  telemetry = createTelemetry(config.telemetry)
+  // Allow other scripts to send the recorded measurements immediately.
+  window.flushMIZSelectTelemetry = () => telemetry.flush()
+  registerServiceWorker(config.serviceWorker)
+  versionEvents = createVersionEvents(config.versionEvents, modelChanged)
+  stream = createStream(config.streaming)
+  const scheduler = createInitScheduler(init, config.scheduler)
+  // Allow other scripts to force the initialization of all queued elements.
+  window.flushMIZSelect = () => scheduler.flush()
+
   // Do not initialize elements which contain '__prefix__'; those are part of
   // empty form templates for django formsets:
   const selector = '[is-tomselect]:not([id*="__prefix__"])'
-  document.querySelectorAll(selector).forEach(elem => init(elem))
+  document.querySelectorAll(selector).forEach(elem => scheduler.schedule(elem))
 
-  // Initialize dynamically added elements that match the selector.
+  // A single observer for the whole document that initializes dynamically
+  // added elements, unregisters removed elements and keeps the disabled state
+  // of TomSelect instances in sync with their select elements.
   new window.MutationObserver(mutations => {
-    mutations.forEach(mutation =>
+    mutations.forEach(mutation => {
+      if (mutation.type === 'attributes') {
+        syncDisabled(mutation.target)
+        return
+      }
+      mutation.removedNodes.forEach(node => {
+        if (!(node instanceof window.HTMLElement) || node.isConnected) return
+        node.querySelectorAll('[is-tomselect]').forEach(elem => unregister(elem))
+        unregister(node)
+      })
       mutation.addedNodes.forEach(node => {
         if (!(node instanceof window.HTMLElement)) return
-        node.querySelectorAll(selector).forEach(elem => init(elem))
-        if (node.matches(selector)) init(node)
+        node.querySelectorAll(selector).forEach(elem => scheduler.schedule(elem))
+        if (node.matches(selector)) scheduler.schedule(node)
+        // Elements that were moved keep their TomSelect; register them again.
+        node.querySelectorAll('.tomselected').forEach(elem => register(elem.tomselect))
+        if (node.tomselect) register(node.tomselect)
       })
-    )
-  }).observe(document.documentElement, { childList: true, subtree: true })
+    })
+  }).observe(document.documentElement, {
+    childList: true,
+    subtree: true,
+    attributes: true,
+    attributeFilter: ['disabled']
+  })
 })
 
+// Maps initialized select elements to their TomSelect instances.
+const registry = new Map()
+
+/**
+ * Add the given TomSelect instance to the registry.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ */
+function register (ts) {
+  if (!ts) return
+  registry.set(ts.input, ts)
+  versionEvents.watch(ts.input.dataset.model)
+}
+
+/**
+ * Remove the given element from the registry.
+ *
+ * @param {HTMLElement} elem the select element of a TomSelect instance
+ */
+function unregister (elem) {
+  registry.delete(elem)
+}
+
+/**
+ * Discard the cached responses and the loaded options for the given model,
+ * whose objects were changed.
+ *
+ * @param {string} model the model label
+ */
+function modelChanged (model) {
+  purgeCache(model)
+  registry.forEach(ts => {
+    if (ts.input.dataset.model.toLowerCase() === model) invalidate(ts)
+  })
+}
+
+/**
+ * Discard the loaded options of the given TomSelect instance, and reload the
+ * options if its dropdown is open.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ */
+function invalidate (ts) {
+  if (ts.filterCache) ts.filterCache.clear()
+  if (ts.responseCache) ts.responseCache.clear()
+  // Reset the pagination of the virtual_scroll plugin.
+  if (ts.getUrl) ts.getUrl(null)
+  // Clear all options, but leave the selected items.
+  ts.clearOptions()
+  ts.lastPage = null
+  ts.loadedAll = null
+  ts.prefetched = null
+  ts.wrapper.classList.remove('preloaded')
+  if (ts.isOpen) {
+    const query = ts.inputValue()
+    if (!query) ts.wrapper.classList.add('preloaded')
+    ts.load(query)
+  }
+}
+
+/**
+ * Disable or enable the TomSelect instance of the given element according to
+ * the element's disabled attribute.
+ *
+ * @param {HTMLElement} elem the element whose disabled attribute changed
+ */
+function syncDisabled (elem) {
+  const ts = registry.get(elem)
+  if (!ts) return
+  if (elem.disabled && !ts.isDisabled) {
+    ts.disable()
+  } else if (!elem.disabled && ts.isDisabled) {
+    ts.enable()
+  }
+}
+
 /**
  * Create a TomSelect from the given element.
  *
@@ -56,6 +201,7 @@ function init (elem) {
     // Already initialized
     return
   }
+  const start = performance.now()
 
   // Attach the init function to the element so it can be called in a custom
   // handler for the init event.
@@ -77,6 +223,7 @@ function init (elem) {
 
   // Reload the default/initial options when the input is cleared:
   ts.on('type', (query) => {
+    ts.lastKeystroke = performance.now()
     if (!query) {
       ts.load('')
       ts.refreshOptions()
@@ -84,18 +231,46 @@ function init (elem) {
   })
 
   if (elem.filterByElem) {
+    // Snapshots of the loaded options for previous values of the filterBy
+    // element.
+    const filterCache = new LRUCache(ts.settings.filterCacheSize)
+    ts.filterCache = filterCache
+    let filterValue = elem.filterByElem.value
+    // The values of the options loaded for the current filter value. Options
+    // of selected items are kept when the filter value changes, but they may
+    // not match the new value, so only loaded options go into a snapshot.
+    let loadedValues = new Set()
+    ts.on('load', (options) => {
+      (options || []).forEach(option => loadedValues.add(String(option[ts.settings.valueField])))
+    })
     // Force re-fetching the options when the value of the filterBy element
-    // changes.
+    // changes - unless the options for that value are still cached.
     elem.filterByElem.addEventListener('change', () => {
+      const snapshot = takeSnapshot(ts, loadedValues)
+      if (snapshot) filterCache.set(filterValue, snapshot)
+      filterValue = elem.filterByElem.value
+      loadedValues = new Set()
+      // Clear all options, but leave the selected items.
+      ts.clearOptions()
+      ts.lastPage = null
+      if (elem.hasAttribute('load-all')) {
+        ts.loadedAll = null
+        ts.wrapper.classList.remove('preloaded')
+        return
+      }
       // Reset the pagination (query:url) mapping of the virtual_scroll
       // plugin. This is necessary because the filter value is not part of
       // the query string, which means that the mapping might return an URL
       // that is incorrect for the current filter.
       ts.getUrl(null)
-      // Clear all options, but leave the selected items.
-      ts.clearOptions()
-      // Remove the flag that this element has already been loaded.
-      ts.wrapper.classList.remove('preloaded')
+      const cached = filterCache.get(filterValue)
+      if (cached) {
+        restoreSnapshot(ts, cached)
+      } else {
+        // Remove the flag that this element has already been loaded.
+        ts.wrapper.classList.remove('preloaded')
+        if (elem.hasAttribute('prefetch')) prefetch(ts)
+      }
     })
   }
 
@@ -110,18 +285,182 @@ function init (elem) {
     if (rect.top + 400 > window.innerHeight) dropdown.scrollIntoView({ block: 'center' })
   })
 
-  // Disable or enable tomselect when the disabled attribute changes.
-  new window.MutationObserver(mutations => {
-    mutations.forEach(mutation => {
-      if (mutation.target.disabled && !ts.isDisabled) {
-        ts.disable()
-      } else if (!mutation.target.disabled && ts.isDisabled) {
-        ts.enable()
+  if (telemetry.enabled) measureRender(ts)
+
+  register(ts)
+  // The disabled attribute may have changed while the element was queued.
+  syncDisabled(elem)
+  telemetry.measure('init', elem.dataset.model, start)
+}
+
+/**
+ * Record the time spent rendering the dropdown options of the given TomSelect
+ * instance.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ */
+function measureRender (ts) {
+  const refreshOptions = ts.refreshOptions
+  ts.refreshOptions = function (...args) {
+    const start = performance.now()
+    const result = refreshOptions.apply(this, args)
+    if (Object.keys(this.options).length) telemetry.measure('render', this.input.dataset.model, start)
+    return result
+  }
+}
+
+/**
+ * Return a snapshot of the loaded options and the pagination state of the
+ * given TomSelect instance, or null if the instance has not loaded the default
+ * (empty query) results.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ * @param {Set} loadedValues the values of the options to include
+ * @returns an object with the options and pagination state
+ */
+function takeSnapshot (ts, loadedValues) {
+  const page = ts.lastPage
+  if (!page || page.query !== '' || !ts.wrapper.classList.contains('preloaded')) return null
+  return {
+    options: Object.entries(ts.options)
+      .filter(([value]) => loadedValues.has(value))
+      .map(([, { $div, ...data }]) => data),
+    nextUrl: page.nextUrl,
+    showCreateOption: ts.settings.showCreateOption
+  }
+}
+
+/**
+ * Restore the options and the pagination state from the given snapshot as if
+ * the default results had just been loaded.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ * @param snapshot a snapshot created by takeSnapshot
+ */
+function restoreSnapshot (ts, snapshot) {
+  ts.addOptions(snapshot.options)
+  ts.loadedSearches[''] = true
+  if (snapshot.nextUrl !== undefined) ts.setNextUrl('', snapshot.nextUrl)
+  ts.lastPage = { query: '', nextUrl: snapshot.nextUrl }
+  ts.settings.showCreateOption = snapshot.showCreateOption
+  ts.wrapper.classList.add('preloaded')
+  ts.trigger('load', snapshot.options)
+}
+
+/**
+ * Start fetching the first page of the default (empty query) results in the
+ * background. The response is used by the next call of the `load` function
+ * that requests the same URL.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ */
+function prefetch (ts) {
+  const url = ts.getUrl('')
+  const promise = fetchResults(url)
+  // Errors are handled by the load function that consumes the response.
+  promise.catch(() => {})
+  ts.prefetched = { url, promise }
+}
+
+/**
+ * Load all options of the given TomSelect instance at once; searching,
+ * sorting and paging then happen on the client.
+ *
+ * The browser keeps the response, but revalidates it with every request via
+ * its ETag, which changes with the version of the model. The options are only
+ * replaced if the version (or the URL) changed since the last load. Responses
+ * for models without a tracked version always replace the options.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ * @param {string} url the URL of the complete results
+ * @param {Function} callback the load callback of the TomSelect instance
+ */
+function loadAll (ts, url, callback) {
+  const elem = ts.input
+  const filterValue = elem.filterByElem ? elem.filterByElem.value : null
+  fetchResults(url)
+    .then(json => {
+      const key = json.version ? `${url}#${json.version}` : null
+      if ((elem.filterByElem && elem.filterByElem.value !== filterValue) || (key && key === ts.loadedAll)) {
+        // Stale or unchanged results.
+        callback()
+        return
       }
+      if (json.has_more) console.warn(`MIZSelect: not all options of ${elem.dataset.model} could be loaded.`)
+      ts.loadedAll = key
+      ts.clearOptions()
+      ts.settings.showCreateOption = json.show_create_option
+      callback(json.results)
+    }).catch(() => {
+      callback()
     })
-  }).observe(elem, { attributeFilter: ['disabled'] })
 }
 
+/**
+ * Return the cache of the responses that are shown while the server throttles
+ * the requests of the given TomSelect instance.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ * @returns {LRUCache} the response cache
+ */
+function getResponseCache (ts) {
+  if (!ts.responseCache) ts.responseCache = new LRUCache(ts.settings.responseCacheSize)
+  return ts.responseCache
+}
+
+/**
+ * Load the options for the given search term once the given number of
+ * seconds has passed, if the dropdown is still open with that search term.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ * @param {string} query the search term
+ * @param {number} retryAfter the number of seconds to wait
+ */
+function retryLoad (ts, query, retryAfter) {
+  clearTimeout(ts.retryTimeout)
+  ts.retryTimeout = setTimeout(() => {
+    if (ts.isOpen && ts.inputValue() === query) ts.load(query)
+  }, retryAfter * 1000)
+}
+
+/**
+ * Request the given URL and return a promise of the parsed JSON response.
+ *
+ * @param {string} url the URL to fetch
+ * @returns a promise of the response data
+ */
+function fetchResults (url) {
+  // The header allows the service worker to cache the response.
+  return fetch(url, { headers: { [REQUEST_HEADER]: '1' } }).then(response => {
+    if (response.status === 429) throw new Throttled(parseRetryAfter(response.headers.get('Retry-After')))
+    return response.json()
+  })
+}
+
+/**
+ * Request the search results for the given URL over the WebSocket transport,
+ * if it is enabled, and return a promise of the parsed JSON response.
+ *
+ * A newer request of the same TomSelect instance supersedes this request,
+ * rejecting its promise. If the WebSocket is not available, fall back to an
+ * HTTP request.
+ *
+ * @param {TomSelect} ts the TomSelect instance
+ * @param {string} url the URL of the results
+ * @returns a promise of the response data
+ */
+function requestResults (ts, url) {
+  if (!stream.enabled) return fetchResults(url)
+  return stream.request(ts.inputId, url).catch(error => {
+    if (error instanceof TransportError) return fetchResults(url)
+    throw error
+  })
+}
+
+// Allow other scripts to discard cached autocomplete responses, f.ex. after
+// saving a model object.
+window.purgeMIZSelectCache = purgeCache
+
 /**
  * A global function that handles closing popups opened by 'add' and 'edit'
  * buttons. This function is called directly by script in the popup response,
@@ -162,8 +501,18 @@ function getSettings (elem) {
     if (elem.filterByElem) {
       params.append('f', `${elem.filterByLookup}=${elem.filterByElem.value}`)
     }
+    if (minQueryLength) {
+      // Let the view enforce the minimum length, too.
+      params.append('mq', minQueryLength)
+    }
+    if (elem.dataset.config) {
+      // The signed configuration of the widget that the view validates the
+      // requested lookups and values against.
+      params.append('cfg', elem.dataset.config)
+    }
     return `${elem.dataset.autocompleteUrl}?${params.toString()}`
   }
+  const minQueryLength = parseInt(elem.dataset.minQueryLength) || 0
   elem.extraColumns = elem.hasAttribute('is-tabular') ? JSON.parse(elem.dataset.extraColumns) : []
   elem.labelColClass = elem.extraColumns.length > 0 && elem.extraColumns.length < 4 ? 'col-5' : 'col'
   if (elem.dataset.filterBy) {
@@ -171,7 +520,7 @@ function getSettings (elem) {
     elem.filterByElem = getElementByPrefixedName(filterBy[0], [getFormPrefix(elem)])
     elem.filterByLookup = filterBy[1]
   }
-  return {
+  const settings = {
     preload: 'focus',
     maxOptions: null,
     searchField: [], // disable sifter search
@@ -190,29 +539,96 @@ function getSettings (elem) {
 
     firstUrl: (query) => buildUrl(query, 1),
     load: function (query, callback) {
+      const start = performance.now()
       const url = this.getUrl(query)
-      fetch(url)
-        .then(response => response.json())
+      const filterValue = elem.filterByElem ? elem.filterByElem.value : null
+      const model = elem.dataset.model
+      let results
+      if (this.prefetched && this.prefetched.url === url) {
+        results = this.prefetched.promise
+      } else if (backOffRemaining(model)) {
+        // Do not make requests while the server throttles them.
+        results = Promise.reject(new Throttled(backOffRemaining(model)))
+      } else {
+        results = requestResults(this, url)
+      }
+      this.prefetched = null
+      results
+        .then(json => {
+          getResponseCache(this).set(url, json)
+          return json
+        }, error => {
+          if (!(error instanceof Throttled)) throw error
+          backOff(model, error.retryAfter)
+          // Show the results from the last time this URL was requested, if
+          // possible; otherwise try again once the back-off is over.
+          const cached = getResponseCache(this).get(url)
+          if (cached) return cached
+          retryLoad(this, query, error.retryAfter)
+          throw error
+        })
         .then(json => {
+          if (elem.filterByElem && elem.filterByElem.value !== filterValue) {
+            // The filter changed while the request was underway; these
+            // results are no longer valid.
+            callback()
+            return
+          }
+          let nextUrl
           if (json.has_more) {
-            this.setNextUrl(query, buildUrl(query, json.page + 1))
+            nextUrl = buildUrl(query, json.page + 1)
+            this.setNextUrl(query, nextUrl)
+          } else if (json.page > 1) {
+            // All pages have been loaded.
+            nextUrl = false
           }
+          this.lastPage = { query, nextUrl }
           this.settings.showCreateOption = json.show_create_option
+          // The search exceeded its time budget on the server.
+          this.setPartialResults(Boolean(json.partial))
           // Workaround for an issue of the virtual scroll plugin
           // where it  scrolls to the top of the results whenever
           // a new page of results is added.
           // https://github.com/orchidjs/tom-select/issues/556
           const _scrollToOption = this.scrollToOption
           this.scrollToOption = () => {}
+          telemetry.measure('load', elem.dataset.model, start)
+          const callbackStart = performance.now()
           callback(json.results)
+          telemetry.measure('callback', elem.dataset.model, callbackStart)
+          if (this.lastKeystroke) {
+            // The time from the last keystroke until the options were rendered.
+            telemetry.measure('keystroke', elem.dataset.model, this.lastKeystroke)
+            this.lastKeystroke = null
+          }
           this.scrollToOption = _scrollToOption
         }).catch(() => {
           callback()
         })
     },
+    // The number of filter values for which the loaded options are cached.
+    filterCacheSize: 10,
+    // The number of responses kept to be shown while requests are throttled.
+    responseCacheSize: 50,
     plugins: getPlugins(elem),
     render: getRenderTemplates(elem)
   }
+  if (minQueryLength > 1) {
+    // Do not search for search terms that are too short.
+    settings.shouldLoad = (query) => query.length >= minQueryLength
+  }
+  if (elem.hasAttribute('load-all')) {
+    // Load all options once and search them on the client.
+    Object.assign(settings, {
+      searchField: [elem.dataset.labelField],
+      sortField: [{ field: '$score', direction: 'desc' }, { field: '$order', direction: 'asc' }],
+      shouldLoad: () => false,
+      load: function (query, callback) {
+        loadAll(this, `${buildUrl('', 1)}&all=1`, callback)
+      }
+    })
+  }
+  return settings
 }
 
 /**
@@ -226,8 +642,18 @@ function getPlugins (elem) {
   const plugins = {
     dropdown_input: null,
     virtual_scroll: null,
+    // Must come after virtual_scroll so that it can window the complete list.
+    dropdown_window: null,
+    bounded_options: null,
     edit_button: { editUrl: elem.dataset.editUrl },
-    no_backspace_delete: null
+    no_backspace_delete: null,
+    partial_results: null
+  }
+
+  if (elem.hasAttribute('load-all')) {
+    // All options are loaded at once and must all be kept.
+    delete plugins.virtual_scroll
+    delete plugins.bounded_options
   }
 
   if (elem.dataset.addUrl) {
@@ -282,6 +708,12 @@ function getRenderTemplates (elem) {
       return '<div><span>' + escape(data[this.settings.labelField]) + '</span></div>'
     }
   }
+  const minQueryLength = parseInt(elem.dataset.minQueryLength) || 0
+  if (minQueryLength > 1) {
+    templates.not_loading = function (data, escape) {
+      return `<div class="no-results">Type at least ${minQueryLength} characters to search</div>`
+    }
+  }
   if (elem.hasAttribute('is-tabular')) {
     templates.option = function (data, escape) {
       let columns = `<div class="${this.settings.labelColClass}">${data[this.settings.labelField]}</div>`
@@ -1,3 +1,5 @@
+import { purgeCache } from '../service_worker'
+
 // A helper function that first adds a new option with the given value and
 // text, and then selects that new option.
 function addAndSelectNewOption (ts, value, text) {
@@ -99,6 +101,7 @@ export default function (userOptions) {
       form.append('create-field', createField)
       form.append(createField, this.lastValue)
       form.append('model', elem.dataset.model)
+      if (elem.dataset.config) form.append('cfg', elem.dataset.config)
       const options = {
         method: 'POST',
         headers: {
@@ -118,6 +121,7 @@ export default function (userOptions) {
             msg = errorMessages[json.error_type] || errorMessages["error"]
             appendAlert(msg, json.error_level)
           } else {
+            purgeCache(elem.dataset.model)
             addAndSelectNewOption(this, json.pk, json.text)
           }
         }).catch((error) => console.log(error))
@@ -131,6 +135,7 @@ export default function (userOptions) {
   // Handle the creation of a new object from a popup. Add the object to the
   // available options and select it.
   addBtn.addEventListener('popupDismissed', (e) => {
+    purgeCache(elem.dataset.model)
     addAndSelectNewOption(this, e.detail.data.value, e.detail.data.text)
   })
 }
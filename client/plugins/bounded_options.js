@@ -0,0 +1,114 @@
+import { hashKey } from '../utils'
+
+/**
+ * Plugin: "bounded_options" (Tom Select)
+ *
+ * Limit the number of options that are kept in memory. When more than `limit`
+ * options have been loaded, the least recently used options are removed -
+ * unless they are selected or are part of the results of the current search.
+ *
+ * Removing options also prunes the per-query bookkeeping of TomSelect
+ * (loaded searches) and of the virtual_scroll plugin (next page URLs) for
+ * queries other than the current one.
+ *
+ * Configuration:
+ *   limit: the maximum number of options to keep; null disables the limit
+ */
+export default function (userOptions) {
+  const self = this
+  const options = Object.assign({ limit: 1000 }, userOptions)
+  if (options.limit === null) return
+
+  const recent = new Map() // option value -> true, least recently used first
+  const results = new Set() // option values of the current search results
+  const paged = new Set() // queries with an entry in the pagination mapping
+
+  const touch = (value) => {
+    const key = hashKey(value)
+    if (key === null) return
+    recent.delete(key)
+    recent.set(key, true)
+  }
+
+  /**
+   * Forget the loaded searches and the next page URLs of every query other
+   * than the current one.
+   */
+  function prune () {
+    const query = self.lastValue
+    Object.keys(self.loadedSearches).forEach(q => {
+      if (q !== query) delete self.loadedSearches[q]
+    })
+    if (!self.setNextUrl || ![...paged].some(q => q !== query)) return
+    if (paged.has(query)) {
+      // Keep the mapping for the current query.
+      const nextUrl = self.getUrl(query)
+      self.clearPagination()
+      self.setNextUrl(query, nextUrl)
+    } else {
+      self.clearPagination()
+    }
+  }
+
+  /**
+   * Remove the least recently used options until the limit is no longer
+   * exceeded.
+   */
+  function evict () {
+    let excess = Object.keys(self.options).length - options.limit
+    if (excess <= 0) return
+    // Options that were never used come first.
+    const candidates = Object.keys(self.options).filter(value => !recent.has(value)).concat([...recent.keys()])
+    const evicted = []
+    for (const value of candidates) {
+      if (excess <= 0) break
+      if (self.items.includes(value) || results.has(value) || self.options[value] === undefined) continue
+      evicted.push(value)
+      excess--
+    }
+    evicted.forEach(value => self.removeOption(value, true))
+    if (evicted.length) prune()
+  }
+
+  // Keep track of the queries in the virtual_scroll pagination mapping.
+  if (self.setNextUrl) {
+    const origSetNextUrl = self.setNextUrl
+    const origClearPagination = self.clearPagination
+    self.setNextUrl = (query, url) => {
+      paged.add(query)
+      origSetNextUrl(query, url)
+    }
+    self.clearPagination = () => {
+      paged.clear()
+      origClearPagination()
+    }
+  }
+
+  self.hook('after', 'render', (templateName, data) => {
+    if (templateName === 'option') touch(data[self.settings.valueField])
+  })
+  self.hook('after', 'setActiveOption', (option) => {
+    if (option && option.dataset.value !== undefined) touch(option.dataset.value)
+  })
+  self.on('item_add', (value) => touch(value))
+  self.on('option_remove', (value) => {
+    recent.delete(value)
+    results.delete(value)
+  })
+  self.on('option_clear', () => {
+    // A new search: the previous results are no longer current.
+    results.clear()
+    recent.forEach((_, value) => {
+      if (self.options[value] === undefined) recent.delete(value)
+    })
+  })
+  self.on('load', (loaded) => {
+    if (!loaded) return
+    loaded.forEach(data => {
+      const value = hashKey(data[self.settings.valueField])
+      results.add(value)
+      touch(value)
+    })
+    evict()
+  })
+}
@@ -0,0 +1,300 @@
+import { highlight, removeHighlight } from 'tom-select/src/contrib/highlight'
+import { hashKey } from '../utils'
+
+/**
+ * Plugin: "dropdown_window" (Tom Select)
+ *
+ * Only keep the options that are visible in the dropdown, plus a small buffer,
+ * in the DOM. The options outside of that window are replaced by two spacer
+ * elements that keep the scroll height of the list. Option elements that
+ * leave the window are recycled for the options that enter it.
+ *
+ * The plugin assumes that all options have the same height.
+ *
+ * Configuration:
+ *   minOptions: only use a window if the list has at least this many options
+ *   buffer: the number of options to render above and below the visible ones
+ *   optionHeight: the height of an option (in pixels) to assume until an
+ *     option element could be measured
+ *   poolSize: the maximum number of option elements kept for recycling
+ */
+export default function (userOptions) {
+  const self = this
+  const options = Object.assign({
+    minOptions: 100,
+    buffer: 10,
+    optionHeight: 32,
+    poolSize: 50
+  }, userOptions)
+
+  let windowed = false
+  let refreshing = false
+  let values = [] // the values of all options of the list, in order
+  let indexes = new Map() // value -> position in values
+  let rendered = new Map() // position -> option element
+  let placeholders = new Map() // value -> placeholder element
+  let optionHeight = options.optionHeight
+  let frame = null
+  const rows = new WeakSet() // option elements created by this plugin
+  const pool = []
+  const topSpacer = document.createElement('div')
+  const bottomSpacer = document.createElement('div')
+  topSpacer.className = bottomSpacer.className = 'ts-window-spacer'
+
+  const origRefreshOptions = self.refreshOptions
+  const origGetOption = self.getOption
+  const origGetAdjacent = self.getAdjacent
+  const origCanSelect = self.canSelect
+
+  /**
+   * Return a lightweight stand-in for the element of the option with the
+   * given value. refreshOptions adds these placeholders to the list instead of
+   * fully rendered options; they are replaced by the window afterwards.
+   */
+  function getPlaceholder (value) {
+    const key = hashKey(value)
+    if (placeholders.has(key)) return placeholders.get(key)
+    const data = self.options[key]
+    const el = document.createElement('div')
+    el.className = self.settings.optionClass
+    el.dataset.value = key
+    el.setAttribute('role', 'option')
+    el.id = data.$id
+    if (!data[self.settings.disabledField]) el.setAttribute('data-selectable', '')
+    placeholders.set(key, el)
+    return el
+  }
+
+  /**
+   * Return an option element for the given value, reusing a recycled element
+   * if one is available.
+   */
+  function acquire (value) {
+    const data = self.options[value]
+    // The active option keeps its element when it leaves the window.
+    if (data.$div && data.$div === self.activeOption) return data.$div
+    const fresh = self.render('option', data)
+    if (!self.settings.hideSelected) fresh.classList.toggle('selected', self.items.includes(value))
+    applyHighlight(fresh)
+    const el = pool.pop()
+    if (!el) {
+      rows.add(fresh)
+      return fresh
+    }
+    Array.from(el.attributes).forEach(attr => el.removeAttribute(attr.name))
+    Array.from(fresh.attributes).forEach(attr => el.setAttribute(attr.name, attr.value))
+    el.replaceChildren(...fresh.childNodes)
+    data.$div = el
+    return el
+  }
+
+  /**
+   * Highlight the search terms in the given option element.
+   */
+  function applyHighlight (el) {
+    const results = self.currentResults
+    if (!self.settings.highlight || !results) return
+    removeHighlight(el)
+    if (results.query.length && results.tokens.length) {
+      results.tokens.forEach(token => highlight(el, token.regex))
+    }
+  }
+
+  /**
+   * Remove the given option element from the list and make it available for
+   * recycling.
+   */
+  function release (el) {
+    el.remove()
+    if (el === self.activeOption) return
+    const data = self.options[el.dataset.value]
+    if (data && data.$div === el) delete data.$div
+    if (pool.length < options.poolSize) pool.push(el)
+  }
+
+  /**
+   * Return the position of the first option relative to the top of the
+   * scrollable content.
+   */
+  function listOffset () {
+    const content = self.dropdown_content
+    return topSpacer.getBoundingClientRect().top - content.getBoundingClientRect().top + content.scrollTop
+  }
+
+  /**
+   * Render the options that are in view (plus buffer). If `include` is given,
+   * make sure that the option at that position is rendered.
+   */
+  function renderWindow (include) {
+    if (!windowed) return
+    const content = self.dropdown_content
+    const top = content.scrollTop - listOffset()
+    const height = content.clientHeight || 300
+    let start = Math.max(0, Math.floor(top / optionHeight) - options.buffer)
+    let end = Math.min(values.length, Math.ceil((top + height) / optionHeight) + options.buffer)
+    if (include !== undefined && (include < start || include >= end)) {
+      if (include >= start - options.buffer && include < end + options.buffer) {
+        start = Math.min(start, include)
+        end = Math.max(end, include + 1)
+      } else {
+        // Too far away from the visible options: render the window around
+        // the option instead. Scrolling to the option (f.ex. via
+        // setActiveOption) will then render the options around it.
+        start = Math.max(0, include - options.buffer)
+        end = Math.min(values.length, include + options.buffer + 1)
+      }
+    }
+
+    rendered.forEach((el, i) => {
+      if (i < start || i >= end) {
+        rendered.delete(i)
+        release(el)
+      }
+    })
+    let prev = topSpacer
+    for (let i = start; i < end; i++) {
+      let el = rendered.get(i)
+      if (!el) {
+        el = acquire(values[i])
+        rendered.set(i, el)
+      }
+      if (prev.nextSibling !== el) prev.after(el)
+      prev = el
+    }
+    topSpacer.style.height = `${start * optionHeight}px`
+    bottomSpacer.style.height = `${(values.length - end) * optionHeight}px`
+
+    // Adjust the assumed option height once an option could be measured.
+    const first = rendered.get(start)
+    if (first && first.offsetHeight && first.offsetHeight !== optionHeight) {
+      optionHeight = first.offsetHeight
+      renderWindow(include)
+    }
+  }
+
+  /**
+   * Return the element of the option at the given position, rendering it if
+   * necessary.
+   */
+  function show (index) {
+    if (!rendered.has(index)) renderWindow(index)
+    return rendered.get(index)
+  }
+
+  /**
+   * Replace the placeholders added by refreshOptions with either the window
+   * or, for short lists, the fully rendered options.
+   */
+  function build () {
+    const content = self.dropdown_content
+    const activeValue = self.activeOption && self.activeOption.dataset.value
+    const active = placeholders.get(activeValue) === self.activeOption ? activeValue : null
+    const elements = Array.from(content.children).filter(el => placeholders.get(el.dataset.value) === el)
+    reset()
+
+    if (elements.length < options.minOptions || elements.length !== placeholders.size) {
+      // Short list (or grouped options): render every option.
+      placeholders.forEach((placeholder, value) => {
+        const el = origGetOption.call(self, value, true)
+        el.classList.toggle('selected', placeholder.classList.contains('selected'))
+        applyHighlight(el)
+        placeholder.replaceWith(el)
+      })
+      if (active !== null) self.setActiveOption(origGetOption.call(self, active))
+      placeholders = new Map()
+      return
+    }
+
+    windowed = true
+    values = elements.map(el => el.dataset.value)
+    indexes = new Map(values.map((value, i) => [value, i]))
+    elements[0].before(topSpacer)
+    elements[elements.length - 1].after(bottomSpacer)
+    elements.forEach(el => el.remove())
+    placeholders = new Map()
+    if (active !== null) self.setActiveOption(show(indexes.get(active)))
+    // Make sure that the options in view are rendered, even if the active
+    // option is not among them.
+    renderWindow()
+  }
+
+  /**
+   * Remove the window from the list.
+   */
+  function reset () {
+    windowed = false
+    rendered.forEach(el => release(el))
+    rendered = new Map()
+    values = []
+    indexes = new Map()
+    topSpacer.remove()
+    bottomSpacer.remove()
+  }
+
+  self.hook('instead', 'refreshOptions', function () {
+    refreshing = true
+    placeholders = new Map()
+    try {
+      origRefreshOptions.apply(self, arguments)
+    } finally {
+      refreshing = false
+    }
+    build()
+  })
+
+  self.hook('instead', 'getOption', (value, create = false) => {
+    if (!refreshing) return origGetOption.call(self, value, create)
+    const key = hashKey(value)
+    if (placeholders.has(key)) return placeholders.get(key)
+    if (!create || self.options[key] === undefined) return origGetOption.call(self, value, create)
+    return getPlaceholder(key)
+  })
+
+  // Keyboard navigation: the adjacent option may not be rendered yet.
+  self.hook('instead', 'getAdjacent', (option, direction, type = 'option') => {
+    if (!windowed || type !== 'option' || !option) return origGetAdjacent.call(self, option, direction, type)
+    if (!rows.has(option) || !indexes.has(option.dataset.value)) {
+      // An element before or after the list, f.ex. the 'loading more' option.
+      const after = bottomSpacer.compareDocumentPosition(option) & window.Node.DOCUMENT_POSITION_FOLLOWING
+      if (after && direction < 0) return show(values.length - 1)
+      if (!after && direction > 0 && option.compareDocumentPosition(topSpacer) & window.Node.DOCUMENT_POSITION_FOLLOWING) {
+        return show(0)
+      }
+      return origGetAdjacent.call(self, option, direction, type)
+    }
+    const target = indexes.get(option.dataset.value) + direction
+    let sibling = null
+    if (target < 0) {
+      sibling = topSpacer.previousElementSibling
+    } else if (target >= values.length) {
+      sibling = bottomSpacer.nextElementSibling
+    } else {
+      return show(target)
+    }
+    return sibling && sibling.matches('[data-selectable]') ? sibling : null
+  })
+
+  // The active option may have been scrolled out of the window.
+  self.hook('instead', 'canSelect', (option) => {
+    if (windowed && option && rows.has(option) && !self.dropdown_content.contains(option)) {
+      const index = indexes.get(option.dataset.value)
+      if (index !== undefined) show(index)
+    }
+    return origCanSelect.call(self, option)
+  })
+
+  self.on('initialize', () => {
+    self.dropdown_content.addEventListener('scroll', () => {
+      if (!windowed || frame) return
+      frame = window.requestAnimationFrame(() => {
+        frame = null
+        renderWindow()
+      })
+    })
+  })
+
+  // The dropdown had no height while it was closed; render the window again.
+  self.on('dropdown_open', () => renderWindow())
+  // clearOptions removes the cached option elements from the list.
+  self.on('option_clear', () => reset())
+}
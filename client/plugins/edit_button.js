@@ -1,3 +1,5 @@
+import { purgeCache } from '../service_worker'
+
 /**
    * Return a dom element from either a dom query string, jQuery object, a dom element or html string
    * https://stackoverflow.com/questions/494143/creating-a-new-dom-element-from-an-html-string-using-built-in-dom-methods-or-pro/35385518#35385518
@@ -82,6 +84,7 @@ export default function (userOptions) {
         popup.focus()
       })
       editButton.addEventListener('popupDismissed', (e) => {
+        purgeCache(this.input.dataset.model)
         item.querySelector('span').textContent = e.detail.data.text
       })
       item.appendChild(editButton)
@@ -0,0 +1,18 @@
+/**
+ * Plugin: "partial_results" (Tom Select)
+ *
+ * Show a notice above the options when the server could not search all
+ * objects within its time budget and only returned the results of a cheaper
+ * search. Call `setPartialResults(partial)` with the `partial` flag of each
+ * response.
+ */
+export default function (userOptions) {
+  const options = Object.assign({ text: 'Not all results are shown. Refine your search.' }, userOptions)
+  const notice = document.createElement('div')
+  notice.classList.add('partial-results', 'small', 'text-body-secondary', 'px-1', 'pb-1', 'd-none')
+  notice.textContent = options.text
+  this.setPartialResults = (partial) => notice.classList.toggle('d-none', !partial)
+  this.hook('after', 'setup', () => {
+    this.dropdown.insertBefore(notice, this.dropdown_content)
+  })
+};
@@ -0,0 +1,33 @@
+/**
+ * Registration of, and communication with, the MIZSelect service worker that
+ * caches autocomplete responses (see static/mizdb_tomselect/js/service_worker.js).
+ */
+
+// The header that marks the requests that the service worker may cache.
+export const REQUEST_HEADER = 'X-MIZSelect'
+
+/**
+ * Register the service worker if a URL is configured.
+ *
+ * Configuration:
+ *   url: the URL of the service worker script
+ *   scope: the scope of the service worker; it must include the pages with
+ *     MIZSelect elements
+ *
+ * @param {Object} options service worker configuration
+ */
+export function registerServiceWorker (options) {
+  if (!options || !options.url || !('serviceWorker' in navigator)) return
+  navigator.serviceWorker.register(options.url, { scope: options.scope || '/' }).catch(error => console.warn(error))
+}
+
+/**
+ * Discard the cached autocomplete responses for the given model, for example
+ * after an object was created or edited.
+ *
+ * @param {string} model the model label; discard all responses if omitted
+ */
+export function purgeCache (model) {
+  if (!('serviceWorker' in navigator) || !navigator.serviceWorker.controller) return
+  navigator.serviceWorker.controller.postMessage({ type: 'mizselect:purge', model })
+}
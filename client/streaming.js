@@ -0,0 +1,117 @@
+/**
+ * WebSocket transport for autocomplete requests (see mizdb_tomselect/streaming.py).
+ *
+ * All elements of a page share a single WebSocket. A request for an element
+ * supersedes the unfinished request of that element: its promise is rejected
+ * with a `Superseded` error, and the server does not send its response (nor
+ * runs it, if it has not started yet).
+ *
+ * If the WebSocket cannot be opened, closes or does not answer in time,
+ * requests are rejected with a `TransportError`, and callers should fall back
+ * to HTTP. After a failed connection, no new connection is attempted for
+ * `retryDelay` milliseconds.
+ *
+ * Throttled requests (429) are rejected with a `Throttled` error.
+ *
+ * Configuration:
+ *   url: the path of the WebSocket; if not set, the transport is disabled
+ *   timeout: the time (in milliseconds) to wait for a response
+ *   retryDelay: the time (in milliseconds) to wait before reconnecting
+ */
+
+import { Throttled } from './throttle'
+
+export class Superseded extends Error {}
+export class TransportError extends Error {}
+
+/**
+ * Create the WebSocket transport.
+ *
+ * @param {Object} userOptions transport configuration
+ * @returns an object with a `request` method and an `enabled` flag
+ */
+export default function createStream (userOptions) {
+  const options = Object.assign({ url: null, timeout: 10000, retryDelay: 30000 }, userOptions)
+  const enabled = Boolean(options.url && window.WebSocket)
+  let socket = null
+  let opened = null
+  let failedAt = null
+  let nextId = 1
+  // Maps request ids to their {resolve, reject, timer}.
+  const pending = new Map()
+  // Maps element keys to the id of their latest request.
+  const latest = new Map()
+
+  function settle (id, error, body) {
+    const request = pending.get(id)
+    if (!request) return
+    pending.delete(id)
+    clearTimeout(request.timer)
+    if (error) request.reject(error)
+    else request.resolve(body)
+  }
+
+  function fail () {
+    failedAt = Date.now()
+    socket = null
+    opened = null
+    for (const id of [...pending.keys()]) settle(id, new TransportError('WebSocket closed'))
+  }
+
+  function connect () {
+    const url = new URL(options.url, window.location.href)
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:'
+    socket = new window.WebSocket(url)
+    opened = new Promise((resolve, reject) => {
+      socket.addEventListener('open', () => resolve(socket))
+      socket.addEventListener('close', () => {
+        reject(new TransportError('WebSocket closed'))
+        fail()
+      })
+    })
+    // Rejections are handled by the requests waiting for the connection.
+    opened.catch(() => {})
+    socket.addEventListener('message', (e) => {
+      const { id, status, body } = JSON.parse(e.data)
+      let error = null
+      if (status === 429) {
+        error = new Throttled(body.retry_after)
+      } else if (status !== 200) {
+        error = new Error(`Autocomplete request failed with status ${status}`)
+      }
+      settle(id, error, body)
+    })
+  }
+
+  /**
+   * Request the given autocomplete URL for the element with the given key.
+   *
+   * @param {string} key a key that identifies the element
+   * @param {string} url the URL of the autocomplete request
+   * @returns a promise of the response data
+   */
+  function request (key, url) {
+    if (!enabled) return Promise.reject(new TransportError('WebSocket transport is not enabled'))
+    if (!socket) {
+      if (failedAt && Date.now() - failedAt < options.retryDelay) {
+        return Promise.reject(new TransportError('WebSocket is not available'))
+      }
+      connect()
+    }
+    const previous = latest.get(key)
+    if (previous) settle(previous, new Superseded())
+    const id = nextId++
+    latest.set(key, id)
+    const u = new URL(url, window.location.href)
+    const message = JSON.stringify({ id, key, url: `${u.pathname}${u.search}` })
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => settle(id, new TransportError('WebSocket request timed out')), options.timeout)
+      pending.set(id, { resolve, reject, timer })
+      opened.then(ws => {
+        if (pending.has(id)) ws.send(message)
+      }).catch(error => settle(id, error))
+    })
+  }
+
+  return { request, enabled }
+}
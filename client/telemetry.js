@@ -0,0 +1,80 @@
+/**
+ * Client-side performance telemetry for MIZSelect elements.
+ *
+ * Durations are recorded as `performance.measure` entries (named
+ * 'mizselect:<name>', with the model in the entry's detail) so that they show
+ * up in the browser's performance tools, and, if a collector URL is set, the
+ * samples are batched and sent to that URL with `navigator.sendBeacon`.
+ *
+ * Configuration:
+ *   enabled: whether to record anything at all
+ *   url: the URL of the collector view; if not set, samples are not sent
+ *   batchSize: send the samples once this many have been recorded
+ *   flushInterval: the maximum time (in ms) that samples are held back
+ *
+ * @param {Object} userOptions telemetry configuration
+ * @returns an object with a `measure` and a `flush` method
+ */
+export default function createTelemetry (userOptions) {
+  const options = Object.assign({
+    enabled: false,
+    url: null,
+    batchSize: 20,
+    flushInterval: 5000
+  }, userOptions)
+
+  let samples = []
+  let timer = null
+
+  /**
+   * Send the recorded samples to the collector.
+   */
+  function flush () {
+    if (timer) {
+      clearTimeout(timer)
+      timer = null
+    }
+    if (!samples.length || !options.url) return
+    const body = new window.Blob([JSON.stringify({ samples })], { type: 'application/json' })
+    samples = []
+    if (navigator.sendBeacon) {
+      navigator.sendBeacon(options.url, body)
+    } else {
+      fetch(options.url, { method: 'POST', body, keepalive: true }).catch(() => {})
+    }
+  }
+
+  /**
+   * Record the duration from `start` until now.
+   *
+   * @param {string} name the name of the measurement, f.ex. 'load'
+   * @param {string} model the label of the model of the element
+   * @param {number} start the start time (from `performance.now()`)
+   */
+  function measure (name, model, start) {
+    if (!options.enabled) return
+    const end = performance.now()
+    try {
+      performance.measure(`mizselect:${name}`, { start, end, detail: { model } })
+    } catch (e) {
+      // User Timing Level 3 is not supported.
+    }
+    if (!options.url) return
+    samples.push({ name, model, duration: end - start })
+    if (samples.length >= options.batchSize) {
+      flush()
+    } else if (!timer) {
+      timer = setTimeout(flush, options.flushInterval)
+    }
+  }
+
+  if (options.enabled) {
+    // Send the remaining samples before the page is hidden or unloaded.
+    document.addEventListener('visibilitychange', () => {
+      if (document.visibilityState === 'hidden') flush()
+    })
+    window.addEventListener('pagehide', flush)
+  }
+
+  return { measure, flush, enabled: options.enabled }
+}
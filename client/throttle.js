@@ -0,0 +1,54 @@
+/**
+ * Back-off after autocomplete requests were throttled by the server (429
+ * responses, see mizdb_tomselect/throttle.py).
+ *
+ * The server throttles the requests of a client per model, so the back-off
+ * applies to all elements of the same model.
+ */
+
+export class Throttled extends Error {
+  /**
+   * @param {number} retryAfter the number of seconds to wait
+   */
+  constructor (retryAfter) {
+    super(`Too many requests; retry after ${retryAfter} seconds.`)
+    this.retryAfter = retryAfter
+  }
+}
+
+// Maps model labels to the time until which no requests should be made.
+const backOffUntil = new Map()
+
+/**
+ * Return the number of seconds of the given Retry-After header value.
+ *
+ * @param {string} value the number of seconds or an HTTP date
+ * @returns {number} the number of seconds to wait (at least 1)
+ */
+export function parseRetryAfter (value) {
+  let seconds = Number(value)
+  if (!value || isNaN(seconds)) seconds = (Date.parse(value) - Date.now()) / 1000
+  return isNaN(seconds) ? 1 : Math.max(seconds, 1)
+}
+
+/**
+ * Stop making requests for the given model for the given number of seconds.
+ *
+ * @param {string} model the model label
+ * @param {number} retryAfter the number of seconds to wait
+ */
+export function backOff (model, retryAfter) {
+  const until = Date.now() + retryAfter * 1000
+  backOffUntil.set(model, Math.max(backOffUntil.get(model) || 0, until))
+}
+
+/**
+ * Return the number of seconds until requests for the given model may be
+ * made again, or 0.
+ *
+ * @param {string} model the model label
+ * @returns {number} the remaining seconds of the back-off
+ */
+export function backOffRemaining (model) {
+  return Math.max(((backOffUntil.get(model) || 0) - Date.now()) / 1000, 0)
+}
@@ -0,0 +1,13 @@
+/**
+ * Return the key under which TomSelect stores the option with the given value.
+ *
+ * Same as hash_key from tom-select/src/utils.
+ *
+ * @param value the value of an option
+ * @returns the value as a string, or null
+ */
+export function hashKey (value) {
+  if (typeof value === 'undefined' || value === null) return null
+  if (typeof value === 'boolean') return value ? '1' : '0'
+  return value + ''
+}
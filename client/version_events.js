@@ -0,0 +1,53 @@
+/**
+ * Subscription to the server-sent version events of models.
+ *
+ * A single EventSource per page receives the versions of the models of all
+ * watched elements. When the version of a model changes, `onChange` is called
+ * with the label of that model. When new models are watched, the connection
+ * is re-opened with the extended list of models.
+ *
+ * Configuration:
+ *   url: the URL of the version event stream; if not set, nothing is watched
+ *
+ * @param {Object} userOptions event stream configuration
+ * @param {Function} onChange called with the label of a changed model
+ * @returns an object with a `watch` method
+ */
+export default function createVersionEvents (userOptions, onChange) {
+  const options = Object.assign({ url: null }, userOptions)
+  const enabled = Boolean(options.url && window.EventSource)
+  // The last known version per model label.
+  const versions = new Map()
+  let source = null
+  let connectTimeout = null
+
+  function connect () {
+    connectTimeout = null
+    if (source) source.close()
+    const params = new URLSearchParams({ models: [...versions.keys()].join(',') })
+    source = new window.EventSource(`${options.url}?${params.toString()}`)
+    source.addEventListener('version', (e) => {
+      const { model, version } = JSON.parse(e.data)
+      const known = versions.get(model)
+      versions.set(model, version)
+      // The first event for a model only tells the current version.
+      if (known && known !== version) onChange(model)
+    })
+  }
+
+  /**
+   * Watch the versions of the given model.
+   *
+   * @param {string} model the model label
+   */
+  function watch (model) {
+    if (!enabled || !model) return
+    model = model.toLowerCase()
+    if (versions.has(model)) return
+    versions.set(model, null)
+    // Connect once for all elements that are initialized together.
+    if (!connectTimeout) connectTimeout = setTimeout(connect, 0)
+  }
+
+  return { watch }
+}
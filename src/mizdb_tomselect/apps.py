@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class MizdbTomselectConfig(AppConfig):
+    name = "mizdb_tomselect"
+    verbose_name = "MIZDB TomSelect"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from mizdb_tomselect.metrics import metrics_enabled, record_request
+        from mizdb_tomselect.signals import autocomplete_request_finished
+        from mizdb_tomselect.versions import model_changed
+
+        post_save.connect(model_changed, dispatch_uid="mizdb_tomselect_versions")
+        post_delete.connect(model_changed, dispatch_uid="mizdb_tomselect_versions")
+
+        if metrics_enabled():
+            autocomplete_request_finished.connect(record_request, dispatch_uid="mizdb_tomselect_metrics")
@@ -0,0 +1,118 @@
+"""
+Time budgets for the queries of autocomplete searches.
+
+`time_limit` aborts the queries made in its block once the given number of
+seconds has passed, using the mechanism of the database backend:
+    - SQLite: a progress handler that interrupts the query
+    - PostgreSQL: the `statement_timeout` setting
+    - MySQL: the `max_execution_time` setting (MariaDB: `max_statement_time`)
+Other backends do not limit the queries.
+
+An aborted query raises `BudgetExceeded`. The block runs in a transaction (or a
+savepoint) that is rolled back when the budget is exceeded, so that the
+connection can still be used afterwards.
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+# The number of SQLite virtual machine instructions between checks of the time.
+SQLITE_PROGRESS_STEPS = 1000
+# Error codes for aborted statements.
+POSTGRESQL_QUERY_CANCELED = "57014"
+MYSQL_QUERY_TIMEOUT = (3024, 1969)
+
+
+class BudgetExceeded(Exception):
+    """The time budget for a query was exceeded."""
+
+
+def time_budget():
+    """Return the time budget (in seconds) for searches, or None for no limit."""
+    return getattr(settings, "MIZDB_TOMSELECT_TIME_BUDGET", None)
+
+
+def scan_limit():
+    """Return the number of rows searched by the 'scan' fallback of a search."""
+    return getattr(settings, "MIZDB_TOMSELECT_SCAN_LIMIT", 1000)
+
+
+def _is_timeout(connection, exc):
+    if connection.vendor == "sqlite":
+        return "interrupted" in str(exc)
+    cause = exc.__cause__
+    if connection.vendor == "postgresql":
+        # psycopg uses 'sqlstate', psycopg2 'pgcode'.
+        code = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+        return code == POSTGRESQL_QUERY_CANCELED
+    if connection.vendor == "mysql":
+        args = getattr(cause, "args", None) or exc.args
+        return bool(args) and args[0] in MYSQL_QUERY_TIMEOUT
+    return False  # pragma: no cover
+
+
+@contextmanager
+def _sqlite_limit(connection, seconds):
+    deadline = time.monotonic() + seconds
+    connection.ensure_connection()
+    connection.connection.set_progress_handler(lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS)
+    try:
+        yield
+    finally:
+        connection.connection.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+
+
+@contextmanager
+def _postgresql_limit(connection, seconds):
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = %s", [max(int(seconds * 1000), 1)])
+    yield
+    # Not reset after an error: the rollback of the transaction undoes SET LOCAL.
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = DEFAULT")
+
+
+@contextmanager
+def _mysql_limit(connection, variable, value):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SET SESSION {variable} = %s", [value])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET SESSION {variable} = DEFAULT")
+
+
+def _limit(connection, seconds):
+    if connection.vendor == "sqlite":
+        return _sqlite_limit(connection, seconds)
+    if connection.vendor == "postgresql":
+        return _postgresql_limit(connection, seconds)
+    if connection.vendor == "mysql":
+        if connection.mysql_is_mariadb:
+            return _mysql_limit(connection, "max_statement_time", seconds)
+        return _mysql_limit(connection, "max_execution_time", max(int(seconds * 1000), 1))
+    return _no_limit()
+
+
+@contextmanager
+def _no_limit():
+    yield
+
+
+@contextmanager
+def time_limit(connection, seconds):
+    """
+    Abort the queries made on the given connection in this block after the
+    given number of seconds, raising `BudgetExceeded`.
+    """
+    try:
+        with transaction.atomic(using=connection.alias), _limit(connection, seconds):
+            yield
+    except OperationalError as exc:
+        if _is_timeout(connection, exc):
+            raise BudgetExceeded from exc
+        raise
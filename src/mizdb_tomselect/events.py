@@ -0,0 +1,140 @@
+"""
+Server-sent events with the change versions of models.
+
+If the MIZDB_TOMSELECT_VERSION_EVENTS setting is enabled, `version_stream_view`
+streams a 'version' event whenever the version of one of the requested models
+changes (see versions.py), so that open pages can discard outdated options.
+Only the versions of the models listed in the MIZDB_TOMSELECT_TRACKED_MODELS
+setting can be requested.
+
+    GET /mizdb_tomselect/events/?models=app.person,app.city
+
+    event: version
+    data: {"model": "app.person", "version": "1f0c6e2a9b3d"}
+
+When the stream opens, the current versions of all requested models are sent.
+Changes made in the same process are sent right away; changes made by other
+processes are noticed by checking the versions every
+MIZDB_TOMSELECT_VERSION_EVENTS_INTERVAL seconds (default: 5), which is also the
+interval of the keep-alive comments. After MIZDB_TOMSELECT_VERSION_EVENTS_MAX_AGE
+seconds (default: 300) the stream ends and the client reconnects.
+
+Under ASGI, the stream is an asynchronous generator that waits on the event
+loop. Note that with a WSGI server, every open stream occupies a worker thread.
+"""
+
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django import http
+from django.apps import apps
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from mizdb_tomselect.versions import changed, get_version, is_tracked, wait_changed
+
+# The maximum number of models per stream.
+MAX_MODELS = 50
+# The time (in milliseconds) that clients wait before reconnecting.
+RETRY = 3000
+
+
+def version_events_enabled():
+    """Return whether the version event stream is enabled."""
+    return getattr(settings, "MIZDB_TOMSELECT_VERSION_EVENTS", False)
+
+
+def get_models(value):
+    """Return the tracked models for the given comma-separated model labels."""
+    models = []
+    for label in value.split(",")[:MAX_MODELS]:
+        try:
+            model = apps.get_model(label.strip())
+        except (LookupError, ValueError):
+            continue
+        if is_tracked(model) and model not in models:
+            models.append(model)
+    return models
+
+
+def format_event(event, data):
+    """Return a server-sent event with the given name and JSON data."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def format_version(model, version):
+    """Return the 'version' event for the given model and version."""
+    return format_event("version", {"model": model._meta.label_lower, "version": version})
+
+
+def version_events(models, interval, max_age):
+    """
+    Yield a 'version' event for every change of the version of the given
+    models, until `max_age` seconds have passed.
+    """
+    yield f"retry: {RETRY}\n\n"
+    versions = {}
+    for model in models:
+        versions[model] = get_version(model)
+        yield format_version(model, versions[model])
+    deadline = time.monotonic() + max_age
+    while (remaining := deadline - time.monotonic()) > 0:
+        with changed:
+            changed.wait(timeout=min(interval, remaining))
+        sent = False
+        for model in models:
+            version = get_version(model)
+            if version != versions[model]:
+                versions[model] = version
+                sent = True
+                yield format_version(model, version)
+        if not sent:
+            # Keep the connection alive; this also lets the server notice
+            # clients that went away.
+            yield ": ping\n\n"
+
+
+async def aversion_events(models, interval, max_age):
+    """Asynchronous version of `version_events`."""
+    # The cache may do I/O; do not block the event loop.
+    aget_version = sync_to_async(get_version, thread_sensitive=False)
+    yield f"retry: {RETRY}\n\n"
+    versions = {}
+    for model in models:
+        versions[model] = await aget_version(model)
+        yield format_version(model, versions[model])
+    deadline = time.monotonic() + max_age
+    while (remaining := deadline - time.monotonic()) > 0:
+        await wait_changed(timeout=min(interval, remaining))
+        sent = False
+        for model in models:
+            version = await aget_version(model)
+            if version != versions[model]:
+                versions[model] = version
+                sent = True
+                yield format_version(model, version)
+        if not sent:
+            yield ": ping\n\n"
+
+
+def version_stream_view(request):
+    """Stream the version changes of the models given in the 'models' parameter."""
+    if not version_events_enabled():
+        raise http.Http404
+    models = get_models(request.GET.get("models", ""))
+    if not models:
+        return http.HttpResponseBadRequest()
+    interval = getattr(settings, "MIZDB_TOMSELECT_VERSION_EVENTS_INTERVAL", 5)
+    max_age = getattr(settings, "MIZDB_TOMSELECT_VERSION_EVENTS_MAX_AGE", 300)
+    if isinstance(request, ASGIRequest):
+        # A synchronous generator would be consumed completely before the
+        # first event is sent.
+        events = aversion_events(models, interval, max_age)
+    else:
+        events = version_events(models, interval, max_age)
+    response = http.StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Disable buffering in nginx.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,287 @@
+"""
+Replay simulated typing sessions against a running AutocompleteView.
+
+Every simulated user runs sessions one after another. In a session, the user
+types a search term (with TomSelect's load throttle applied: a request is only
+sent once typing pauses), occasionally hits backspace, may change the value of
+the `filter_by` field and scrolls through a number of result pages.
+
+Usage:
+
+    python -m mizdb_tomselect.loadtest http://localhost:8000/autocomplete/ \\
+        --model app.Person --users 20 --duration 60
+
+Only the standard library is used, so the tool can be run against any local
+runserver or ASGI server.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+# Default search terms if none are given.
+TERMS = ["alice", "bob", "charlotte", "daniel", "new york", "berlin", "smith", "müller", "an", "el"]
+
+
+def percentile(values, p):
+    """Return the p-th percentile (0-100) of the given values."""
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[min(max(int(p), 1), 99) - 1]
+
+
+class Stats:
+    """Thread-safe collection of request results."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)  # kind -> [latency in ms]
+        self.errors = defaultdict(int)  # kind -> number of failed requests
+        self.throttled = defaultdict(int)  # kind -> number of requests rejected with 429
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, kind, latency, ok, throttled=False):
+        with self._lock:
+            self.latencies[kind].append(latency)
+            if throttled:
+                self.throttled[kind] += 1
+            elif not ok:
+                self.errors[kind] += 1
+
+    def summary(self):
+        """
+        Return a dict with the throughput, latency percentiles, error rates and
+        the number of throttled requests.
+        """
+        duration = (self.finished or time.perf_counter()) - self.started
+
+        def describe(latencies, errors, throttled):
+            return {
+                "requests": len(latencies),
+                "errors": errors,
+                "error_rate": round(errors / len(latencies), 4) if latencies else 0,
+                "throttled": throttled,
+                "p50_ms": _round(percentile(latencies, 50)),
+                "p95_ms": _round(percentile(latencies, 95)),
+                "p99_ms": _round(percentile(latencies, 99)),
+                "max_ms": _round(max(latencies, default=None)),
+            }
+
+        with self._lock:
+            all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+            total = describe(all_latencies, sum(self.errors.values()), sum(self.throttled.values()))
+            total["duration_s"] = round(duration, 3)
+            total["throughput_rps"] = round(len(all_latencies) / duration, 2) if duration else 0
+            total["by_kind"] = {
+                kind: describe(latencies, self.errors[kind], self.throttled[kind])
+                for kind, latencies in sorted(self.latencies.items())
+            }
+        return total
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+class Client:
+    """Send autocomplete requests and record the results."""
+
+    def __init__(self, url, stats, params, timeout=10):
+        self.url = url
+        self.stats = stats
+        self.params = params
+        self.timeout = timeout
+
+    def fetch(self, kind, q, page=1, filter_by=None):
+        """Request a page of results and return the response data (or None)."""
+        params = {**self.params, "q": q, "p": page}
+        if filter_by is not None:
+            params["f"] = filter_by
+        start = time.perf_counter()
+        data = None
+        throttled = False
+        try:
+            with urlopen(f"{self.url}?{urlencode(params)}", timeout=self.timeout) as response:
+                data = json.loads(response.read())
+        except HTTPError as e:
+            throttled = e.code == 429
+        except (URLError, http.client.HTTPException, OSError, ValueError):
+            pass
+        self.stats.add(kind, (time.perf_counter() - start) * 1000, data is not None, throttled)
+        return data
+
+
+class Session:
+    """A simulated typing session of a single user."""
+
+    def __init__(self, fetch, rng, options, sleep=time.sleep):
+        self.fetch = fetch
+        self.rng = rng
+        self.options = options
+        self.sleep = sleep
+        self.filter_by = None
+        if options.filter_lookup and options.filter_values:
+            self.filter_by = self.random_filter()
+
+    def random_filter(self):
+        return f"{self.options.filter_lookup}={self.rng.choice(self.options.filter_values)}"
+
+    def pause(self):
+        """Wait between two keystrokes and return the duration of the pause."""
+        pause = self.rng.expovariate(1 / self.options.keystroke_delay) if self.options.keystroke_delay else 0
+        self.sleep(pause)
+        return pause
+
+    def type(self, term):
+        """
+        Type the term one character at a time and send a request whenever
+        typing pauses for longer than the load throttle.
+        """
+        query = ""
+        for char in term:
+            if query and self.rng.random() < self.options.backspace_rate:
+                # A typo: type a wrong character and delete it again.
+                query += self.rng.choice("abcdefghijklmnopqrstuvwxyz")
+                if self.pause() >= self.options.throttle:
+                    self.fetch("type", query, filter_by=self.filter_by)
+                query = query[:-1]
+                if self.pause() >= self.options.throttle:
+                    self.fetch("backspace", query, filter_by=self.filter_by)
+            query += char
+            if self.pause() >= self.options.throttle:
+                self.fetch("type", query, filter_by=self.filter_by)
+        # The last keystroke is always followed by a request.
+        return query, self.fetch("type", query, filter_by=self.filter_by)
+
+    def scroll(self, query, data):
+        """Fetch further pages of the results."""
+        page = 1
+        while data and data.get("has_more") and self.rng.random() < self.options.scroll_rate:
+            self.sleep(self.options.keystroke_delay)
+            page += 1
+            data = self.fetch("page", query, page=page, filter_by=self.filter_by)
+
+    def run(self):
+        # Opening the dropdown loads the first page of the default results.
+        self.fetch("open", "", filter_by=self.filter_by)
+        if self.filter_by and self.rng.random() < self.options.filter_change_rate:
+            self.filter_by = self.random_filter()
+            self.fetch("filter", "", filter_by=self.filter_by)
+        query, data = self.type(self.rng.choice(self.options.terms))
+        self.scroll(query, data)
+
+
+def run(options):
+    """Run the load test with the given options and return the statistics."""
+    stats = Stats()
+    params = {"model": options.model}
+    if options.search_lookup:
+        params["sl"] = options.search_lookup
+    if options.values:
+        params["vs"] = json.dumps(options.values)
+    if options.config:
+        params["cfg"] = options.config
+    client = Client(options.url, stats, params, timeout=options.timeout)
+    deadline = time.perf_counter() + options.duration if options.duration else None
+
+    def user(index):
+        rng = random.Random(f"{options.seed}-{index}")
+        sessions = 0
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if deadline is None and sessions >= options.sessions:
+                break
+            Session(client.fetch, rng, options).run()
+            sessions += 1
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(options.users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def format_summary(summary):
+    """Return the summary as a human-readable table."""
+    lines = [
+        f"{summary['requests']} requests in {summary['duration_s']} s "
+        f"({summary['throughput_rps']} req/s), {summary['errors']} errors ({summary['error_rate']:.2%}), "
+        f"{summary['throttled']} throttled",
+        "",
+        f"{'kind':<10} {'requests':>9} {'errors':>7} {'429':>7} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}",
+    ]
+    rows = list(summary["by_kind"].items()) + [("total", summary)]
+    for kind, row in rows:
+        values = [row[key] if row[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        lines.append(
+            f"{kind:<10} {row['requests']:>9} {row['errors']:>7} {row['throttled']:>7} "
+            + " ".join(f"{v:>9}" for v in values)
+        )
+    return "\n".join(lines)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m mizdb_tomselect.loadtest",
+        description="Replay simulated typing sessions against an autocomplete endpoint.",
+    )
+    parser.add_argument("url", help="the URL of the autocomplete view, f.ex. http://localhost:8000/autocomplete/")
+    parser.add_argument("--model", required=True, help="the model label, f.ex. 'app.Person'")
+    parser.add_argument("--search-lookup", help="the search lookup, f.ex. 'name__icontains'")
+    parser.add_argument("--values", nargs="+", help="the fields to request, f.ex. 'id name'")
+    parser.add_argument(
+        "--config", help="the signed widget configuration to send, i.e. the 'data-config' attribute of the widget"
+    )
+    parser.add_argument("--terms", nargs="+", default=TERMS, help="the search terms that the users type")
+    parser.add_argument("--filter-lookup", help="the lookup of the filter_by field, f.ex. 'city_id'")
+    parser.add_argument("--filter-values", nargs="+", default=[], help="the values of the filter_by field")
+    parser.add_argument("--users", type=int, default=10, help="the number of concurrent users")
+    parser.add_argument("--sessions", type=int, default=10, help="the number of sessions per user")
+    parser.add_argument(
+        "--duration", type=float, default=0, help="run for this many seconds instead of a number of sessions"
+    )
+    parser.add_argument(
+        "--keystroke-delay", type=float, default=0.15, help="the mean delay between keystrokes in seconds"
+    )
+    parser.add_argument(
+        "--throttle", type=float, default=0.3, help="the load throttle of the TomSelect elements in seconds"
+    )
+    parser.add_argument("--backspace-rate", type=float, default=0.05, help="the probability of a typo per keystroke")
+    parser.add_argument("--scroll-rate", type=float, default=0.5, help="the probability of loading the next page")
+    parser.add_argument(
+        "--filter-change-rate", type=float, default=0.2, help="the probability of a filter change per session"
+    )
+    parser.add_argument("--timeout", type=float, default=10, help="the request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random number generators")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    return parser
+
+
+def main(argv=None):
+    options = get_parser().parse_args(argv)
+    summary = run(options).summary()
+    if options.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
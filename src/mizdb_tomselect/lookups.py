@@ -0,0 +1,118 @@
+"""
+Validation of the lookups and values requested from autocomplete views.
+
+Widgets sign their configuration (see `sign_config`), and the autocomplete
+view rejects requests that ask for other lookups, values or create fields than
+the widget declared. Requests without a configuration are allowed, unless the
+MIZDB_TOMSELECT_REQUIRE_CONFIG setting is enabled.
+
+In addition, all requested lookups must stay within a cost policy (see
+`get_lookup_cost`): they must not use expensive lookup types like `regex`, and,
+if the MIZDB_TOMSELECT_MAX_JOINS setting is set, they may traverse at most that
+many relations.
+Lookups outside the policy need an explicit opt-in, either by the widget
+(`allow_expensive_lookups`) or by the view (`AutocompleteView.allowed_lookups`).
+"""
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import Col
+
+SALT = "mizdb_tomselect.config"
+
+# Lookup types that cannot use an index and are expensive on any table.
+EXPENSIVE_LOOKUPS = {"regex", "iregex"}
+
+
+class InvalidLookup(ValueError):
+    """The lookup does not resolve to a field of the model."""
+
+
+def max_joins():
+    """Return the maximum number of relations a lookup may traverse, or None for no limit."""
+    return getattr(settings, "MIZDB_TOMSELECT_MAX_JOINS", None)
+
+
+def config_required():
+    """Return whether requests must carry a signed widget configuration."""
+    return getattr(settings, "MIZDB_TOMSELECT_REQUIRE_CONFIG", False)
+
+
+def sign_config(config):
+    """Return the signed token for the given widget configuration."""
+    return signing.dumps(config, salt=SALT, compress=True)
+
+
+def load_config(token):
+    """Return the widget configuration of the given token, or raise BadSignature."""
+    return signing.loads(token, salt=SALT)
+
+
+def get_lookup_cost(model, lookup):
+    """
+    Return the number of relations that the given lookup traverses, and the
+    lookups and transforms applied to the field it ends on (f.ex. for
+    'city__name__icontains': (1, ['icontains'])).
+
+    Raise InvalidLookup if the lookup does not resolve to a field of the model,
+    followed by lookups and transforms that are registered for that field.
+    """
+    parts = lookup.split(LOOKUP_SEP)
+    opts = model._meta
+    joins = 0
+    field = None
+    for i, part in enumerate(parts):
+        if field is not None:
+            if not field.is_relation:
+                return joins, check_lookup_names(field, parts[i:], lookup)
+            if part != "pk":
+                try:
+                    field.related_model._meta.get_field(part)
+                except FieldDoesNotExist:
+                    # A lookup on the relation itself, f.ex. 'city__in'.
+                    return joins, check_lookup_names(field, parts[i:], lookup)
+            joins += 1
+            opts = field.related_model._meta
+        try:
+            field = opts.pk if part == "pk" else opts.get_field(part)
+        except FieldDoesNotExist:
+            raise InvalidLookup(lookup)
+    return joins, []
+
+
+def check_lookup_names(field, names, lookup):
+    """
+    Return the given names of the lookups and transforms that are applied to
+    the field, or raise InvalidLookup if one of them is not registered.
+
+    As in Django's queries, the last name may be a lookup or a transform; all
+    other names must be transforms.
+    """
+    output_field = field
+    for i, name in enumerate(names):
+        last = i == len(names) - 1
+        if last and output_field.get_lookup(name) is not None:
+            break
+        transform = output_field.get_transform(name)
+        if transform is None:
+            raise InvalidLookup(lookup)
+        if not last:
+            output_field = transform(Col(None, output_field)).output_field
+    return names
+
+
+def check_lookup(model, lookup, allowed=()):
+    """
+    Raise InvalidLookup if the given lookup is invalid or breaks the cost
+    policy, unless it is in `allowed`.
+    """
+    joins, lookups = get_lookup_cost(model, lookup)
+    if lookup in allowed:
+        return
+    limit = max_joins()
+    if limit is not None and joins > limit:
+        raise InvalidLookup(f"{lookup}: too many joins")
+    if EXPENSIVE_LOOKUPS.intersection(lookups):
+        raise InvalidLookup(f"{lookup}: expensive lookup")
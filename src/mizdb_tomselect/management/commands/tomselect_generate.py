@@ -0,0 +1,202 @@
+import math
+import random
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+
+SYLLABLES = (
+    "al an ar be ber ca cha da de do el en er fa fe ga gi ha he in ja ka ki la le li lo ma me mi mo na ne ni no "
+    "o pa pe ra re ri ro sa se si so ta te ti to u va ve wi ya ze"
+).split()
+
+
+def parse_distribution(value):
+    """
+    Parse a label length distribution of the form 'uniform:MIN:MAX' or
+    'normal:MEAN:STDDEV'.
+    """
+    try:
+        kind, a, b = value.split(":")
+        a, b = float(a), float(b)
+    except ValueError:
+        raise CommandError(f"Invalid label length distribution: {value!r}")
+    if kind not in ("uniform", "normal"):
+        raise CommandError(f"Unknown label length distribution: {kind!r}")
+    return kind, a, b
+
+
+def parse_fan_out(value):
+    """Parse a fan-out argument of the form 'FIELD=N'."""
+    try:
+        field_name, fan_out = value.split("=")
+        return field_name, int(fan_out)
+    except ValueError:
+        raise CommandError(f"Invalid fan-out: {value!r}")
+
+
+class LabelGenerator:
+    """Generate labels made up of pseudo-words."""
+
+    def __init__(self, rng, length, max_length, prefixes=0, prefix_share=0.0):
+        self.rng = rng
+        self.length = length
+        self.max_length = max_length
+        self.prefix_share = prefix_share
+        self.prefixes = [self.word() for _ in range(prefixes)]
+
+    def word(self):
+        return "".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(1, 4))).capitalize()
+
+    def label_length(self):
+        kind, a, b = self.length
+        if kind == "uniform":
+            length = self.rng.randint(int(a), int(b))
+        else:
+            length = round(self.rng.gauss(a, b))
+        return max(1, min(length, self.max_length))
+
+    def __call__(self):
+        length = self.label_length()
+        words = []
+        if self.prefixes and self.rng.random() < self.prefix_share:
+            words.append(self.rng.choice(self.prefixes))
+        while sum(len(w) + 1 for w in words) <= length:
+            words.append(self.word())
+        return " ".join(words)[:length].strip()
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic dataset for the given model."
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", help="the label of the model, f.ex. 'app.Person'")
+        parser.add_argument("--count", type=int, default=1000, help="the number of objects to create")
+        parser.add_argument("--seed", type=int, default=0, help="the seed for the random number generator")
+        parser.add_argument(
+            "--label-field",
+            help="the field that receives the generated labels (default: the model's name_field or 'name')",
+        )
+        parser.add_argument(
+            "--label-length",
+            default="uniform:8:30",
+            help="the distribution of label lengths: 'uniform:MIN:MAX' or 'normal:MEAN:STDDEV'",
+        )
+        parser.add_argument(
+            "--label-parts",
+            nargs="+",
+            default=[],
+            metavar="FIELD",
+            help=(
+                "fields that receive the words of the label: the last field receives the last word, the other "
+                "fields the preceding words (f.ex. --label-parts first_name last_name)"
+            ),
+        )
+        parser.add_argument("--prefixes", type=int, default=0, help="the number of shared label prefixes")
+        parser.add_argument(
+            "--prefix-share",
+            type=float,
+            default=0.5,
+            help="the fraction of labels that start with one of the shared prefixes",
+        )
+        parser.add_argument(
+            "--fan-out",
+            action="append",
+            default=[],
+            metavar="FIELD=N",
+            help=(
+                "create objects for the foreign key FIELD so that every related object is referenced by N objects "
+                "on average (f.ex. --fan-out city=50)"
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=5000, help="the batch size for bulk_create")
+        parser.add_argument("--clear", action="store_true", help="delete the existing objects of the model first")
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        count = options["count"]
+        options["label_length"] = parse_distribution(options["label_length"])
+        fan_outs = []
+        for field_name, fan_out in map(parse_fan_out, options["fan_out"]):
+            field = self.get_field(model, field_name)
+            if not field.many_to_one:
+                raise CommandError(f"{field_name!r} is not a foreign key")
+            fan_outs.append((field, fan_out))
+        label_field = options["label_field"] or self.get_label_field(model)
+        if options["clear"]:
+            model.objects.all().delete()
+        rng = random.Random(f"{options['seed']}-{model._meta.label_lower}-{model.objects.count()}")
+        related = {}
+        for field, fan_out in fan_outs:
+            related_model = field.related_model
+            related_count = math.ceil(count / max(fan_out, 1))
+            # The objects are spread over the related objects, so their primary
+            # keys have to be kept.
+            related[field.attname] = self.generate(
+                related_model,
+                related_count,
+                rng,
+                self.get_label_field(related_model),
+                options,
+                keep_pks=True,
+            )
+            self.stdout.write(f"Created {related_count} {related_model._meta.verbose_name_plural}.")
+        self.generate(model, count, rng, label_field, options, related, options["label_parts"])
+        self.stdout.write(self.style.SUCCESS(f"Created {count} {model._meta.verbose_name_plural}."))
+
+    def get_field(self, model, field_name):
+        try:
+            return model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            raise CommandError(f"{model._meta.label} has no field {field_name!r}")
+
+    def get_label_field(self, model):
+        return getattr(model, "name_field", "name")
+
+    def generate(self, model, count, rng, label_field, options, related=None, label_parts=(), keep_pks=False):
+        """
+        Create `count` objects of the given model in batches.
+
+        Every batch is committed on its own, so that large datasets do not end
+        up in a single transaction. If `keep_pks` is true, return the primary
+        keys of the created objects.
+        """
+        field = self.get_field(model, label_field)
+        part_fields = [self.get_field(model, name) for name in label_parts]
+        make_label = LabelGenerator(
+            rng,
+            options["label_length"],
+            field.max_length or 100,
+            options["prefixes"],
+            options["prefix_share"],
+        )
+        offset = model.objects.count()
+        pks = [] if keep_pks else None
+        for start in range(0, count, options["batch_size"]):
+            objs = []
+            for i in range(start, min(start + options["batch_size"], count)):
+                label = make_label()
+                if field.unique:
+                    label = f"{label} {offset + i}"[-(field.max_length or 100) :].strip()
+                values = {field.attname: label}
+                if part_fields:
+                    # The last part receives the last word, the first part all
+                    # the words that are left over.
+                    words = label.split(" ")
+                    split = len(words) - len(part_fields) + 1
+                    parts = [" ".join(words[:split])] + words[max(split, 0) :]
+                    for part_field, part in zip(part_fields, parts):
+                        values[part_field.attname] = part[: part_field.max_length]
+                for attname, choices in (related or {}).items():
+                    values[attname] = rng.choice(choices)
+                objs.append(model(**values))
+            model.objects.bulk_create(objs)
+            if keep_pks:
+                pks.extend(obj.pk for obj in objs)
+        if keep_pks and None in pks:
+            # The backend does not set the primary keys on bulk_create.
+            pks = list(model.objects.order_by("-pk").values_list("pk", flat=True)[:count])
+        return pks
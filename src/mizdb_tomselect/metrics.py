@@ -0,0 +1,260 @@
+"""
+In-process aggregation of autocomplete request metrics.
+
+When the MIZDB_TOMSELECT_METRICS setting is enabled, the receiver `record_request`
+is connected to the `autocomplete_request_finished` signal (see apps.py), and
+the aggregated metrics are exposed in the Prometheus text format by
+`metrics_view`. Measurements made by mizselect.js in the browser are collected
+by `telemetry_view`.
+
+`metrics_view` is only accessible to active staff users and to clients that
+send the token of the MIZDB_TOMSELECT_METRICS_TOKEN setting in the header
+'Authorization: Bearer <token>' (as Prometheus does with `bearer_token`).
+
+Note that the metrics are kept per process: with multiple worker processes,
+each process reports its own metrics.
+"""
+
+import hmac
+import json
+import math
+import threading
+from collections import Counter
+
+from django import http
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from mizdb_tomselect.profiling import is_staff
+
+# Upper bounds (in seconds) of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# The names of the measurements made by mizselect.js.
+CLIENT_PHASES = ("init", "load", "callback", "render", "keystroke")
+# The maximum number of samples accepted per telemetry request.
+MAX_SAMPLES = 100
+# The maximum duration (in milliseconds) of a sample.
+MAX_SAMPLE_DURATION = 60_000
+
+
+def metrics_enabled():
+    """Return whether autocomplete metrics should be collected."""
+    return getattr(settings, "MIZDB_TOMSELECT_METRICS", False)
+
+
+def page_bucket(page):
+    """Return the label for the bucket of the given page number."""
+    if page is None:
+        return ""
+    if not isinstance(page, int):
+        return "other"
+    if page <= 1:
+        return "1"
+    if page <= 5:
+        return "2-5"
+    return "6+"
+
+
+def _labels(names, values):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+class Metrics:
+    """A thread-safe store of aggregated autocomplete metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Discard all collected metrics."""
+        with self._lock:
+            # (model, method, status) -> count
+            self.requests = Counter()
+            # (model, method, page) -> [count per bucket..., sum, count]
+            self.durations = {}
+            # model -> number of database queries
+            self.queries = Counter()
+            # (model, outcome) -> count
+            self.creates = Counter()
+            # (model, result) -> count
+            self.cache = Counter()
+            # (model, phase) -> [count per bucket..., sum, count]
+            self.client_durations = {}
+
+    @staticmethod
+    def _observe_histogram(histograms, key, value):
+        histogram = histograms.setdefault(key, [0] * len(BUCKETS) + [0.0, 0])
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram[i] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def observe(self, model, method, status_code, duration, page=None, queries=0, cache=None, outcome=None):
+        """
+        Record a request.
+
+        Args:
+            model: the label of the requested model
+            method: the HTTP method of the request
+            status_code: the status code of the response
+            duration: the duration of the request in seconds
+            page: the requested page number
+            queries: the number of database queries
+            cache: the cache status ('hit' or 'miss') or None
+            outcome: the outcome of a POST request
+        """
+        key = (model, method, page_bucket(page))
+        with self._lock:
+            self.requests[(model, method, str(status_code))] += 1
+            self._observe_histogram(self.durations, key, duration)
+            self.queries[model] += queries
+            if outcome:
+                self.creates[(model, outcome)] += 1
+            if cache:
+                self.cache[(model, cache)] += 1
+
+    def observe_client(self, model, phase, duration):
+        """
+        Record a measurement made in the browser.
+
+        Args:
+            model: the label of the model of the element
+            phase: the name of the measurement (one of CLIENT_PHASES)
+            duration: the duration in seconds
+        """
+        with self._lock:
+            self._observe_histogram(self.client_durations, (model, phase), duration)
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def header(name, help_text, type_):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {type_}")
+
+        def histograms(name, label_names, items):
+            for values, histogram in sorted(items):
+                labels = _labels(label_names, values)
+                for bound, count in zip(BUCKETS, histogram):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram[-1]}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram[-2]}")
+                lines.append(f"{name}_count{{{labels}}} {histogram[-1]}")
+
+        with self._lock:
+            name = "mizdb_tomselect_requests_total"
+            header(name, "Number of autocomplete requests.", "counter")
+            for values, count in sorted(self.requests.items()):
+                lines.append(f"{name}{{{_labels(('model', 'method', 'status'), values)}}} {count}")
+
+            name = "mizdb_tomselect_request_duration_seconds"
+            header(name, "Duration of autocomplete requests.", "histogram")
+            histograms(name, ("model", "method", "page"), self.durations.items())
+
+            name = "mizdb_tomselect_queries_total"
+            header(name, "Number of database queries made by autocomplete requests.", "counter")
+            for model, count in sorted(self.queries.items()):
+                lines.append(f"{name}{{{_labels(('model',), (model,))}}} {count}")
+
+            name = "mizdb_tomselect_creates_total"
+            header(name, "Outcomes of autocomplete create (POST) requests.", "counter")
+            for values, count in sorted(self.creates.items()):
+                lines.append(f"{name}{{{_labels(('model', 'outcome'), values)}}} {count}")
+
+            name = "mizdb_tomselect_cache_total"
+            header(name, "Autocomplete responses served by a cache, by result (hit or miss).", "counter")
+            for values, count in sorted(self.cache.items()):
+                lines.append(f"{name}{{{_labels(('model', 'result'), values)}}} {count}")
+
+            name = "mizdb_tomselect_client_duration_seconds"
+            header(name, "Durations measured by mizselect.js in the browser.", "histogram")
+            histograms(name, ("model", "phase"), self.client_durations.items())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def record_request(
+    sender, model, method, status_code, phases, page=None, queries=0, cache=None, outcome=None, **kwargs
+):
+    """Receiver for the `autocomplete_request_finished` signal."""
+    duration = sum(phases.values()) / 1000
+    metrics.observe(model, method, status_code, duration, page=page, queries=queries, cache=cache, outcome=outcome)
+
+
+def metrics_token():
+    """Return the token that grants access to the metrics view, or None."""
+    return getattr(settings, "MIZDB_TOMSELECT_METRICS_TOKEN", None)
+
+
+def can_view_metrics(request):
+    """Return whether the request may read the metrics."""
+    if is_staff(request):
+        return True
+    token = metrics_token()
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(credentials.encode(), token.encode())
+
+
+def metrics_view(request):
+    """Return the aggregated metrics in the Prometheus text format."""
+    if not metrics_enabled():
+        raise http.Http404
+    if not can_view_metrics(request):
+        raise PermissionDenied
+    return http.HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _clean_sample(sample):
+    """Return (model, phase, duration in seconds) for a valid sample, else None."""
+    if not isinstance(sample, dict):
+        return None
+    phase, model, duration = sample.get("name"), sample.get("model"), sample.get("duration")
+    if phase not in CLIENT_PHASES or not isinstance(model, str):
+        return None
+    if not isinstance(duration, (int, float)) or not math.isfinite(duration):
+        return None
+    if not 0 <= duration <= MAX_SAMPLE_DURATION:
+        return None
+    try:
+        model = apps.get_model(model)._meta.label_lower
+    except (LookupError, ValueError):
+        return None
+    return model, phase, duration / 1000
+
+
+@csrf_exempt
+@require_POST
+def telemetry_view(request):
+    """
+    Collect measurements sent by mizselect.js (via `navigator.sendBeacon`).
+
+    The request body is a JSON object with a list of samples:
+        {"samples": [{"name": "load", "model": "app.person", "duration": 12.3}]}
+
+    Invalid samples are ignored.
+    """
+    if not metrics_enabled():
+        raise http.Http404
+    try:
+        samples = json.loads(request.body)["samples"]
+    except (ValueError, KeyError, TypeError):
+        return http.HttpResponseBadRequest()
+    if not isinstance(samples, list):
+        return http.HttpResponseBadRequest()
+    for sample in samples[:MAX_SAMPLES]:
+        cleaned = _clean_sample(sample)
+        if cleaned:
+            metrics.observe_client(*cleaned)
+    return http.HttpResponse(status=204)
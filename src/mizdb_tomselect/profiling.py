@@ -0,0 +1,138 @@
+"""
+Opt-in profiling of single autocomplete requests.
+
+If the MIZDB_TOMSELECT_PROFILE_DIR setting is set to a directory, an
+AutocompleteView request can be run under cProfile, with tracemalloc recording
+the memory allocations made during the request. The request is profiled if:
+    - the request has the header 'X-Tomselect-Profile' and was made by an
+      active staff user, or
+    - the request has the parameter 'profile' with a valid token created by
+      `make_token` for the user that made the request (the token is valid for
+      PROFILE_TOKEN_MAX_AGE seconds)
+
+The profile is stored in the directory, and its name is added to the response
+in the 'X-Tomselect-Profile-Id' header. Staff users can download it from
+`profile_download_view`:
+    - '<name>.prof': the cProfile statistics (load with `pstats` or
+      visualizers like snakeviz)
+    - '<name>.txt': a summary of the slowest functions and the largest
+      allocations
+
+Note that tracemalloc slows down the request considerably, so the durations in
+the profile are only meaningful relative to each other. Since tracemalloc
+traces the whole process, only one request is profiled at a time; concurrent
+profiled requests wait for their turn.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+from django import http
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import PermissionDenied
+
+PROFILE_HEADER = "X-Tomselect-Profile"
+PROFILE_ID_HEADER = "X-Tomselect-Profile-Id"
+PROFILE_VAR = "profile"
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+PROFILE_TOKEN_SALT = "mizdb_tomselect.profile"
+
+# The number of entries in the text summary.
+SUMMARY_LIMIT = 25
+
+NAME_PATTERN = re.compile(r"^[\w.-]+$")
+
+# Serializes profiled requests: tracemalloc is global to the process.
+_profile_lock = threading.Lock()
+
+
+def profile_dir():
+    """Return the directory for the profiles, or None if profiling is disabled."""
+    directory = getattr(settings, "MIZDB_TOMSELECT_PROFILE_DIR", None)
+    return Path(directory) if directory else None
+
+
+def make_token(user):
+    """Return a token for the `profile` request parameter of the given user."""
+    return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).sign(f"{user.pk}:{uuid.uuid4().hex}")
+
+
+def is_staff(request):
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def should_profile(request):
+    """Return whether the given request should be profiled."""
+    if PROFILE_HEADER in request.headers and is_staff(request):
+        return True
+    token = request.GET.get(PROFILE_VAR) or request.POST.get(PROFILE_VAR)
+    user = getattr(request, "user", None)
+    if token and user is not None and user.is_authenticated:
+        try:
+            value = signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).unsign(token, max_age=PROFILE_TOKEN_MAX_AGE)
+        except signing.BadSignature:
+            return False
+        return value.partition(":")[0] == str(user.pk)
+    return False
+
+
+def summarize(profiler, snapshot, limit=SUMMARY_LIMIT):
+    """Return a text summary of the profiler stats and the tracemalloc snapshot."""
+    stream = io.StringIO()
+    stream.write(f"Functions (top {limit} by cumulative time):\n")
+    pstats.Stats(profiler, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    stream.write(f"\nAllocations (top {limit} by size):\n")
+    for stat in snapshot.statistics("lineno")[:limit]:
+        stream.write(f"{stat}\n")
+    return stream.getvalue()
+
+
+def profile(func, label):
+    """
+    Call `func` under cProfile and tracemalloc and store the profile.
+
+    Return the result of the call and the name of the profile.
+    """
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+
+    with _profile_lock:
+        # tracemalloc may have been started by somebody else; leave it running then.
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(func)
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, cProfile.__file__)]
+            )
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+    profiler.dump_stats(directory / f"{name}.prof")
+    (directory / f"{name}.txt").write_text(summarize(profiler, snapshot))
+    return result, name
+
+
+def profile_download_view(request, name):
+    """Return the profile file with the given name as attachment."""
+    directory = profile_dir()
+    if directory is None:
+        raise http.Http404
+    if not is_staff(request):
+        raise PermissionDenied
+    path = directory / name
+    if not NAME_PATTERN.match(name) or path.suffix not in (".prof", ".txt") or not path.is_file():
+        raise http.Http404
+    return http.FileResponse(path.open("rb"), as_attachment=True, filename=name)
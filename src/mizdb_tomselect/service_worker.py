@@ -0,0 +1,23 @@
+"""
+Serve the service worker that caches autocomplete responses.
+
+Service workers can only control pages below the path of their script, unless
+the script is served with a 'Service-Worker-Allowed' header, which static file
+servers usually do not add. `service_worker_view` serves the script with that
+header, so the worker can be registered for any scope.
+"""
+
+from pathlib import Path
+
+from django import http
+from django.views.decorators.cache import cache_control
+
+SCRIPT_PATH = Path(__file__).parent / "static" / "mizdb_tomselect" / "js" / "service_worker.js"
+
+
+@cache_control(no_cache=True)
+def service_worker_view(request):
+    """Return the service worker script, allowed to control the whole site."""
+    response = http.FileResponse(SCRIPT_PATH.open("rb"), content_type="text/javascript")
+    response["Service-Worker-Allowed"] = "/"
+    return response
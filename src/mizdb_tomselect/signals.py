@@ -0,0 +1,42 @@
+"""
+Signals sent by the AutocompleteView over the lifecycle of a request.
+
+Both signals are sent with the view class as sender, and with these keyword
+arguments:
+    view: the AutocompleteView instance handling the request
+    request: the request
+    model: the label of the requested model (f.ex. 'testapp.person')
+    method: the HTTP method of the request
+    query_length: the length of the search term
+    filtered: whether the results are filtered by the value of another field
+    page: the requested page number (None for POST requests)
+
+`autocomplete_request_finished` additionally provides:
+    response: the response, or None if the view raised an exception (like
+      Http404), which Django turns into the response
+    status_code: the status code of the response
+    row_count: the number of results returned (or objects created)
+    phases: a dict mapping the phases of the request to their durations in
+      milliseconds
+    queries: the number of database queries
+    cache: 'hit' or 'miss' if the response was served by a cache, else None
+    outcome: the outcome of a POST request: 'created', 'unique' (the object
+      already exists), 'error', 'forbidden' or 'bad_request' (None for GET
+      requests)
+    partial: whether the search exceeded its time budget and only the results
+      of a cheaper search were returned
+
+Example:
+
+    from django.dispatch import receiver
+    from mizdb_tomselect.signals import autocomplete_request_finished
+
+    @receiver(autocomplete_request_finished)
+    def record_latency(sender, model, phases, **kwargs):
+        statsd.timing(f"autocomplete.{model}", sum(phases.values()))
+"""
+
+from django.dispatch import Signal
+
+autocomplete_request_started = Signal()
+autocomplete_request_finished = Signal()
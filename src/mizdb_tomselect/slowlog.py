@@ -0,0 +1,133 @@
+"""
+Logging of slow autocomplete requests.
+
+If the MIZDB_TOMSELECT_SLOW_THRESHOLD setting is set (in milliseconds), every
+AutocompleteView request that takes at least that long is logged to the
+'mizdb_tomselect.slow' logger, along with the normalized request parameters,
+the SQL of the result query (with placeholders instead of the query
+parameters, so that the search term is not logged). If the
+MIZDB_TOMSELECT_SLOW_EXPLAIN setting is enabled, the query plan reported by
+the database is logged as well, and plans that scan the whole table are
+flagged.
+"""
+
+import logging
+import re
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger("mizdb_tomselect.slow")
+
+# Patterns that match query plans of full table scans, per database vendor.
+FULL_SCAN_PATTERNS = {
+    # 'SCAN testapp_person' (but not 'SCAN testapp_person USING INDEX ...')
+    "sqlite": re.compile(r"^(?!.*\bUSING\b)(?!.*\bCONSTANT ROW\b).*\bSCAN\b", re.MULTILINE),
+    "postgresql": re.compile(r"\bSeq Scan\b"),
+    # The access type 'ALL' in the 'type' column.
+    "mysql": re.compile(r"\bALL\b"),
+    "oracle": re.compile(r"\bTABLE ACCESS (STORAGE )?FULL\b"),
+}
+
+
+def slow_threshold():
+    """
+    Return the duration (in milliseconds) above which requests are logged, or
+    None if slow requests should not be logged.
+    """
+    return getattr(settings, "MIZDB_TOMSELECT_SLOW_THRESHOLD", None)
+
+
+def explain_enabled():
+    """Return whether the query plans of slow requests should be logged."""
+    return getattr(settings, "MIZDB_TOMSELECT_SLOW_EXPLAIN", False)
+
+
+def is_full_scan(plan, vendor):
+    """Return whether the given query plan contains a full table scan."""
+    pattern = FULL_SCAN_PATTERNS.get(vendor)
+    return bool(pattern and pattern.search(plan))
+
+
+def normalize_params(view):
+    """
+    Return the parameters of the view's request without the search term or
+    filter value, so that requests of the same widget can be grouped together.
+    """
+    from mizdb_tomselect.views import FILTERBY_VAR, PAGE_VAR
+
+    request = view.request
+    request_data = getattr(request, request.method)
+    filter_by = None
+    if FILTERBY_VAR in request_data:
+        filter_by = request_data[FILTERBY_VAR].split("=")[0]
+    return {
+        "model": view.model._meta.label_lower,
+        "method": request.method,
+        "search_lookup": view.search_lookup,
+        "filter_by": filter_by,
+        "values": view.values_select,
+        "page": request_data.get(PAGE_VAR, "1") if request.method == "GET" else None,
+        "query_length": len(view.q),
+    }
+
+
+def get_sql(queryset):
+    """
+    Return the SQL of the given queryset with placeholders instead of the
+    query parameters, or None if the queryset cannot be compiled.
+    """
+    try:
+        sql, _params = queryset.query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return None
+    return sql
+
+
+def explain(queryset):
+    """Return the query plan of the given queryset, or None if it cannot be explained."""
+    try:
+        return queryset.explain()
+    except (EmptyResultSet, DatabaseError):
+        return None
+
+
+def log_slow_request(view, duration, queries=0):
+    """
+    Log the request of the given view as slow.
+
+    Args:
+        view: the AutocompleteView instance that handled the request
+        duration: the duration of the request in milliseconds
+        queries: the number of queries made by the request
+    """
+    params = normalize_params(view)
+    queryset = getattr(view, "page_results", None)
+    sql = plan = None
+    full_scan = False
+    if hasattr(queryset, "query"):
+        sql = get_sql(queryset)
+        if sql and explain_enabled():
+            plan = explain(queryset)
+            if plan:
+                full_scan = is_full_scan(plan, connections[queryset.db].vendor)
+    lines = [f"Slow autocomplete request for {params['model']} ({duration:.1f} ms, {queries} queries)"]
+    if full_scan:
+        lines[0] += ": FULL TABLE SCAN"
+    lines.append(f"params: {params}")
+    if sql:
+        lines.append(f"sql: {sql}")
+    if plan:
+        lines.append(f"plan:\n{plan}")
+    logger.warning(
+        "\n".join(lines),
+        extra={
+            "duration": duration,
+            "queries": queries,
+            "params": params,
+            "sql": sql,
+            "plan": plan,
+            "full_scan": full_scan,
+        },
+    )
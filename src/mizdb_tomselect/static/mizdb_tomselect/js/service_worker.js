@@ -0,0 +1,142 @@
+/* global caches, clients */
+/**
+ * Service worker that caches the responses of autocomplete requests made by
+ * MIZSelect elements across page loads (stale-while-revalidate).
+ *
+ * A cached response is returned immediately, while the response is fetched
+ * from the server in the background to update the cache. Responses carry the
+ * version of their model in the 'X-Model-Version' header; when a newer version
+ * is seen, the cached responses for that model are discarded.
+ *
+ * Pages can discard the cached responses for a model by posting the message
+ * {type: 'mizselect:purge', model: 'app.model'} (or {type: 'mizselect:purge'}
+ * to discard all), which mizselect.js does after creating or editing objects.
+ *
+ * Options are passed as parameters of the script URL:
+ *   maxEntries: the maximum number of cached responses (default: 500)
+ */
+const CACHE_NAME = 'mizselect-autocomplete-v1'
+const REQUEST_HEADER = 'X-MIZSelect'
+const VERSION_HEADER = 'X-Model-Version'
+const MAX_ENTRIES = parseInt(new URL(self.location).searchParams.get('maxEntries')) || 500
+
+// The most recent version seen per model.
+const versions = new Map()
+
+self.addEventListener('install', () => self.skipWaiting())
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then(names => Promise.all(
+        names.filter(name => name.startsWith('mizselect-') && name !== CACHE_NAME).map(name => caches.delete(name))
+      ))
+      .then(() => clients.claim())
+  )
+})
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request
+  if (request.method !== 'GET' || !request.headers.has(REQUEST_HEADER)) return
+  // Never serve profiled requests from the cache.
+  if (new URL(request.url).searchParams.has('profile')) return
+  event.respondWith(staleWhileRevalidate(event))
+})
+
+self.addEventListener('message', (event) => {
+  const data = event.data || {}
+  if (data.type === 'mizselect:purge') event.waitUntil(purge(data.model))
+})
+
+/**
+ * Return the cache key for the given URL: the URL with its query parameters
+ * sorted.
+ *
+ * @param {string} url the URL of an autocomplete request
+ * @returns {string} the normalized URL
+ */
+function normalize (url) {
+  const u = new URL(url)
+  const params = [...u.searchParams.entries()].sort((a, b) => {
+    return a[0] === b[0] ? (a[1] < b[1] ? -1 : a[1] > b[1] ? 1 : 0) : (a[0] < b[0] ? -1 : 1)
+  })
+  return `${u.origin}${u.pathname}?${new URLSearchParams(params).toString()}`
+}
+
+/**
+ * Return the (lower case) label of the model of the given autocomplete URL.
+ *
+ * @param {string} url the URL of an autocomplete request
+ * @returns {string} the model label
+ */
+function getModel (url) {
+  return (new URL(url).searchParams.get('model') || '').toLowerCase()
+}
+
+/**
+ * Return the cached response for the request, or the response of the server
+ * if nothing is cached. In both cases, update the cache with the response of
+ * the server.
+ *
+ * @param {FetchEvent} event the fetch event of the request
+ * @returns {Promise<Response>} the response
+ */
+async function staleWhileRevalidate (event) {
+  const key = normalize(event.request.url)
+  const model = getModel(key)
+  const cache = await caches.open(CACHE_NAME)
+  const cached = await cache.match(key)
+  const cachedVersion = cached ? cached.headers.get(VERSION_HEADER) : null
+  const network = fetch(event.request).then(async response => {
+    if (response.ok) await store(cache, key, model, response.clone(), cachedVersion)
+    return response
+  })
+  const known = versions.get(model)
+  if (cached && (!known || cachedVersion === known)) {
+    event.waitUntil(network.catch(() => {}))
+    return cached
+  }
+  return network.catch(() => cached || Response.error())
+}
+
+/**
+ * Add the response to the cache. If the response has a new version for its
+ * model, discard the cached responses for the old version first.
+ *
+ * @param {Cache} cache the cache
+ * @param {string} key the cache key of the response
+ * @param {string} model the model label
+ * @param {Response} response the response of the server
+ * @param {string} cachedVersion the version of the previously cached response
+ */
+async function store (cache, key, model, response, cachedVersion) {
+  const version = response.headers.get(VERSION_HEADER)
+  const previous = versions.get(model) || cachedVersion
+  if (version && previous && previous !== version) {
+    await purge(model)
+  }
+  if (version) versions.set(model, version)
+  await cache.put(key, response)
+  const keys = await cache.keys()
+  // Remove the oldest entries.
+  await Promise.all(keys.slice(0, Math.max(keys.length - MAX_ENTRIES, 0)).map(request => cache.delete(request)))
+}
+
+/**
+ * Discard the cached responses for the given model, or all cached responses
+ * if no model is given.
+ *
+ * @param {string} model the model label
+ */
+async function purge (model) {
+  const cache = await caches.open(CACHE_NAME)
+  if (!model) {
+    versions.clear()
+    await Promise.all((await cache.keys()).map(request => cache.delete(request)))
+    return
+  }
+  model = model.toLowerCase()
+  versions.delete(model)
+  const keys = await cache.keys()
+  await Promise.all(keys.filter(request => getModel(request.url) === model).map(request => cache.delete(request)))
+}
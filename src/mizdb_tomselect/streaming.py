@@ -0,0 +1,243 @@
+"""
+WebSocket transport for autocomplete requests.
+
+With this transport, the elements of a page share a single WebSocket instead of
+making an HTTP request for every search. Each message carries the URL of an
+autocomplete request, exactly as it would be requested over HTTP, and a key
+that identifies the element:
+
+    -> {"id": 7, "key": "id_person", "url": "/autocomplete/?q=ali&p=1&model=app.person&..."}
+    <- {"id": 7, "status": 200, "body": {"results": [...], "page": 1, ...}}
+
+The URL is resolved with the URLconf and handled by the view it points to,
+which must be an `AutocompleteView`. Requests are handled concurrently by a
+pool of MIZDB_TOMSELECT_STREAMING_WORKERS (default: 10) worker threads that is
+shared by all connections. A new message for a key supersedes the unfinished
+request for that key: if that request is still waiting for a worker thread, it
+is not run at all; a query that is already running is not interrupted, but its
+response is not sent.
+
+Wrap the ASGI application of the project to handle the WebSocket at a path:
+
+    # asgi.py
+    from django.core.asgi import get_asgi_application
+    from mizdb_tomselect.streaming import websocket_application
+
+    application = websocket_application(get_asgi_application(), path="/mizdb_tomselect/ws/")
+
+Requests made over the WebSocket do not pass through the middleware of the
+project (there is no `request.session`, for example). The user of every request
+is loaded from the session cookie of the handshake, so that a logout or an
+expired session applies to the next request.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpRequest, QueryDict
+from django.http.cookie import parse_cookie
+from django.urls import Resolver404, resolve
+
+from mizdb_tomselect.views import AutocompleteView
+
+logger = logging.getLogger("mizdb_tomselect.streaming")
+
+# The maximum number of unfinished requests per connection.
+MAX_PENDING = 20
+# The maximum size (in characters) of a message.
+MAX_MESSAGE_SIZE = 4096
+
+# The worker threads that handle the requests of all connections.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def max_workers():
+    """Return the number of worker threads that handle the requests."""
+    return getattr(settings, "MIZDB_TOMSELECT_STREAMING_WORKERS", 10)
+
+
+def get_executor():
+    """Return the executor of the worker threads, creating it if necessary."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers(), thread_name_prefix="mizdb_tomselect")
+        return _executor
+
+
+def get_meta(scope):
+    """Return the META dictionary of a request for the given WebSocket scope."""
+    meta = {
+        "REQUEST_METHOD": "GET",
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "SERVER_NAME": (scope.get("server") or ("unknown", None))[0],
+        "SERVER_PORT": str((scope.get("server") or (None, 80))[1] or 80),
+        "REMOTE_ADDR": (scope.get("client") or ("", None))[0],
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1").upper().replace("-", "_")
+        value = value.decode("latin1")
+        key = f"HTTP_{name}"
+        if key in meta:
+            value = f"{meta[key]},{value}"
+        meta[key] = value
+    return meta
+
+
+def is_same_origin(meta):
+    """
+    Return whether the WebSocket was opened by a page of the same host.
+
+    Browsers do not apply the same-origin policy to WebSockets, so without this
+    check, any site could make requests with the cookies of the user.
+    """
+    origin = meta.get("HTTP_ORIGIN")
+    if origin is None:
+        # Not opened by a browser.
+        return True
+    return urlsplit(origin).netloc == meta.get("HTTP_HOST")
+
+
+def build_request(meta, url, user):
+    """Return a GET request for the given URL."""
+    parts = urlsplit(url)
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = parts.path
+    request.META = {**meta, "PATH_INFO": parts.path, "QUERY_STRING": parts.query}
+    request.GET = QueryDict(parts.query)
+    request.COOKIES = parse_cookie(meta.get("HTTP_COOKIE", ""))
+    request.user = user
+    return request
+
+
+def load_user(meta):
+    """Return the user of the session of the given handshake."""
+    from django.contrib.auth import get_user
+    from django.contrib.auth.models import AnonymousUser
+
+    if not apps.is_installed("django.contrib.sessions"):
+        return AnonymousUser()
+    request = HttpRequest()
+    request.META = meta
+    request.COOKIES = parse_cookie(meta.get("HTTP_COOKIE", ""))
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    return get_user(request)
+
+
+def handle(meta, url):
+    """
+    Handle the autocomplete request for the given URL and return the status
+    code and the JSON body of the response.
+    """
+    close_old_connections()
+    try:
+        try:
+            match = resolve(urlsplit(url).path)
+        except Resolver404:
+            return 404, None
+        view_class = getattr(match.func, "view_class", None)
+        if view_class is None or not issubclass(view_class, AutocompleteView):
+            return 404, None
+        request = build_request(meta, url, load_user(meta))
+        request.resolver_match = match
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception("Error handling the autocomplete request %s", url)
+            return 500, None
+        if response.status_code == 429:
+            return 429, json.dumps({"retry_after": int(response["Retry-After"])})
+        if response.status_code != 200 or response.get("Content-Type") != "application/json":
+            return response.status_code, None
+        return 200, response.content.decode()
+    finally:
+        close_old_connections()
+
+
+def format_response(request_id, status, body=None):
+    """Return the message for the response to the request with the given id."""
+    # The body already is JSON.
+    return f'{{"id": {json.dumps(request_id)}, "status": {status}, "body": {body or "null"}}}'
+
+
+class AutocompleteSocket:
+    """ASGI application that handles autocomplete requests sent over a WebSocket."""
+
+    async def __call__(self, scope, receive, send):
+        meta = get_meta(scope)
+        # The unfinished request per key.
+        tasks = {}
+        lock = asyncio.Lock()
+
+        async def reply(message):
+            async with lock:
+                await send({"type": "websocket.send", "text": message})
+
+        async def run(request_id, url):
+            # Not thread-sensitive: requests of all connections would
+            # otherwise wait for each other in a single thread. A cancelled
+            # request that is already running raises CancelledError once it
+            # is done, so its response is not sent.
+            status, body = await sync_to_async(handle, thread_sensitive=False, executor=get_executor())(meta, url)
+            await reply(format_response(request_id, status, body))
+
+        try:
+            while True:
+                event = await receive()
+                if event["type"] == "websocket.connect":
+                    if not is_same_origin(meta):
+                        await send({"type": "websocket.close", "code": 4003})
+                        return
+                    await send({"type": "websocket.accept"})
+                elif event["type"] == "websocket.receive":
+                    text = event.get("text") or ""
+                    try:
+                        if len(text) > MAX_MESSAGE_SIZE:
+                            raise ValueError
+                        message = json.loads(text)
+                        request_id, key, url = message["id"], str(message["key"]), str(message["url"])
+                    except (ValueError, TypeError, KeyError):
+                        await reply(format_response(None, 400))
+                        continue
+                    # Cancel the superseded request of the element.
+                    previous = tasks.pop(key, None)
+                    if previous is not None:
+                        previous.cancel()
+                    if len(tasks) >= MAX_PENDING:
+                        await reply(format_response(request_id, 503))
+                        continue
+                    task = asyncio.ensure_future(run(request_id, url))
+                    task.add_done_callback(lambda t, key=key: tasks.pop(key, None) if tasks.get(key) is t else None)
+                    tasks[key] = task
+                elif event["type"] == "websocket.disconnect":
+                    return
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+
+def websocket_application(application, path="/mizdb_tomselect/ws/"):
+    """
+    Return an ASGI application that handles WebSocket connections to the given
+    path with an `AutocompleteSocket`, and everything else with `application`.
+    """
+    socket = AutocompleteSocket()
+
+    async def router(scope, receive, send):
+        if scope["type"] == "websocket" and scope["path"] == path:
+            return await socket(scope, receive, send)
+        return await application(scope, receive, send)
+
+    return router
@@ -0,0 +1,68 @@
+"""
+Token-bucket throttling of autocomplete requests.
+
+If the MIZDB_TOMSELECT_THROTTLE_RATE setting is set, each client (the user, or
+the session or IP address of anonymous users) has a bucket per model that
+holds up to MIZDB_TOMSELECT_THROTTLE_BURST tokens (default: 20) and is refilled
+with THROTTLE_RATE tokens per second. Every request takes a token; a request
+that finds the bucket empty is answered with a 429 response and a Retry-After
+header.
+
+The buckets are stored in the cache named by the MIZDB_TOMSELECT_CACHE setting.
+They are updated without locking, so concurrent requests of a client may
+occasionally take the same token.
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+
+from mizdb_tomselect.versions import get_cache
+
+CACHE_KEY_PREFIX = "mizdb_tomselect.throttle"
+
+
+def throttle_rate():
+    """Return the number of requests per second allowed per client, or None."""
+    return getattr(settings, "MIZDB_TOMSELECT_THROTTLE_RATE", None)
+
+
+def throttle_burst():
+    """Return the number of requests a client can make at once."""
+    return getattr(settings, "MIZDB_TOMSELECT_THROTTLE_BURST", 20)
+
+
+def get_client_id(request):
+    """Return the identifier of the client that made the request."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    session = getattr(request, "session", None)
+    if session is not None and session.session_key:
+        return f"session:{session.session_key}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def take_token(client_id, model, rate, burst):
+    """
+    Take a token from the bucket of the client for the given model.
+
+    Return None if a token was available, or else the number of seconds until
+    the next token is available.
+    """
+    digest = hashlib.md5(client_id.encode(), usedforsecurity=False).hexdigest()
+    key = f"{CACHE_KEY_PREFIX}.{model._meta.label_lower}.{digest}"
+    cache = get_cache()
+    # Wall-clock time, so that all processes agree on it.
+    now = time.time()
+    tokens, last = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + max(now - last, 0) * rate)
+    # The bucket is full again after this many seconds; then it can go.
+    timeout = math.ceil(burst / rate) + 1
+    if tokens < 1:
+        cache.set(key, (tokens, now), timeout=timeout)
+        return (1 - tokens) / rate
+    cache.set(key, (tokens - 1, now), timeout=timeout)
+    return None
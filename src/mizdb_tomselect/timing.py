@@ -0,0 +1,68 @@
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connections
+
+
+def server_timing_enabled():
+    """Return whether the Server-Timing header should be added to responses."""
+    return getattr(settings, "MIZDB_TOMSELECT_SERVER_TIMING", False)
+
+
+class PhaseTimer:
+    """Record the durations of the phases of a request and its query count."""
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+
+    @contextmanager
+    def phase(self, name):
+        """Measure the duration (in milliseconds) of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + (time.perf_counter() - start) * 1000
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def count_queries(self):
+        """Count the database queries made within the enclosed block."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self._count_query))
+            yield
+
+    def header(self):
+        """Return the value for the Server-Timing header."""
+        metrics = [f"{name};dur={duration:.2f}" for name, duration in self.phases.items()]
+        metrics.append(f'queries;desc="{self.queries}"')
+        return ", ".join(metrics)
+
+    def add_header(self, response):
+        """Add the Server-Timing header to the given response."""
+        response["Server-Timing"] = self.header()
+
+
+class NullTimer:
+    """A timer that does not record anything."""
+
+    phases = {}
+    queries = 0
+
+    def phase(self, name):
+        return nullcontext()
+
+    def count_queries(self):
+        return nullcontext()
+
+    def add_header(self, response):
+        pass
+
+
+NULL_TIMER = NullTimer()
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from mizdb_tomselect.events import version_stream_view
+from mizdb_tomselect.metrics import metrics_view, telemetry_view
+from mizdb_tomselect.profiling import profile_download_view
+from mizdb_tomselect.service_worker import service_worker_view
+
+app_name = "mizdb_tomselect"
+
+urlpatterns = [
+    path("metrics/", metrics_view, name="metrics"),
+    path("telemetry/", telemetry_view, name="telemetry"),
+    path("profiles/<str:name>", profile_download_view, name="profile"),
+    path("service_worker.js", service_worker_view, name="service_worker"),
+    path("events/", version_stream_view, name="version_events"),
+]
@@ -0,0 +1,122 @@
+"""
+Change versions of models.
+
+A model's version is an opaque token, stored in the cache named by the
+MIZDB_TOMSELECT_CACHE setting (default: 'default'), that changes whenever an
+object of the model is saved or deleted. Clients use it to revalidate data they
+have cached.
+
+Only the versions of the models listed in the MIZDB_TOMSELECT_TRACKED_MODELS
+setting are bumped, unless the MIZDB_TOMSELECT_VERSION_HEADER setting is
+enabled (every autocomplete response carries the version of its model), in
+which case the versions of all models are bumped. Since the settings are the
+same in every process, so are the models whose versions are bumped.
+
+Only changes that send the `post_save` or `post_delete` signals are noticed:
+`bulk_create`, `update` and raw SQL do not change the version; call
+`bump_version` after such changes. Use a cache that is shared between
+processes, otherwise each process keeps its own versions.
+"""
+
+import asyncio
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_KEY_PREFIX = "mizdb_tomselect.version"
+
+# Notified whenever a version is bumped in this process.
+changed = threading.Condition()
+# The (loop, asyncio.Event) pairs of the coroutines waiting in `wait_changed`.
+_async_waiters = set()
+
+
+def version_header_enabled():
+    """Return whether autocomplete responses should carry the model's version."""
+    return getattr(settings, "MIZDB_TOMSELECT_VERSION_HEADER", False)
+
+
+def tracked_models():
+    """Return the labels of the models whose versions are bumped when they change."""
+    return getattr(settings, "MIZDB_TOMSELECT_TRACKED_MODELS", ())
+
+
+def all_models_versioned():
+    """Return whether the versions of all models should be bumped."""
+    return version_header_enabled()
+
+
+def get_cache():
+    return caches[getattr(settings, "MIZDB_TOMSELECT_CACHE", "default")]
+
+
+def _concrete(model):
+    return model._meta.concrete_model
+
+
+def _cache_key(model):
+    return f"{CACHE_KEY_PREFIX}.{_concrete(model)._meta.label_lower}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def is_tracked(model):
+    """Return whether the given model is listed in MIZDB_TOMSELECT_TRACKED_MODELS."""
+    label = _concrete(model)._meta.label_lower
+    return any(label == tracked.lower() for tracked in tracked_models())
+
+
+def is_versioned(model):
+    """Return whether the version of the given model is bumped when it changes."""
+    return all_models_versioned() or is_tracked(model)
+
+
+def get_version(model):
+    """Return the current version of the given model."""
+    cache = get_cache()
+    key = _cache_key(model)
+    version = cache.get(key)
+    if version is None:
+        # Versions are random so that a cleared cache cannot bring back an
+        # old version.
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            # Another process set the version in the meantime.
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(model):
+    """Change the version of the given model."""
+    get_cache().set(_cache_key(model), _new_version(), timeout=None)
+    with changed:
+        changed.notify_all()
+        for loop, event in _async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+
+async def wait_changed(timeout):
+    """
+    Wait until a version is bumped in this process, or until the given number
+    of seconds have passed.
+    """
+    waiter = (asyncio.get_running_loop(), asyncio.Event())
+    with changed:
+        _async_waiters.add(waiter)
+    try:
+        await asyncio.wait_for(waiter[1].wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        with changed:
+            _async_waiters.discard(waiter)
+
+
+def model_changed(sender, **kwargs):
+    """Receiver for the `post_save` and `post_delete` signals."""
+    if is_versioned(sender):
+        bump_version(sender)
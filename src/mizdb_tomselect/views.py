@@ -1,37 +1,253 @@
+import hashlib
 import json
+import math
+import time
+from contextlib import nullcontext
+from functools import partial
 
 from django import http, views
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_permission_codename
-from django.db import transaction, IntegrityError
+from django.core import signing
+from django.core.exceptions import BadRequest, PermissionDenied, SuspiciousOperation
+from django.db import connections, transaction, IntegrityError
 from django.template.response import TemplateResponse
+from django.utils.http import parse_etags
+
+from mizdb_tomselect.budget import BudgetExceeded, scan_limit, time_budget, time_limit
+from mizdb_tomselect.lookups import InvalidLookup, check_lookup, config_required, load_config
+from mizdb_tomselect.profiling import PROFILE_ID_HEADER, profile, profile_dir, should_profile
+from mizdb_tomselect.signals import autocomplete_request_finished, autocomplete_request_started
+from mizdb_tomselect.slowlog import log_slow_request, slow_threshold
+from mizdb_tomselect.throttle import get_client_id, take_token, throttle_burst, throttle_rate
+from mizdb_tomselect.timing import NULL_TIMER, PhaseTimer, server_timing_enabled
+from mizdb_tomselect.versions import get_cache, get_version, is_versioned, version_header_enabled
 
 SEARCH_VAR = "q"
 SEARCH_LOOKUP_VAR = "sl"
 FILTERBY_VAR = "f"
 VALUES_VAR = "vs"
 IS_POPUP_VAR = "_popup"
+LOAD_ALL_VAR = "all"
+MIN_QUERY_LENGTH_VAR = "mq"
+CONFIG_VAR = "cfg"
+
+MODEL_VERSION_HEADER = "X-Model-Version"
 
 PAGE_VAR = "p"
 PAGE_SIZE = 20
 
 
+def load_all_limit():
+    """Return the maximum number of results returned for LOAD_ALL_VAR requests."""
+    return getattr(settings, "MIZDB_TOMSELECT_LOAD_ALL_LIMIT", 5000)
+
+
+def min_query_length():
+    """Return the minimum length of search terms for all autocomplete views."""
+    return getattr(settings, "MIZDB_TOMSELECT_MIN_QUERY_LENGTH", 0)
+
+
+def get_exception_status_code(exc):
+    """Return the status code of the response that Django makes for the given exception."""
+    if isinstance(exc, http.Http404):
+        return 404
+    if isinstance(exc, PermissionDenied):
+        return 403
+    if isinstance(exc, (BadRequest, SuspiciousOperation)):
+        return 400
+    return 500
+
+
 class AutocompleteView(views.generic.list.BaseListView):
     """Base list view for queries from TomSelect select elements."""
 
     paginate_by = PAGE_SIZE
     page_kwarg = PAGE_VAR
+    timer = NULL_TIMER
+    row_count = 0
+    cache_status = None
+    create_outcome = None
+    partial = False
+    # The time (in seconds) that the results for short search terms are cached.
+    short_query_cache_timeout = 300
+    # Lookups that may be requested even though they break the cost policy
+    # (see lookups.py), f.ex. ["name__iregex"].
+    allowed_lookups = ()
+    config = None
+    # The reason why the request is invalid, set up in `setup`.
+    request_error = None
+
+    def get_timer(self):
+        """
+        Return the timer that records the phases of the request.
+
+        Unless the MIZDB_TOMSELECT_SERVER_TIMING setting is enabled, slow
+        requests are logged or there are receivers for the
+        `autocomplete_request_finished` signal, return a timer that does not
+        record anything.
+        """
+        if (
+            server_timing_enabled()
+            or slow_threshold() is not None
+            or autocomplete_request_finished.has_listeners(type(self))
+        ):
+            return PhaseTimer()
+        return NULL_TIMER
 
     def setup(self, request, *args, **kwargs):
-        super().setup(request, *args, **kwargs)
-        request_data = getattr(request, request.method)
-        self.model = apps.get_model(request_data["model"])
-        self.create_field = request_data.get("create-field")
-        self.search_lookup = request_data.get(SEARCH_LOOKUP_VAR)
-        self.values_select = []
-        if VALUES_VAR in request_data:
-            self.values_select = json.loads(request_data[VALUES_VAR])
-        self.q = request_data.get(SEARCH_VAR, "")
+        self.timer = self.get_timer()
+        with self.timer.phase("setup"):
+            super().setup(request, *args, **kwargs)
+            request_data = getattr(request, request.method)
+            self.model = apps.get_model(request_data["model"])
+            self.create_field = request_data.get("create-field")
+            self.search_lookup = request_data.get(SEARCH_LOOKUP_VAR)
+            self.values_select = []
+            if VALUES_VAR in request_data:
+                try:
+                    values_select = json.loads(request_data[VALUES_VAR])
+                except json.JSONDecodeError:
+                    values_select = None
+                if isinstance(values_select, list) and all(isinstance(v, str) for v in values_select):
+                    self.values_select = values_select
+                else:
+                    self.request_error = "Invalid values."
+            self.q = request_data.get(SEARCH_VAR, "")
+            if CONFIG_VAR in request_data:
+                try:
+                    self.config = load_config(request_data[CONFIG_VAR])
+                except signing.BadSignature:
+                    self.request_error = "Invalid widget configuration."
+
+    def get_signal_kwargs(self):
+        """Return the keyword arguments for the request lifecycle signals."""
+        request = self.request
+        page = None
+        if request.method == "GET":
+            page = request.GET.get(PAGE_VAR, "1")
+            page = int(page) if page.isdigit() else page
+        return {
+            "view": self,
+            "request": request,
+            "model": self.model._meta.label_lower,
+            "method": request.method,
+            "query_length": len(self.q),
+            "filtered": FILTERBY_VAR in request.GET,
+            "page": page,
+        }
+
+    def dispatch(self, request, *args, **kwargs):
+        sender = type(self)
+        if autocomplete_request_started.has_listeners(sender):
+            autocomplete_request_started.send(sender=sender, **self.get_signal_kwargs())
+        response = None
+        try:
+            with self.timer.count_queries():
+                retry_after = self.get_retry_after(request)
+                if retry_after is not None:
+                    response = http.HttpResponse(status=429)
+                    response["Retry-After"] = str(math.ceil(retry_after))
+                elif error := self.check_request():
+                    response = http.HttpResponseBadRequest(error)
+                elif profile_dir() is not None and should_profile(request):
+                    dispatch = partial(super().dispatch, request, *args, **kwargs)
+                    response, name = profile(dispatch, label=self.model._meta.label_lower)
+                    response[PROFILE_ID_HEADER] = name
+                else:
+                    response = super().dispatch(request, *args, **kwargs)
+            if server_timing_enabled():
+                self.timer.add_header(response)
+            status_code = response.status_code
+        except Exception as exc:
+            # Django turns the exception into the response.
+            status_code = get_exception_status_code(exc)
+            raise
+        finally:
+            self.finish_request(response, status_code)
+        return response
+
+    def finish_request(self, response, status_code):
+        """
+        Log the request if it was slow and send the finished signal.
+
+        `response` is None if the view raised an exception.
+        """
+        sender = type(self)
+        threshold = slow_threshold()
+        if threshold is not None:
+            duration = sum(self.timer.phases.values())
+            if duration >= threshold:
+                log_slow_request(self, duration, self.timer.queries)
+        if autocomplete_request_finished.has_listeners(sender):
+            autocomplete_request_finished.send(
+                sender=sender,
+                response=response,
+                status_code=status_code,
+                row_count=self.row_count,
+                phases=dict(self.timer.phases),
+                queries=self.timer.queries,
+                cache=self.cache_status,
+                outcome=self.create_outcome,
+                partial=self.partial,
+                **self.get_signal_kwargs(),
+            )
+
+    def get_retry_after(self, request):
+        """
+        Take a token from the throttle bucket of the client (see throttle.py).
+
+        Return None if the request may proceed, or else the number of seconds
+        the client has to wait.
+        """
+        rate = throttle_rate()
+        if not rate:
+            return None
+        return take_token(get_client_id(request), self.model, rate, throttle_burst())
+
+    def get_filter_by_lookup(self):
+        """Return the lookup of the `FILTERBY_VAR` parameter, or None."""
+        if FILTERBY_VAR not in self.request.GET:
+            return None
+        return self.request.GET[FILTERBY_VAR].split("=")[0]
+
+    def check_request(self):
+        """
+        Return an error message if the request asks for lookups, values or a
+        create field that its widget did not declare, or for lookups that
+        break the cost policy (see lookups.py). Return None if the request is
+        valid.
+        """
+        if self.request_error:
+            return self.request_error
+        config = self.config
+        lookups = {self.search_lookup, self.get_filter_by_lookup(), *self.values_select} - {None}
+        if self.request.method == "POST":
+            lookups = {self.create_field} - {None}
+        if config is None:
+            if config_required():
+                return "Widget configuration required."
+        else:
+            declared = {
+                "model": config["model"] == self.model._meta.label_lower,
+                "search lookup": self.search_lookup in (None, config["sl"]),
+                "filter": self.get_filter_by_lookup() in (None, config["f"]),
+                "values": set(self.values_select) <= set(config["vs"]),
+                "create field": self.create_field in (None, config["cf"]),
+            }
+            for name, valid in declared.items():
+                if not valid:
+                    return f"The {name} was not declared by the widget."
+            if config.get("x"):
+                # The widget opted in to expensive lookups.
+                return None
+        for lookup in lookups:
+            try:
+                check_lookup(self.model, lookup, allowed=self.allowed_lookups)
+            except InvalidLookup as e:
+                return f"Invalid lookup: {e}"
+        return None
 
     def apply_filter_by(self, queryset):
         """
@@ -70,6 +286,113 @@ class AutocompleteView(views.generic.list.BaseListView):
             queryset = self.search(queryset, self.q)
         return self.order_queryset(queryset)
 
+    def get_min_query_length(self):
+        """
+        Return the minimum length of the search term.
+
+        The request may ask for a longer minimum (MIN_QUERY_LENGTH_VAR, set by
+        the `min_query_length` argument of the widget) than the
+        MIZDB_TOMSELECT_MIN_QUERY_LENGTH setting, but not for a shorter one.
+        """
+        if self.config is not None:
+            # The minimum of the widget cannot be lowered by the request.
+            requested = str(self.config["mq"])
+        else:
+            requested = self.request.GET.get(MIN_QUERY_LENGTH_VAR, "")
+        return max(min_query_length(), int(requested) if requested.isdigit() else 0)
+
+    def is_short_query(self):
+        """Return whether the search term is too short to search for."""
+        return 0 < len(self.q) < self.get_min_query_length()
+
+    def get_short_query_results(self):
+        """
+        Return the first page of results for an empty search term, in place of
+        the results for a search term that is too short.
+
+        If the version of the model is tracked (see versions.py), the results
+        are cached until the model changes or `short_query_cache_timeout`
+        seconds have passed.
+        """
+        if not is_versioned(self.model):
+            return self.get_empty_query_results()
+        params = sorted(
+            (k, v) for k, v in self.request.GET.items() if k not in (SEARCH_VAR, PAGE_VAR, MIN_QUERY_LENGTH_VAR)
+        )
+        key = json.dumps([get_version(self.model), params]).encode()
+        cache_key = (
+            f"mizdb_tomselect.short_query.{self.model._meta.label_lower}."
+            f"{hashlib.md5(key, usedforsecurity=False).hexdigest()}"
+        )
+        cache = get_cache()
+        results = cache.get(cache_key)
+        if results is not None:
+            self.cache_status = "hit"
+            return results
+        self.cache_status = "miss"
+        results = self.get_empty_query_results()
+        cache.set(cache_key, results, self.short_query_cache_timeout)
+        return results
+
+    def get_empty_query_results(self):
+        """Return the first page of results for an empty search term."""
+        q, self.q = self.q, ""
+        try:
+            queryset = self.get_queryset()
+        finally:
+            self.q = q
+        self.page_results = queryset[: self.get_paginate_by(queryset)]
+        return self.get_result_values(self.page_results)
+
+    def get_time_budget(self):
+        """
+        Return the time budget (in seconds) for the queries of the search, or
+        None if they should not be limited.
+
+        Only requests with a search term are limited; see the
+        MIZDB_TOMSELECT_TIME_BUDGET setting.
+        """
+        if not self.q:
+            return None
+        return time_budget()
+
+    def get_fallback_querysets(self):
+        """
+        Yield cheaper querysets for the search, to be tried in turn when the
+        search exceeds its time budget:
+            - match the start of the values only, if the search lookup is
+              'icontains' or 'contains'
+            - search only the first MIZDB_TOMSELECT_SCAN_LIMIT rows
+        """
+        queryset = self.apply_filter_by(super().get_queryset())
+        field, _, lookup_type = (self.search_lookup or "").rpartition("__")
+        prefix_lookups = {"icontains": "istartswith", "contains": "startswith"}
+        if field and lookup_type in prefix_lookups:
+            yield self.order_queryset(queryset.filter(**{f"{field}__{prefix_lookups[lookup_type]}": self.q}))
+        candidates = list(queryset.order_by().values_list("pk", flat=True)[: scan_limit()])
+        yield self.order_queryset(self.search(queryset.filter(pk__in=candidates), self.q))
+
+    def get_fallback_results(self, connection, deadline):
+        """
+        Return the results of the first fallback queryset that can be searched
+        before the deadline (a `time.monotonic` value), or an empty list if
+        none can. Each fallback may take half of the time that is left.
+        """
+        fallbacks = self.get_fallback_querysets()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            try:
+                with time_limit(connection, remaining / 2):
+                    queryset = next(fallbacks, None)
+                    if queryset is None:
+                        return []
+                    self.page_results = queryset[: self.get_paginate_by(queryset)]
+                    return self.get_result_values(self.page_results)
+            except BudgetExceeded:
+                continue
+
     def get_page_results(self, page):
         """Hook for modifying the result queryset for the given page."""
         return page.object_list
@@ -79,16 +402,116 @@ class AutocompleteView(views.generic.list.BaseListView):
         return list(results.values(*self.values_select))
 
     def get(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        page_size = self.get_paginate_by(queryset)
-        paginator, page, object_list, has_other_pages = self.paginate_queryset(queryset, page_size)
+        if LOAD_ALL_VAR in request.GET:
+            return self.get_all(request)
+        timer = self.timer
+        if self.is_short_query():
+            with timer.phase("short_query"):
+                results = self.get_short_query_results()
+            return self.render_results(request, results, page_number=1, has_more=False)
+        with timer.phase("get_queryset"):
+            queryset = self.get_queryset()
+        budget = self.get_time_budget()
+        connection = connections[queryset.db]
+        if budget is not None:
+            deadline = time.monotonic() + budget
+            # Keep half of the budget for the fallbacks.
+            limit = time_limit(connection, budget / 2)
+        else:
+            limit = nullcontext()
+        try:
+            with limit:
+                with timer.phase("paginate"):
+                    page_size = self.get_paginate_by(queryset)
+                    paginator, page, object_list, has_other_pages = self.paginate_queryset(queryset, page_size)
+                    page_number, has_more = page.number, page.has_next()
+                with timer.phase("get_result_values"):
+                    self.page_results = self.get_page_results(page)
+                    results = self.get_result_values(self.page_results)
+        except BudgetExceeded:
+            # Return what a cheaper search can find, without further pages.
+            self.partial = True
+            with timer.phase("fallback"):
+                results = self.get_fallback_results(connection, deadline)
+            page_number, has_more = 1, False
+        return self.render_results(request, results, page_number, has_more)
+
+    def render_results(self, request, results, page_number, has_more):
+        """Return the JSON response for the given page of results."""
+        timer = self.timer
+        self.row_count = len(results)
+        with timer.phase("has_add_permission"):
+            show_create_option = self.has_add_permission(request)
         data = {
-            "results": self.get_result_values(self.get_page_results(page)),
-            "page": page.number,
-            "has_more": page.has_next(),
-            "show_create_option": self.has_add_permission(request),
+            "results": results,
+            "page": page_number,
+            "has_more": has_more,
+            "show_create_option": show_create_option,
         }
-        return http.JsonResponse(data)
+        if self.partial:
+            data["partial"] = True
+        with timer.phase("serialize"):
+            response = http.JsonResponse(data)
+        if version_header_enabled():
+            response[MODEL_VERSION_HEADER] = get_version(self.model)
+        return response
+
+    def get_etag(self, version, show_create_option):
+        """Return the ETag for the complete results of the given model version."""
+        params = sorted((k, v) for k, v in self.request.GET.items() if k not in (SEARCH_VAR, PAGE_VAR))
+        key = json.dumps([params, show_create_option]).encode()
+        return f'"{version}-{hashlib.md5(key, usedforsecurity=False).hexdigest()[:16]}"'
+
+    def get_all(self, request):
+        """
+        Return all results (up to `load_all_limit`) for searching on the client.
+
+        If the version of the model is tracked, the response carries an ETag
+        derived from the model's version and the request parameters, so clients
+        can revalidate their copy with a conditional request; if the ETag still
+        matches, no query is made for the results. Otherwise, the response must
+        not be stored.
+        """
+        timer = self.timer
+        version = etag = None
+        if is_versioned(self.model):
+            with timer.phase("get_version"):
+                version = get_version(self.model)
+        with timer.phase("has_add_permission"):
+            show_create_option = self.has_add_permission(request)
+        if version:
+            etag = self.get_etag(version, show_create_option)
+        if etag and etag in parse_etags(request.headers.get("If-None-Match", "")):
+            self.cache_status = "hit"
+            response = http.HttpResponseNotModified()
+        else:
+            self.cache_status = "miss"
+            limit = load_all_limit()
+            with timer.phase("get_queryset"):
+                queryset = self.get_queryset()
+            with timer.phase("get_result_values"):
+                self.page_results = queryset[: limit + 1]
+                results = self.get_result_values(self.page_results)
+            has_more = len(results) > limit
+            results = results[:limit]
+            self.row_count = len(results)
+            data = {
+                "results": results,
+                "page": 1,
+                "has_more": has_more,
+                "show_create_option": show_create_option,
+                "version": version,
+            }
+            with timer.phase("serialize"):
+                response = http.JsonResponse(data)
+        if etag:
+            response["ETag"] = etag
+            # Always revalidate, but allow the browser to keep the response.
+            response["Cache-Control"] = "private, no-cache"
+            response[MODEL_VERSION_HEADER] = version
+        else:
+            response["Cache-Control"] = "no-store"
+        return response
 
     def has_add_permission(self, request):
         """Return True if the user has the permission to add a model object."""
@@ -109,20 +532,30 @@ class AutocompleteView(views.generic.list.BaseListView):
         return self.model._meta.get_field(self.create_field).unique
 
     def post(self, request, *args, **kwargs):
-        if not self.has_add_permission(request):
+        timer = self.timer
+        with timer.phase("has_add_permission"):
+            has_add_permission = self.has_add_permission(request)
+        if not has_add_permission:
+            self.create_outcome = "forbidden"
             return http.HttpResponseForbidden()
         if request.POST.get(self.create_field) is None:
+            self.create_outcome = "bad_request"
             return http.HttpResponseBadRequest()
         try:
-            with transaction.atomic():
+            with timer.phase("create_object"), transaction.atomic():
                 obj = self.create_object(request.POST)
         except IntegrityError:
             if self._create_field_is_unique():
+                self.create_outcome = "unique"
                 return http.JsonResponse({"error_type": "unique", "error_level": "warning"})
             else:
                 # IntegrityError was not because of uniqueness, bail with a 500:
+                self.create_outcome = "error"
                 return http.HttpResponseServerError()
-        return http.JsonResponse({"pk": obj.pk, "text": str(obj)})
+        self.create_outcome = "created"
+        self.row_count = 1
+        with timer.phase("serialize"):
+            return http.JsonResponse({"pk": obj.pk, "text": str(obj)})
 
 
 class PopupResponseMixin(views.generic.edit.ModelFormMixin):
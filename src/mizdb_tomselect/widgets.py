@@ -5,6 +5,8 @@ from urllib.parse import unquote
 from django import forms
 from django.urls import NoReverseMatch, reverse
 
+from mizdb_tomselect.lookups import sign_config
+
 
 class MIZSelect(forms.Select):
     """
@@ -27,6 +29,10 @@ class MIZSelect(forms.Select):
         edit_url="",
         filter_by=(),
         can_remove=True,
+        prefetch=False,
+        load_all=False,
+        min_query_length=0,
+        allow_expensive_lookups=False,
         **kwargs,
     ):
         """
@@ -55,6 +61,20 @@ class MIZSelect(forms.Select):
               Django field lookup. For example:
                ('foo', 'bar__id') => results.filter(bar__id=data['foo'])
             can_remove: if True, use the TomSelect Remove Button plugin
+            prefetch: if True, fetch the first page of results in the
+              background as soon as the value of the `filter_by` form field
+              changes
+            load_all: if True, load all results at once and search them on the
+              client. Only use this for models with a small number of objects.
+              List the model in MIZDB_TOMSELECT_TRACKED_MODELS so that the
+              browser can revalidate the results instead of loading them again.
+            min_query_length: the minimum length of search terms. Shorter
+              search terms are not sent; the view answers them with the
+              (cached) results for an empty search term.
+            allow_expensive_lookups: if True, allow the search and filter
+              lookups of this widget to traverse more relations than
+              MIZDB_TOMSELECT_MAX_JOINS (if set) or to use expensive lookup
+              types like 'regex'
             kwargs: additional keyword arguments passed to forms.Select
         """
         self.model = model
@@ -68,6 +88,12 @@ class MIZSelect(forms.Select):
         self.edit_url = edit_url
         self.filter_by = filter_by
         self.can_remove = can_remove
+        self.prefetch = prefetch
+        self.load_all = load_all
+        self.min_query_length = min_query_length
+        self.allow_expensive_lookups = allow_expensive_lookups
+        # The signed configuration; shared with the copies made by forms.
+        self._signed_config = {}
         super().__init__(**kwargs)
 
     def optgroups(self, name, value, attrs=None):
@@ -110,6 +136,39 @@ class MIZSelect(forms.Select):
         """Hook to specify the URL the model's 'changelist' page."""
         return self._get_url(self.changelist_url)
 
+    def get_values_select(self):
+        """Return the names of the model fields that the options are built from."""
+        return [self.value_field, self.label_field]
+
+    def get_config(self):
+        """
+        Return the configuration of the widget that the autocomplete view
+        validates requests against.
+        """
+        return {
+            "model": self.model._meta.label_lower,
+            "sl": self.search_lookup,
+            "f": self.filter_by[1] if self.filter_by else None,
+            "vs": self.get_values_select(),
+            "cf": self.create_field or None,
+            "mq": self.min_query_length,
+            "x": self.allow_expensive_lookups,
+        }
+
+    def get_signed_config(self):
+        """
+        Return the signed token of the widget's configuration.
+
+        Signing is comparatively slow, so the token is only created again if
+        the configuration changed. The copies of the widget that forms make
+        share the token.
+        """
+        config = self.get_config()
+        cached = self._signed_config.get("token")
+        if cached is None or cached[0] != config:
+            cached = self._signed_config["token"] = (config, sign_config(config))
+        return cached[1]
+
     def build_attrs(self, base_attrs, extra_attrs=None):
         """Build HTML attributes for the widget."""
         attrs = super().build_attrs(base_attrs, extra_attrs)
@@ -128,8 +187,13 @@ class MIZSelect(forms.Select):
                 "data-edit-url": self.get_edit_url() or "",
                 "data-filter-by": json.dumps(list(self.filter_by)),
                 "can-remove": self.can_remove,
+                "prefetch": self.prefetch,
+                "load-all": self.load_all,
+                "data-config": self.get_signed_config(),
             }
         )
+        if self.min_query_length:
+            attrs["data-min-query-length"] = self.min_query_length
         return attrs
 
     def use_required_attribute(self, initial):
@@ -179,6 +243,10 @@ class MIZSelectTabular(MIZSelect):
         self.label_field_label = label_field_label or self.model._meta.verbose_name or "Object"
         self.extra_columns = extra_columns or {}
 
+    def get_values_select(self):
+        """Return the names of the model fields that the options are built from."""
+        return super().get_values_select() + list(self.extra_columns)
+
     def build_attrs(self, base_attrs, extra_attrs=None):
         """Build HTML attributes for the widget."""
         attrs = super().build_attrs(base_attrs, extra_attrs)
@@ -0,0 +1,134 @@
+"""
+Fixtures for the benchmarks.
+
+Environment variables:
+    MIZDB_BENCH_SIZES: comma-separated dataset sizes (number of Person rows),
+      default: 10000
+    MIZDB_BENCH_ROUNDS: the number of times each scenario is run, default: 5
+    MIZDB_BENCH_TOLERANCE: the factor by which the latency may exceed the
+      baseline before a benchmark fails, default: 2.0
+    MIZDB_BENCH_UPDATE: if set, write the results to the baselines file
+      instead of comparing against it
+"""
+
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.benchmarks.datasets import load_dataset
+
+BASELINES = Path(__file__).parent / "baselines.json"
+SIZES = sorted(int(size) for size in os.environ.get("MIZDB_BENCH_SIZES", "10000").split(","))
+ROUNDS = int(os.environ.get("MIZDB_BENCH_ROUNDS", 5))
+TOLERANCE = float(os.environ.get("MIZDB_BENCH_TOLERANCE", 2.0))
+UPDATE = bool(os.environ.get("MIZDB_BENCH_UPDATE"))
+
+# Results of this session: 'scenario[size]' -> measurements
+results = {}
+
+
+def load_baselines():
+    if BASELINES.exists():
+        return json.loads(BASELINES.read_text())
+    return {}
+
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda size: f"{size}rows")
+def dataset(request, django_db_setup, django_db_blocker):
+    """Load the dataset of the given size into the test database."""
+    with django_db_blocker.unblock():
+        return load_dataset(request.param)
+
+
+@pytest.fixture(scope="session")
+def baselines():
+    return load_baselines()
+
+
+def check_baseline(key, result, baseline):
+    """Assert that the result of a benchmark is not worse than its baseline."""
+    for metric, value in result.items():
+        if metric not in baseline:
+            continue
+        if metric.endswith("_ms"):
+            limit = baseline[metric] * TOLERANCE
+        elif metric.endswith("_bytes"):
+            limit = baseline[metric] * 1.05
+        else:
+            limit = baseline[metric]
+        assert value <= limit, f"{key}: {metric} {value} exceeds the baseline ({baseline[metric]})"
+
+
+@pytest.fixture
+def record(baselines):
+    """
+    Record the result of a benchmark and, unless the baselines are being
+    updated, compare it against the stored baseline.
+    """
+
+    def inner(key, result):
+        results[key] = result
+        if key in baselines and not UPDATE:
+            check_baseline(key, result, baselines[key])
+
+    return inner
+
+
+def run_rounds(func, rounds=ROUNDS):
+    """
+    Call func `rounds` times. Return the median duration in milliseconds, the
+    number of queries of the last call, and the return value of the last call.
+    """
+    timings = []
+    for _ in range(rounds):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            value = func()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), len(queries), value
+
+
+@pytest.fixture
+def bench(request, dataset, record):
+    """
+    Run the given request function ROUNDS times and record the median latency,
+    the number of queries and the size of the response content.
+    """
+
+    def inner(func, scenario=None):
+        scenario = scenario or request.node.originalname.removeprefix("test_")
+        latency, queries, response = run_rounds(func)
+        result = {
+            "latency_ms": round(latency, 3),
+            "queries": queries,
+            "payload_bytes": len(response.content),
+        }
+        record(f"{scenario}[{dataset['size']}]", result)
+        return response
+
+    return inner
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not results:
+        return
+    baselines = load_baselines()
+    terminalreporter.section("benchmark results")
+    for key, result in sorted(results.items()):
+        baseline = baselines.get(key, {})
+        metrics = ", ".join(f"{metric}={value} ({baseline.get(metric, '-')})" for metric, value in result.items())
+        terminalreporter.write_line(f"{key}: {metrics}")
+    terminalreporter.write_line("(values in parentheses: baseline)")
+
+
+def pytest_sessionfinish(session):
+    if UPDATE and results:
+        baselines = load_baselines()
+        baselines.update(results)
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
@@ -0,0 +1,40 @@
+"""Synthetic datasets for the benchmarks."""
+
+from io import StringIO
+
+from django.core.management import call_command
+
+from tests.testapp.models import Genre, Person
+
+SEED = 42
+
+
+def generate(model, count, **options):
+    if count > 0:
+        call_command("tomselect_generate", model, count=count, seed=SEED, stdout=StringIO(), **options)
+
+
+def load_dataset(size):
+    """
+    Make sure that the database contains `size` Person objects (plus 1 City per
+    100 persons and 1 Genre per 10 persons), creating only the missing rows.
+
+    Return a dict with information about the dataset that the benchmarks can
+    use as parameters.
+    """
+    generate(
+        "testapp.Person",
+        size - Person.objects.count(),
+        label_length="normal:16:5",
+        label_parts=["first_name", "last_name"],
+        prefixes=50,
+        prefix_share=0.3,
+        fan_out=["city=100"],
+    )
+    generate("testapp.Genre", size // 10 - Genre.objects.count())
+    person = Person.objects.order_by("pk").first()
+    return {
+        "size": size,
+        "city": person.city_id,
+        "full_name": person.full_name,
+    }
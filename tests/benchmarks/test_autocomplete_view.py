@@ -0,0 +1,81 @@
+import itertools
+import json
+
+import pytest
+from django.urls import path, reverse
+
+from mizdb_tomselect.views import (
+    FILTERBY_VAR,
+    PAGE_SIZE,
+    PAGE_VAR,
+    SEARCH_LOOKUP_VAR,
+    SEARCH_VAR,
+    VALUES_VAR,
+    AutocompleteView,
+)
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+]
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def autocomplete(admin_client):
+    """Return a function that makes an autocomplete GET request with the given parameters."""
+
+    def inner(**params):
+        data = {
+            "model": "testapp.person",
+            SEARCH_LOOKUP_VAR: "full_name__icontains",
+            VALUES_VAR: json.dumps(["id", "full_name"]),
+            **params,
+        }
+        return lambda: admin_client.get(reverse("autocomplete"), data=data)
+
+    return inner
+
+
+def test_empty_query(bench, autocomplete):
+    bench(autocomplete())
+
+
+def test_short_search(bench, autocomplete):
+    bench(autocomplete(**{SEARCH_VAR: "an"}))
+
+
+def test_long_search(bench, autocomplete, dataset):
+    bench(autocomplete(**{SEARCH_VAR: dataset["full_name"]}))
+
+
+def test_deep_page(bench, autocomplete, dataset):
+    last_page = -(-dataset["size"] // PAGE_SIZE)
+    bench(autocomplete(**{PAGE_VAR: str(last_page)}))
+
+
+def test_filter_by(bench, autocomplete, dataset):
+    bench(autocomplete(**{FILTERBY_VAR: f"city_id={dataset['city']}"}))
+
+
+def test_filter_by_search(bench, autocomplete, dataset):
+    bench(autocomplete(**{FILTERBY_VAR: f"city_id={dataset['city']}", SEARCH_VAR: "an"}))
+
+
+def test_create(bench, admin_client):
+    names = (f"Benchmark Genre {i}" for i in itertools.count())
+    bench(
+        lambda: admin_client.post(
+            reverse("autocomplete"),
+            data={"model": "testapp.genre", "create-field": "genre", "genre": next(names)},
+        )
+    )
+
+
+def test_create_unique_conflict(bench, admin_client):
+    bench(
+        lambda: admin_client.post(
+            reverse("autocomplete"),
+            data={"model": "testapp.genre", "create-field": "genre", "genre": "Genre 0"},
+        )
+    )
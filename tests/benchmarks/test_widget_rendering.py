@@ -0,0 +1,95 @@
+import time
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+import pytest
+from django import forms
+from django.urls import path
+
+from mizdb_tomselect import widgets
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect, MIZSelectTabularMultiple
+from tests.benchmarks.conftest import run_rounds
+from tests.testapp.models import Person
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("add/", AutocompleteView.as_view(), name="add_person"),
+    path("edit/<path:pk>/", AutocompleteView.as_view(), name="edit_person"),
+    path("changelist/", AutocompleteView.as_view(), name="changelist_person"),
+]
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db, pytest.mark.urls(__name__)]
+
+WIDGET_KWARGS = {
+    "add_url": "add_person",
+    "edit_url": "edit_person",
+    "changelist_url": "changelist_person",
+}
+
+
+def make_formset_class(widget_class, count, selected):
+    """Return a formset class with `count` forms with one MIZSelect field each."""
+    if widget_class is MIZSelect:
+        field = forms.ModelChoiceField(Person.objects.all(), widget=MIZSelect(Person, **WIDGET_KWARGS))
+    else:
+        field = forms.ModelMultipleChoiceField(
+            Person.objects.all(),
+            widget=MIZSelectTabularMultiple(Person, extra_columns={"dob": "Date of birth"}, **WIDGET_KWARGS),
+        )
+    form_class = type("Form", (forms.Form,), {"field": field})
+    return forms.formset_factory(form_class, extra=0 if selected else count)
+
+
+def make_initial(widget_class, count):
+    """Return initial data that selects one (or two, for multiple selection) option per form."""
+    pks = list(Person.objects.values_list("pk", flat=True)[: count * 2])
+    if widget_class is MIZSelect:
+        return [{"field": pks[i]} for i in range(count)]
+    return [{"field": pks[i * 2 : i * 2 + 2]} for i in range(count)]
+
+
+@contextmanager
+def timed(target, attribute, totals):
+    """Add the time spent in calls of target.attribute to totals[attribute]."""
+    original = getattr(target, attribute)
+    totals.setdefault(attribute, 0)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            totals[attribute] += time.perf_counter() - start
+
+    with patch.object(target, attribute, new=wrapper):
+        yield
+
+
+@pytest.mark.parametrize("widget_class", [MIZSelect, MIZSelectTabularMultiple], ids=lambda c: c.__name__)
+@pytest.mark.parametrize("count", [1, 100, 1000])
+@pytest.mark.parametrize("selected", [False, True], ids=["empty", "selected"])
+def test_render_formset(record, dataset, widget_class, count, selected):
+    formset_class = make_formset_class(widget_class, count, selected)
+    initial = make_initial(widget_class, count) if selected else None
+
+    def render():
+        return str(formset_class(initial=initial))
+
+    latency, queries, html = run_rounds(render)
+    # Render once more to measure the time spent in build_attrs and reverse.
+    totals = {}
+    with ExitStack() as stack:
+        stack.enter_context(timed(MIZSelect, "build_attrs", totals))
+        stack.enter_context(timed(widgets, "reverse", totals))
+        render()
+    record(
+        f"render_{widget_class.__name__}_{count}_{'selected' if selected else 'empty'}[{dataset['size']}]",
+        {
+            "latency_ms": round(latency, 3),
+            "queries": queries,
+            "build_attrs_ms": round(totals["build_attrs"] * 1000, 3),
+            "reverse_ms": round(totals["reverse"] * 1000, 3),
+            "payload_bytes": len(html),
+        },
+    )
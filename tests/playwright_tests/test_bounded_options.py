@@ -0,0 +1,103 @@
+import pytest
+from django import forms
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.urls import path
+
+from mizdb_tomselect.views import PAGE_SIZE, AutocompleteView
+from mizdb_tomselect.widgets import MIZSelectMultiple
+from tests.testapp.models import Person
+
+LIMIT = PAGE_SIZE * 2
+
+template = """{% load static %}<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>MIZDB TomSelect Testapp</title>
+    <link href="{% static 'css/bootstrap.css' %}" rel="stylesheet">
+    <script src="{% static 'js/bootstrap.bundle.js' %}"></script>
+    <script>
+        window.addEventListener("initMIZSelect", (e) => {
+            e.target.initMIZSelect({plugins: {bounded_options: {limit: {{ limit }}}}})
+        })
+    </script>
+    {{ form.media }}
+</head>
+<body>
+<div class="container">
+    <form method="post">{{ form.as_div }}</form>
+</div>
+</body>
+</html>
+"""
+
+
+class Form(forms.Form):
+    field = forms.ModelMultipleChoiceField(
+        Person.objects.all(),
+        widget=MIZSelectMultiple(Person, search_lookup="full_name__icontains"),
+    )
+
+
+def view(request):
+    context = RequestContext(request)
+    context["form"] = Form()
+    context["limit"] = LIMIT
+    return HttpResponse(Template(template).render(context))
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("bounded/", view, name="bounded"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def add_extra_options(_page, search):
+    """Add options that are not part of the search results, and select one."""
+    _page.evaluate(
+        """() => {
+            const ts = document.querySelector("select").tomselect
+            for (let i = 0; i < 5; i++) ts.addOption({id: `extra${i}`, full_name: `Extra ${i}`})
+            ts.addItem("extra0", true)
+        }"""
+    )
+
+
+@pytest.fixture
+def load_next_page(_page, add_extra_options, dropdown_items):
+    with _page.expect_request_finished():
+        dropdown_items.last.scroll_into_view_if_needed()
+
+
+@pytest.fixture
+def option_values(_page):
+    def inner():
+        return _page.evaluate("Object.keys(document.querySelector('select').tomselect.options)")
+
+    return inner
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["bounded"])
+@pytest.mark.usefixtures("test_data")
+class TestBoundedOptions:
+    def test_evicts_options_not_in_results(self, load_next_page, option_values):
+        """
+        Assert that options that are neither selected nor part of the current
+        results are removed when the limit is exceeded.
+        """
+        values = option_values()
+        for i in range(1, 5):
+            assert f"extra{i}" not in values
+
+    def test_keeps_selected_options(self, load_next_page, option_values):
+        """Assert that selected options are not removed."""
+        assert "extra0" in option_values()
+
+    def test_keeps_current_results(self, load_next_page, option_values):
+        """Assert that the options of the current search results are not removed."""
+        assert len(option_values()) == LIMIT + 1
@@ -186,3 +186,13 @@ class TestLocked:
         disable(select_element(form))
         enable(select_element(form))
         expect(ts_wrapper(form)).not_to_have_class(re.compile("locked"))
+
+    def test_disable_select_of_moved_form(self, _page, all_forms, select_element, ts_wrapper, disable):
+        """
+        Assert that disabling the select element of a form that was removed and
+        inserted again also locks the TomSelect element.
+        """
+        form = all_forms(_page).first
+        form.evaluate("form => { const parent = form.parentNode; form.remove(); parent.prepend(form) }")
+        disable(select_element(form))
+        expect(ts_wrapper(form)).to_have_class(re.compile("locked"))
@@ -0,0 +1,128 @@
+import pytest
+from django import forms
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.urls import path
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import PAGE_SIZE, AutocompleteView
+from mizdb_tomselect.widgets import MIZSelectTabular
+from tests.testapp.models import Person
+
+MIN_OPTIONS = PAGE_SIZE + 1
+BUFFER = 2
+
+template = """{% load static %}<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>MIZDB TomSelect Testapp</title>
+    <link href="{% static 'css/bootstrap.css' %}" rel="stylesheet">
+    <script src="{% static 'js/bootstrap.bundle.js' %}"></script>
+    <script>
+        window.addEventListener("initMIZSelect", (e) => {
+            e.target.initMIZSelect({plugins: {dropdown_window: {minOptions: {{ min_options }}, buffer: {{ buffer }}}}})
+        })
+    </script>
+    {{ form.media }}
+</head>
+<body>
+<div class="container">
+    <form method="post">{{ form.as_div }}</form>
+</div>
+</body>
+</html>
+"""
+
+
+class Form(forms.Form):
+    field = forms.ModelChoiceField(
+        Person.objects.all(),
+        widget=MIZSelectTabular(Person, search_lookup="full_name__icontains"),
+    )
+
+
+def view(request):
+    context = RequestContext(request)
+    context["form"] = Form()
+    context["min_options"] = MIN_OPTIONS
+    context["buffer"] = BUFFER
+    return HttpResponse(Template(template).render(context))
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("windowed/", view, name="windowed"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def load_all_pages(_page, search, dropdown_items, test_data):
+    """Scroll to the bottom of the dropdown until all pages are loaded."""
+    for _ in range(len(test_data) // PAGE_SIZE - 1):
+        with _page.expect_request_finished():
+            dropdown_items.last.scroll_into_view_if_needed()
+    expect(dropdown_items.last).to_have_text("No more results")
+
+
+@pytest.fixture
+def activate_first_option(_page, load_all_pages):
+    """Scroll to the top of the dropdown and make the first option active."""
+    _page.locator(".ts-dropdown-content").evaluate(
+        """async (content) => {
+            content.scrollTop = 0
+            await new Promise(resolve => requestAnimationFrame(resolve))
+            const ts = document.querySelector("select").tomselect
+            ts.setActiveOption(content.querySelector("[role=option]"))
+        }"""
+    )
+
+
+@pytest.fixture
+def rendered_options(_page):
+    return _page.locator(".ts-dropdown-content [role=option]")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["windowed"])
+@pytest.mark.usefixtures("test_data")
+class TestDropdownWindow:
+    def test_short_list_not_windowed(self, search, rendered_options):
+        """Assert that all options are rendered if the list is short."""
+        expect(rendered_options).to_have_count(PAGE_SIZE)
+
+    def test_long_list_windowed(self, load_all_pages, rendered_options, test_data):
+        """Assert that only a window of the options is rendered for long lists."""
+        assert 0 < rendered_options.count() < len(test_data)
+
+    def test_scroll_recycles_options(self, _page, load_all_pages, rendered_options):
+        """Assert that scrolling to the top renders the first options again."""
+        first = Person.objects.order_by("last_name", "first_name").first()
+        _page.locator(".ts-dropdown-content").evaluate("content => content.scrollTop = 0")
+        expect(rendered_options.first).to_have_attribute("data-value", str(first.pk))
+
+    def test_keyboard_navigation(self, _page, activate_first_option, search_input):
+        """
+        Assert that the active option can be moved past the rendered window with
+        the arrow keys.
+        """
+        expected = list(Person.objects.order_by("last_name", "first_name").values_list("pk", flat=True))
+        steps = MIN_OPTIONS + BUFFER * 2
+        for _ in range(steps):
+            search_input.press("ArrowDown")
+        active = _page.locator(".ts-dropdown-content .active[role=option]")
+        expect(active).to_have_attribute("data-value", str(expected[steps]))
+
+    def test_select_option_outside_initial_window(self, _page, activate_first_option, search_input, ts_control):
+        """Assert that an option that was not initially rendered can be selected."""
+        for _ in range(MIN_OPTIONS + BUFFER * 2):
+            search_input.press("ArrowDown")
+        value = _page.locator(".ts-dropdown-content .active[role=option]").get_attribute("data-value")
+        search_input.press("Enter")
+        expect(ts_control.locator(".item")).to_have_attribute("data-value", value)
+
+    def test_has_table_header(self, load_all_pages, dropdown):
+        """Assert that the table header is still displayed."""
+        expect(dropdown.locator(".dropdown-header")).to_be_visible()
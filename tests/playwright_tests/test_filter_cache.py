@@ -0,0 +1,154 @@
+import pytest
+from django import forms
+from django.urls import path
+from django.views.generic import FormView
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.factories import PersonFactory
+from tests.testapp.models import City, Person
+
+
+class FilteredForm(forms.Form):
+    city = forms.ModelChoiceField(City.objects.all())
+    person = forms.ModelChoiceField(
+        Person.objects.all(),
+        widget=MIZSelect(
+            model=Person,
+            url="autocomplete",
+            filter_by=("city", "city_id"),
+            search_lookup="full_name__icontains",
+            label_field="full_name",
+        ),
+    )
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("filtered/", FormView.as_view(form_class=FilteredForm, template_name="base.html"), name="filtered"),
+]
+
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def city_select(_page):
+    select = _page.get_by_label("city")
+    select.wait_for()
+    return select
+
+
+@pytest.fixture
+def request_urls(_page):
+    """Record the URLs of the autocomplete request_urls."""
+    urls = []
+    _page.on("request", lambda request: urls.append(request.url) if "autocomplete" in request.url else None)
+    return urls
+
+
+@pytest.fixture
+def load_options(_page, ts_wrapper, search_input):
+    """Open the dropdown, wait for the options and close it again."""
+
+    def inner(expect_request=True):
+        if expect_request:
+            with _page.expect_request_finished():
+                ts_wrapper.click()
+        else:
+            ts_wrapper.click()
+        search_input.press("Escape")
+
+    return inner
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["filtered"])
+def test_options_restored_from_cache(
+    new_york,
+    random_city,
+    new_york_people,
+    _page,
+    city_select,
+    ts_wrapper,
+    view_name,
+    selectable_options,
+    request_urls,
+    load_options,
+):
+    """
+    Assert that the options for a previous filter value are restored without
+    making another request.
+    """
+    city_select.select_option(value=str(new_york.pk))
+    load_options()
+    city_select.focus()
+    city_select.select_option(value=str(random_city.pk))
+    load_options()
+    request_count = len(request_urls)
+    city_select.focus()
+    city_select.select_option(value=str(new_york.pk))
+    ts_wrapper.click()
+    expect(selectable_options).to_have_count(len(new_york_people))
+    assert len(request_urls) == request_count
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["filtered"])
+def test_stale_response_discarded(
+    new_york, random_city, new_york_people, _page, city_select, ts_wrapper, view_name, selectable_options
+):
+    """
+    Assert that the results of a request are discarded if the filter value
+    changed while the request was underway.
+    """
+    city_select.select_option(value=str(new_york.pk))
+
+    def change_filter(route):
+        city_select.evaluate(
+            """(select, value) => {
+                select.value = value
+                select.dispatchEvent(new Event('change'))
+            }""",
+            str(random_city.pk),
+        )
+        route.continue_()
+
+    _page.route("**/autocomplete/**", change_filter)
+    with _page.expect_request_finished():
+        ts_wrapper.click()
+    expect(selectable_options).to_have_count(0)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["filtered"])
+def test_cached_options_exclude_selected_items_of_other_filter_values(
+    new_york,
+    random_city,
+    new_york_people,
+    _page,
+    city_select,
+    ts_wrapper,
+    view_name,
+    selectable_options,
+    load_options,
+):
+    """
+    Assert that the options of items that were selected for another filter
+    value are not cached with the options for the current filter value.
+    """
+    other_people = [PersonFactory.create(city=random_city) for _ in range(2)]
+    city_select.select_option(value=str(new_york.pk))
+    load_options()
+    _page.evaluate(f"document.querySelector('#id_person').tomselect.addItem('{new_york_people[0].pk}')")
+    city_select.focus()
+    city_select.select_option(value=str(random_city.pk))
+    load_options()
+    _page.evaluate("document.querySelector('#id_person').tomselect.clear()")
+    city_select.focus()
+    city_select.select_option(value=str(new_york.pk))
+    city_select.focus()
+    city_select.select_option(value=str(random_city.pk))
+    ts_wrapper.click()
+    expect(selectable_options).to_have_count(len(other_people))
@@ -0,0 +1,118 @@
+import pytest
+from django import forms
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.urls import path
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import Person
+
+WIDGET_COUNT = 200
+
+template = """{% load static %}<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>MIZDB TomSelect Testapp</title>
+    <link href="{% static 'css/bootstrap.css' %}" rel="stylesheet">
+    <script src="{% static 'js/bootstrap.bundle.js' %}"></script>
+    {% if config %}<script>window.MIZSelectConfig = {{ config|safe }}</script>{% endif %}
+    <script>
+        window.initOrder = []
+        addEventListener("initMIZSelect", (e) => window.initOrder.push(e.target.id))
+    </script>
+    {{ formset.media }}
+</head>
+<body>
+<div class="container">
+    <form method="post">
+        {% for form in formset %}<div class="form-container">{{ form.as_div }}</div>{% endfor %}
+    </form>
+</div>
+<script>window.scrollTo(0, document.body.scrollHeight)</script>
+{% if broken %}<script>document.querySelector("select").dataset.filterBy = "{"</script>{% endif %}
+</body>
+</html>
+"""
+
+
+class Form(forms.Form):
+    field = forms.ModelChoiceField(Person.objects.all(), widget=MIZSelect(Person))
+
+
+def make_view(config="", broken=False):
+    def view(request):
+        context = RequestContext(request)
+        context["formset"] = forms.formset_factory(Form, extra=WIDGET_COUNT)()
+        context["config"] = config
+        context["broken"] = broken
+        return HttpResponse(Template(template).render(context))
+
+    return view
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("scheduled/", make_view(), name="scheduled"),
+    path("small_batches/", make_view('{"scheduler": {"batchSize": 1, "frameBudget": 1}}'), name="small_batches"),
+    path("unscheduled/", make_view('{"scheduler": {"enabled": false}}'), name="unscheduled"),
+    path("broken/", make_view('{"scheduler": {"batchSize": 1, "frameBudget": 1}}', broken=True), name="broken"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.mark.parametrize("view_name", ["scheduled", "small_batches", "unscheduled"])
+def test_all_elements_initialized(_page, view_name):
+    """Assert that all elements of the page are eventually initialized."""
+    expect(_page.locator("select.tomselected")).to_have_count(WIDGET_COUNT)
+
+
+@pytest.mark.parametrize("view_name", ["small_batches"])
+def test_visible_elements_initialized_first(_page, view_name):
+    """
+    Assert that elements in the viewport are initialized before elements
+    outside the viewport.
+    """
+    # The page is scrolled to the bottom: the last form is visible.
+    expect(_page.locator("select.tomselected")).to_have_count(WIDGET_COUNT)
+    last_id = _page.locator("select").last.get_attribute("id")
+    first_id = _page.locator("select").first.get_attribute("id")
+    init_order = _page.evaluate("window.initOrder")
+    assert init_order.index(last_id) < init_order.index(first_id)
+
+
+@pytest.mark.parametrize("view_name", ["unscheduled"])
+def test_scheduler_disabled_initializes_immediately(_page, view_name):
+    """
+    Assert that all elements are initialized by the end of the DOMContentLoaded
+    event if the scheduler is disabled.
+    """
+    assert _page.evaluate("document.querySelectorAll('select.tomselected').length") == WIDGET_COUNT
+
+
+@pytest.mark.parametrize("view_name", ["small_batches"])
+def test_flush(_page, view_name):
+    """Assert that flushMIZSelect initializes all queued elements at once."""
+    count = _page.evaluate(
+        "() => { window.flushMIZSelect(); return document.querySelectorAll('select.tomselected').length }"
+    )
+    assert count == WIDGET_COUNT
+
+
+@pytest.mark.parametrize("view_name", ["broken"])
+def test_broken_element(_page, view_name):
+    """Assert that an element that fails to initialize does not stop the others."""
+    expect(_page.locator("select.tomselected")).to_have_count(WIDGET_COUNT - 1)
+    # Elements added later are still initialized.
+    _page.evaluate(
+        """() => {
+        const select = document.querySelector("select").cloneNode(true)
+        select.id = "id_new"
+        select.dataset.filterBy = "[]"
+        document.querySelector("form").append(select)
+    }"""
+    )
+    expect(_page.locator("select.tomselected")).to_have_count(WIDGET_COUNT)
@@ -0,0 +1,73 @@
+import pytest
+from django import forms
+from django.urls import path
+from django.views.generic import FormView
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import Person
+
+
+class LoadAllForm(forms.Form):
+    person = forms.ModelChoiceField(
+        Person.objects.all(),
+        widget=MIZSelect(model=Person, url="autocomplete", label_field="full_name", load_all=True),
+    )
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("load_all/", FormView.as_view(form_class=LoadAllForm, template_name="base.html"), name="load_all"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture(autouse=True)
+def tracked_models(settings):
+    settings.MIZDB_TOMSELECT_TRACKED_MODELS = ["testapp.person"]
+
+
+@pytest.fixture
+def people():
+    names = ["Alice Smith", "Bob Smithers", "Charlie Brown", "Dana Alison"]
+    return [Person.objects.create(full_name=name) for name in names]
+
+
+@pytest.fixture
+def request_urls(_page):
+    """Record the URLs of the autocomplete requests."""
+    urls = []
+    _page.on("request", lambda request: urls.append(request.url) if "autocomplete" in request.url else None)
+    return urls
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["load_all"])
+def test_load_all_searches_locally(_page, view_name, people, ts_wrapper, selectable_options, request_urls):
+    """Assert that all options are loaded once and then searched on the client."""
+    with _page.expect_request_finished():
+        ts_wrapper.click()
+    expect(selectable_options).to_have_count(len(people))
+    assert len(request_urls) == 1
+    assert "all=1" in request_urls[0]
+    _page.locator(".dropdown-input").fill("smith")
+    expect(selectable_options).to_have_count(2)
+    expect(selectable_options.first).to_have_text("Alice Smith")
+    assert len(request_urls) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["load_all"])
+def test_load_all_revalidates(_page, view_name, people, ts_wrapper, selectable_options):
+    """Assert that cleared searches revalidate the options with the server."""
+    with _page.expect_request_finished():
+        ts_wrapper.click()
+    Person.objects.create(full_name="Eve Smith")
+    search_input = _page.locator(".dropdown-input")
+    search_input.fill("smith")
+    expect(selectable_options).to_have_count(2)
+    with _page.expect_request_finished():
+        search_input.fill("")
+    expect(selectable_options).to_have_count(len(people) + 1)
@@ -0,0 +1,46 @@
+import pytest
+from django import forms
+from django.urls import path
+from django.views.generic import FormView
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import Person
+
+
+class Form(forms.Form):
+    person = forms.ModelChoiceField(
+        Person.objects.all(),
+        widget=MIZSelect(model=Person, url="autocomplete", label_field="full_name", min_query_length=3),
+    )
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("min_query_length/", FormView.as_view(form_class=Form, template_name="base.html"), name="min_query_length"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def request_urls(_page):
+    """Record the URLs of the autocomplete requests."""
+    urls = []
+    _page.on("request", lambda request: urls.append(request.url) if "autocomplete" in request.url else None)
+    return urls
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["min_query_length"])
+@pytest.mark.usefixtures("test_data")
+def test_short_search_terms_not_sent(_page, view_name, search_input, request_urls):
+    """Assert that search terms shorter than the minimum length are not sent."""
+    request_count = len(request_urls)
+    search_input.fill("Al")
+    expect(_page.locator(".ts-dropdown .no-results")).to_have_text("Type at least 3 characters to search")
+    assert len(request_urls) == request_count
+    with _page.expect_request_finished():
+        search_input.fill("Ali")
+    assert "mq=3" in request_urls[-1]
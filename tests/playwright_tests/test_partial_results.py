@@ -0,0 +1,38 @@
+import pytest
+from django import forms
+from django.urls import path
+from django.views.generic import FormView
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import Person
+
+
+class Form(forms.Form):
+    person = forms.ModelChoiceField(
+        Person.objects.all(), widget=MIZSelect(model=Person, url="autocomplete", label_field="full_name")
+    )
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("partial_results/", FormView.as_view(form_class=Form, template_name="base.html"), name="partial_results"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["partial_results"])
+@pytest.mark.usefixtures("test_data")
+def test_refine_search_notice(_page, view_name, settings, monkeypatch, search_input):
+    """Assert that a notice is shown when the search exceeded its time budget."""
+    monkeypatch.setattr("mizdb_tomselect.budget.SQLITE_PROGRESS_STEPS", 1)
+    settings.MIZDB_TOMSELECT_TIME_BUDGET = 0
+    notice = _page.locator(".partial-results")
+    expect(notice).to_be_hidden()
+    with _page.expect_request_finished():
+        search_input.fill("Alice")
+    expect(notice).to_be_visible()
+    expect(notice).to_have_text("Not all results are shown. Refine your search.")
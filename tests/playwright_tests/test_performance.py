@@ -0,0 +1,221 @@
+"""
+Browser-side performance tests for mizselect.js.
+
+The measurements are written to a JSON report, by default
+'build/browser-benchmarks.json' in the current directory; set the
+MIZDB_BENCH_REPORT environment variable to change the path. Run with:
+
+    pytest -m "pw and bench" tests --browser chromium
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+from django import forms
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.urls import path
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect, MIZSelectTabular
+from tests.testapp.models import City, Person
+
+WIDGET_COUNT = 300
+OPTION_COUNT = 500
+SCROLL_ROUNDS = 5
+
+REPORT = Path(os.environ.get("MIZDB_BENCH_REPORT", "build/browser-benchmarks.json"))
+
+template = """{% load static %}<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>MIZDB TomSelect Testapp</title>
+    <link href="{% static 'css/bootstrap.css' %}" rel="stylesheet">
+    <script src="{% static 'js/bootstrap.bundle.js' %}"></script>
+    {% if config %}<script>window.MIZSelectConfig = {{ config|safe }}</script>{% endif %}
+    {{ formset.media }}
+</head>
+<body>
+<div class="container">
+    <form method="post">
+        {% for form in formset %}<div class="form-container">{{ form.as_div }}</div>{% endfor %}
+    </form>
+</div>
+</body>
+</html>
+"""
+
+
+class Form(forms.Form):
+    field = forms.ModelChoiceField(Person.objects.all(), widget=MIZSelect(Person))
+
+
+class TabularForm(forms.Form):
+    field = forms.ModelChoiceField(
+        Person.objects.all(),
+        widget=MIZSelectTabular(
+            Person,
+            search_lookup="full_name__icontains",
+            extra_columns={"dob": "Date of Birth", "city__name": "City"},
+        ),
+    )
+
+
+def make_view(form_class, count, config=""):
+    def view(request):
+        context = RequestContext(request)
+        context["formset"] = forms.formset_factory(form_class, extra=count)()
+        context["config"] = config
+        return HttpResponse(Template(template).render(context))
+
+    return view
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("many/", make_view(Form, WIDGET_COUNT), name="many"),
+    path(
+        "many_unscheduled/",
+        make_view(Form, WIDGET_COUNT, '{"scheduler": {"enabled": false}}'),
+        name="many_unscheduled",
+    ),
+    path("single/", make_view(Form, 1), name="single"),
+    path("tabular/", make_view(TabularForm, 1), name="tabular"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.bench, pytest.mark.urls(__name__)]
+
+# The measurements of this session.
+measurements = []
+
+
+@pytest.fixture(scope="module", autouse=True)
+def report():
+    """Write the measurements to the report file at the end of the module."""
+    yield
+    if measurements:
+        REPORT.parent.mkdir(parents=True, exist_ok=True)
+        REPORT.write_text(json.dumps(measurements, indent=2) + "\n")
+
+
+@pytest.fixture
+def measure(request, browser_name):
+    """Record a measurement for the report."""
+
+    def inner(name, value, unit="ms"):
+        measurements.append(
+            {
+                "name": name,
+                "test": request.node.name,
+                "browser": browser_name,
+                "value": round(value, 3),
+                "unit": unit,
+            }
+        )
+
+    return inner
+
+
+@pytest.fixture
+def many_options():
+    """Create enough options for a long dropdown list."""
+    city = City.objects.create(name="Springfield")
+    Person.objects.bulk_create(
+        Person(full_name=f"Alice {i:04}", first_name="Alice", last_name=f"{i:04}", city=city)
+        for i in range(OPTION_COUNT)
+    )
+
+
+@pytest.fixture
+def load_all_pages(_page, ts_wrapper, dropdown_items):
+    """Open the dropdown and scroll to its bottom until all pages are loaded."""
+    with _page.expect_request_finished():
+        ts_wrapper.click()
+    while dropdown_items.last.text_content().strip() != "No more results":
+        with _page.expect_request_finished():
+            dropdown_items.last.scroll_into_view_if_needed()
+
+
+@pytest.mark.parametrize("view_name", ["many", "many_unscheduled"])
+def test_initialization_time(_page, view_name, measure):
+    """Measure the time from navigation start until all elements are initialized."""
+    expect(_page.locator("select.tomselected")).to_have_count(WIDGET_COUNT, timeout=30_000)
+    elapsed = _page.evaluate(
+        """async (count) => {
+            while (document.querySelectorAll('select.tomselected').length < count) {
+                await new Promise(resolve => requestAnimationFrame(resolve))
+            }
+            return performance.now()
+        }""",
+        WIDGET_COUNT,
+    )
+    measure(f"initialization_time[{view_name}]", elapsed)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["single"])
+@pytest.mark.usefixtures("test_data")
+def test_time_to_first_option(_page, view_name, measure):
+    """Measure the time from focusing the element until the first option is shown."""
+    elapsed = _page.evaluate(
+        """() => new Promise(resolve => {
+            const ts = document.querySelector('select.tomselected').tomselect
+            const start = performance.now()
+            new MutationObserver((mutations, observer) => {
+                if (ts.dropdown_content.querySelector('[role=option]')) {
+                    observer.disconnect()
+                    resolve(performance.now() - start)
+                }
+            }).observe(ts.dropdown_content, {childList: true, subtree: true})
+            ts.focus()
+        })"""
+    )
+    measure("time_to_first_option", elapsed)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["tabular"])
+@pytest.mark.usefixtures("many_options")
+def test_dropdown_render_time(_page, view_name, load_all_pages, measure):
+    """Measure the time needed to render the dropdown of a long tabular list."""
+    elapsed = _page.evaluate(
+        """() => {
+            const ts = document.querySelector('select.tomselected').tomselect
+            const start = performance.now()
+            ts.refreshOptions(false)
+            return performance.now() - start
+        }"""
+    )
+    measure("dropdown_render_time", elapsed)
+    measure("dropdown_option_count", _page.locator(".ts-dropdown-content [role=option]").count(), unit="elements")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["tabular"])
+@pytest.mark.usefixtures("many_options")
+def test_heap_size_after_scrolling(_page, view_name, browser_name, load_all_pages, measure):
+    """Measure the JS heap size after scrolling through a long list several times."""
+    if browser_name != "chromium":
+        pytest.skip("heap metrics are only available in chromium")
+    _page.locator(".ts-dropdown-content").evaluate(
+        """async (content, rounds) => {
+            const frame = () => new Promise(resolve => requestAnimationFrame(resolve))
+            for (let i = 0; i < rounds; i++) {
+                for (const top of [content.scrollHeight, 0]) {
+                    content.scrollTop = top
+                    await frame()
+                }
+            }
+        }""",
+        SCROLL_ROUNDS,
+    )
+    cdp = _page.context.new_cdp_session(_page)
+    cdp.send("HeapProfiler.collectGarbage")
+    cdp.send("Performance.enable")
+    metrics = {m["name"]: m["value"] for m in cdp.send("Performance.getMetrics")["metrics"]}
+    measure("js_heap_used", metrics["JSHeapUsedSize"], unit="bytes")
+    measure("dom_nodes", metrics["Nodes"], unit="nodes")
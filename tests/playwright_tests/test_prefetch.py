@@ -0,0 +1,71 @@
+import pytest
+from django import forms
+from django.urls import path
+from django.views.generic import FormView
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import City, Person
+
+
+class PrefetchForm(forms.Form):
+    city = forms.ModelChoiceField(City.objects.all())
+    person = forms.ModelChoiceField(
+        Person.objects.all(),
+        widget=MIZSelect(
+            model=Person,
+            url="autocomplete",
+            filter_by=("city", "city_id"),
+            search_lookup="full_name__icontains",
+            label_field="full_name",
+            prefetch=True,
+        ),
+    )
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("prefetch/", FormView.as_view(form_class=PrefetchForm, template_name="base.html"), name="prefetch"),
+]
+
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def city_select(_page):
+    select = _page.get_by_label("city")
+    select.wait_for()
+    return select
+
+
+@pytest.fixture
+def request_urls(_page):
+    """Record the URLs of the autocomplete requests."""
+    urls = []
+    _page.on("request", lambda request: urls.append(request.url) if "autocomplete" in request.url else None)
+    return urls
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["prefetch"])
+def test_prefetch_on_filter_change(new_york, new_york_people, _page, city_select, view_name, request_urls):
+    """Assert that the results are requested as soon as the filter changes."""
+    with _page.expect_request_finished():
+        city_select.select_option(value=str(new_york.pk))
+    assert len(request_urls) == 1
+    assert f"city_id%3D{new_york.pk}" in request_urls[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["prefetch"])
+def test_load_uses_prefetched_results(
+    new_york, new_york_people, _page, city_select, ts_wrapper, view_name, selectable_options, request_urls
+):
+    """Assert that the dependent element uses the prefetched results."""
+    with _page.expect_request_finished():
+        city_select.select_option(value=str(new_york.pk))
+    ts_wrapper.click()
+    expect(selectable_options).to_have_count(len(new_york_people))
+    assert len(request_urls) == 1
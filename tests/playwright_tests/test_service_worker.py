@@ -0,0 +1,103 @@
+import pytest
+from django import forms
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.urls import include, path
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import Person
+
+template = """{% load static %}<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>MIZDB TomSelect Testapp</title>
+    <link href="{% static 'css/bootstrap.css' %}" rel="stylesheet">
+    <script src="{% static 'js/bootstrap.bundle.js' %}"></script>
+    <script>
+        window.MIZSelectConfig = {serviceWorker: {url: "{% url 'mizdb_tomselect:service_worker' %}"}}
+    </script>
+    {{ form.media }}
+</head>
+<body>
+<div class="container"><form method="post">{% csrf_token %}{{ form.as_div }}</form></div>
+</body>
+</html>
+"""
+
+
+class Form(forms.Form):
+    person = forms.ModelChoiceField(Person.objects.all(), widget=MIZSelect(Person, label_field="full_name"))
+
+
+def view(request):
+    context = RequestContext(request)
+    context["form"] = Form()
+    return HttpResponse(Template(template).render(context))
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("service_worker/", view, name="service_worker"),
+    path("mizdb_tomselect/", include("mizdb_tomselect.urls")),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def controlled_page(_page):
+    """Reload the page once the service worker is active so that it controls the page."""
+    _page.evaluate("() => navigator.serviceWorker.ready")
+    _page.reload()
+    _page.wait_for_function("() => navigator.serviceWorker.controller !== null")
+    return _page
+
+
+@pytest.fixture
+def cached_urls(controlled_page):
+    """Return the URLs of the responses cached by the service worker."""
+
+    def inner():
+        return controlled_page.evaluate(
+            """async () => {
+                const cache = await caches.open('mizselect-autocomplete-v1')
+                return (await cache.keys()).map(request => request.url)
+            }"""
+        )
+
+    return inner
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["service_worker"])
+@pytest.mark.usefixtures("test_data")
+def test_caches_responses(controlled_page, view_name, cached_urls):
+    """Assert that autocomplete responses are cached under their normalized URL."""
+    controlled_page.locator(".ts-wrapper").click()
+    expect(controlled_page.locator(".ts-dropdown [data-selectable]").first).to_be_visible()
+    controlled_page.wait_for_function(
+        """async () => (await (await caches.open('mizselect-autocomplete-v1')).keys()).length > 0"""
+    )
+    (url,) = cached_urls()
+    query = url.split("?")[1]
+    params = [param.split("=")[0] for param in query.split("&")]
+    assert params == sorted(params)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["service_worker"])
+@pytest.mark.usefixtures("test_data")
+def test_purge(controlled_page, view_name, cached_urls):
+    """Assert that purging discards the cached responses of the model."""
+    controlled_page.locator(".ts-wrapper").click()
+    controlled_page.wait_for_function(
+        """async () => (await (await caches.open('mizselect-autocomplete-v1')).keys()).length > 0"""
+    )
+    controlled_page.evaluate("() => window.purgeMIZSelectCache('testapp.person')")
+    controlled_page.wait_for_function(
+        """async () => (await (await caches.open('mizselect-autocomplete-v1')).keys()).length === 0"""
+    )
+    assert cached_urls() == []
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from django import forms
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.urls import include, path, reverse
+from playwright.sync_api import expect
+
+from mizdb_tomselect.metrics import metrics
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelectTabular
+from tests.testapp.models import Person
+
+template = """{% load static %}<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>MIZDB TomSelect Testapp</title>
+    <link href="{% static 'css/bootstrap.css' %}" rel="stylesheet">
+    <script src="{% static 'js/bootstrap.bundle.js' %}"></script>
+    <script>
+        window.MIZSelectConfig = {telemetry: {enabled: true, url: "{% url 'mizdb_tomselect:telemetry' %}"}}
+    </script>
+    {{ form.media }}
+</head>
+<body>
+<div class="container"><form method="post">{{ form.as_div }}</form></div>
+</body>
+</html>
+"""
+
+
+class Form(forms.Form):
+    person = forms.ModelChoiceField(
+        Person.objects.all(),
+        widget=MIZSelectTabular(Person, search_lookup="full_name__icontains", extra_columns={"dob": "Date of Birth"}),
+    )
+
+
+def view(request):
+    context = RequestContext(request)
+    context["form"] = Form()
+    return HttpResponse(Template(template).render(context))
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("telemetry/", view, name="telemetry"),
+    path("mizdb_tomselect/", include("mizdb_tomselect.urls")),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture(autouse=True)
+def enable_metrics(settings):
+    settings.MIZDB_TOMSELECT_METRICS = True
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def beacons(_page):
+    """Record the samples sent to the telemetry view."""
+    samples = []
+
+    def on_request(request):
+        if request.url.endswith(reverse("mizdb_tomselect:telemetry")):
+            samples.extend(json.loads(request.post_data)["samples"])
+
+    _page.on("request", on_request)
+    return samples
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["telemetry"])
+@pytest.mark.usefixtures("test_data", "beacons", "search")
+def test_telemetry(_page, view_name, selectable_options, beacons):
+    """Assert that the measurements are recorded and sent to the collector."""
+    expect(selectable_options.first).to_be_visible()
+    measures = _page.evaluate("() => performance.getEntriesByType('measure').map(m => m.name)")
+    for name in ("init", "load", "callback", "render", "keystroke"):
+        assert f"mizselect:{name}" in measures
+    with _page.expect_request_finished(lambda r: "mizdb_tomselect/telemetry" in r.url):
+        _page.evaluate("() => window.flushMIZSelectTelemetry()")
+    assert {sample["name"] for sample in beacons} >= {"init", "load", "callback", "render", "keystroke"}
+    assert all(sample["model"] == "testapp.person" for sample in beacons)
+    assert ("testapp.person", "load") in metrics.client_durations
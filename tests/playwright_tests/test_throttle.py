@@ -0,0 +1,71 @@
+import pytest
+from django import forms
+from django.urls import path
+from django.views.generic import FormView
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import Person
+
+
+class Form(forms.Form):
+    person = forms.ModelChoiceField(
+        Person.objects.all(), widget=MIZSelect(model=Person, url="autocomplete", label_field="full_name")
+    )
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("throttle/", FormView.as_view(form_class=Form, template_name="base.html"), name="throttle"),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture
+def throttled(_page):
+    """Answer the autocomplete requests with 429 responses while `throttled['active']` is set."""
+    state = {"active": False, "requests": 0}
+
+    def handle(route):
+        if state["active"]:
+            state["requests"] += 1
+            route.fulfill(status=429, headers={"Retry-After": "1"}, body="")
+        else:
+            route.continue_()
+
+    _page.route("**/autocomplete/**", handle)
+    return state
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["throttle"])
+@pytest.mark.usefixtures("test_data")
+def test_backs_off(_page, view_name, throttled, search_input, selectable_options):
+    """Assert that the element stops sending requests while it is throttled, and retries afterwards."""
+    throttled["active"] = True
+    search_input.fill("Ali")
+    _page.wait_for_timeout(100)
+    search_input.fill("Alic")
+    _page.wait_for_timeout(100)
+    assert throttled["requests"] == 1
+    throttled["active"] = False
+    # The search is retried once the back-off is over:
+    expect(selectable_options.first).to_contain_text("Alic", timeout=3000)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["throttle"])
+@pytest.mark.usefixtures("test_data")
+def test_shows_cached_results(_page, view_name, throttled, search_input, selectable_options):
+    """Assert that the last response for the search term is shown while requests are throttled."""
+    with _page.expect_request_finished():
+        search_input.fill("Alice")
+    expect(selectable_options.first).to_be_visible()
+    count = selectable_options.count()
+    with _page.expect_request_finished():
+        search_input.fill("Al")
+    throttled["active"] = True
+    search_input.fill("Alice")
+    expect(selectable_options).to_have_count(count)
@@ -0,0 +1,67 @@
+import pytest
+from django import forms
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.urls import include, path
+from playwright.sync_api import expect
+
+from mizdb_tomselect.views import AutocompleteView
+from mizdb_tomselect.widgets import MIZSelect
+from tests.testapp.models import Person
+
+template = """{% load static %}<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>MIZDB TomSelect Testapp</title>
+    <link href="{% static 'css/bootstrap.css' %}" rel="stylesheet">
+    <script src="{% static 'js/bootstrap.bundle.js' %}"></script>
+    <script>
+        window.MIZSelectConfig = {versionEvents: {url: "{% url 'mizdb_tomselect:version_events' %}"}}
+    </script>
+    {{ form.media }}
+</head>
+<body>
+<div class="container"><form method="post">{% csrf_token %}{{ form.as_div }}</form></div>
+</body>
+</html>
+"""
+
+
+class Form(forms.Form):
+    person = forms.ModelChoiceField(Person.objects.all(), widget=MIZSelect(Person, label_field="full_name"))
+
+
+def view(request):
+    context = RequestContext(request)
+    context["form"] = Form()
+    return HttpResponse(Template(template).render(context))
+
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("version_events/", view, name="version_events"),
+    path("mizdb_tomselect/", include("mizdb_tomselect.urls")),
+]
+
+pytestmark = [pytest.mark.pw, pytest.mark.urls(__name__)]
+
+
+@pytest.fixture(autouse=True)
+def enable_events(settings):
+    settings.MIZDB_TOMSELECT_VERSION_EVENTS = True
+    settings.MIZDB_TOMSELECT_TRACKED_MODELS = ["testapp.person"]
+    settings.MIZDB_TOMSELECT_VERSION_EVENTS_INTERVAL = 0.1
+    settings.MIZDB_TOMSELECT_VERSION_EVENTS_MAX_AGE = 5
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["version_events"])
+def test_reloads_open_dropdown(_page, view_name, ts_wrapper, selectable_options):
+    """Assert that an open dropdown reloads its options when the model changes."""
+    Person.objects.create(full_name="Alice Smith")
+    with _page.expect_request_finished():
+        ts_wrapper.click()
+    expect(selectable_options).to_have_count(1)
+    Person.objects.create(full_name="Bob Smith")
+    expect(selectable_options).to_have_count(2)
@@ -0,0 +1,37 @@
+import pytest
+from django.db import OperationalError, connection
+
+from mizdb_tomselect import budget
+from mizdb_tomselect.budget import BudgetExceeded, time_limit
+from tests.testapp.models import Person
+
+
+@pytest.fixture
+def check_every_step(monkeypatch):
+    monkeypatch.setattr(budget, "SQLITE_PROGRESS_STEPS", 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("check_every_step")
+def test_time_limit_exceeded(random_person):
+    with pytest.raises(BudgetExceeded):
+        with time_limit(connection, 0):
+            list(Person.objects.all())
+    # The connection can still be used, without the limit:
+    assert list(Person.objects.all()) == [random_person]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("check_every_step")
+def test_time_limit_within_budget(random_person):
+    with time_limit(connection, 10):
+        assert list(Person.objects.all()) == [random_person]
+
+
+@pytest.mark.django_db
+def test_time_limit_other_errors():
+    """Assert that errors other than timeouts are not turned into BudgetExceeded."""
+    with pytest.raises(OperationalError):
+        with time_limit(connection, 10):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM no_such_table")
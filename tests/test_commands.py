@@ -0,0 +1,128 @@
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import QuerySet
+
+from mizdb_tomselect.management.commands.tomselect_generate import parse_distribution
+from tests.testapp.models import City, Genre, Person
+
+pytestmark = pytest.mark.django_db
+
+
+def generate(*args, **kwargs):
+    call_command("tomselect_generate", *args, stdout=StringIO(), **kwargs)
+
+
+def test_count():
+    """Assert that the given number of objects is created."""
+    generate("testapp.City", count=123, batch_size=50)
+    assert City.objects.count() == 123
+
+
+def test_seed_reproducible():
+    """Assert that the same seed produces the same labels."""
+    generate("testapp.City", count=20, seed=1)
+    first = list(City.objects.order_by("pk").values_list("name", flat=True))
+    generate("testapp.City", count=20, seed=1, clear=True)
+    assert list(City.objects.order_by("pk").values_list("name", flat=True)) == first
+
+
+def test_different_seeds():
+    """Assert that different seeds produce different labels."""
+    generate("testapp.City", count=20, seed=1)
+    first = list(City.objects.order_by("pk").values_list("name", flat=True))
+    generate("testapp.City", count=20, seed=2, clear=True)
+    assert list(City.objects.order_by("pk").values_list("name", flat=True)) != first
+
+
+@pytest.mark.parametrize("distribution, low, high", [("uniform:5:10", 1, 10), ("normal:20:3", 1, 50)])
+def test_label_length(distribution, low, high):
+    """Assert that the label lengths follow the given distribution."""
+    generate("testapp.City", count=200, label_length=distribution)
+    lengths = [len(name) for name in City.objects.values_list("name", flat=True)]
+    assert low <= min(lengths)
+    assert max(lengths) <= high
+
+
+def test_label_length_clamped_to_max_length():
+    """Assert that labels are not longer than the max_length of the label field."""
+    generate("testapp.City", count=50, label_length="uniform:100:200")
+    assert max(len(name) for name in City.objects.values_list("name", flat=True)) <= 50
+
+
+def test_prefixes():
+    """Assert that labels share the given number of prefixes."""
+    generate("testapp.City", count=200, prefixes=3, prefix_share=1.0, label_length="uniform:20:30")
+    prefixes = {name.split(" ")[0] for name in City.objects.values_list("name", flat=True)}
+    assert len(prefixes) <= 3
+
+
+def test_fan_out():
+    """Assert that related objects are created for the foreign key."""
+    generate("testapp.Person", count=100, fan_out=["city=10"])
+    assert City.objects.count() == 10
+    assert not Person.objects.filter(city__isnull=True).exists()
+
+
+def test_fan_out_not_a_foreign_key():
+    """Assert that an error is raised if the fan-out field is not a foreign key."""
+    with pytest.raises(CommandError):
+        generate("testapp.Person", count=1, fan_out=["first_name=10"])
+
+
+def test_fan_out_unknown_field():
+    """Assert that an error is raised if the model has no fan-out field."""
+    with pytest.raises(CommandError):
+        generate("testapp.Person", count=1, fan_out=["foo=10"])
+
+
+def test_batches_committed_separately():
+    """Assert that batches that were created are kept if a later batch fails."""
+    bulk_create = QuerySet.bulk_create
+    calls = []
+
+    def fail_second_batch(queryset, objs, *args, **kwargs):
+        calls.append(objs)
+        if len(calls) == 2:
+            raise RuntimeError
+        return bulk_create(queryset, objs, *args, **kwargs)
+
+    with patch.object(QuerySet, "bulk_create", fail_second_batch):
+        with pytest.raises(RuntimeError):
+            generate("testapp.City", count=100, batch_size=50)
+    assert City.objects.count() == 50
+
+
+def test_label_parts():
+    """Assert that the words of the label are distributed over the label parts."""
+    generate("testapp.Person", count=50, label_parts=["first_name", "last_name"])
+    for person in Person.objects.all():
+        assert f"{person.first_name} {person.last_name}".strip() == person.full_name
+
+
+def test_unique_label_field():
+    """Assert that labels are unique if the label field is unique."""
+    generate("testapp.Genre", count=100, label_length="uniform:1:2")
+    generate("testapp.Genre", count=100, label_length="uniform:1:2")
+    assert Genre.objects.values("genre").distinct().count() == 200
+
+
+def test_clear():
+    """Assert that existing objects are deleted with the 'clear' option."""
+    generate("testapp.City", count=10)
+    generate("testapp.City", count=5, clear=True)
+    assert City.objects.count() == 5
+
+
+def test_invalid_model():
+    """Assert that an error is raised for an unknown model."""
+    with pytest.raises(CommandError):
+        generate("testapp.Foo")
+
+
+def test_invalid_distribution():
+    """Assert that an error is raised for an unknown label length distribution."""
+    with pytest.raises(CommandError):
+        parse_distribution("poisson:1:2")
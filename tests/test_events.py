@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core import signals
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from django.urls import include, path, reverse
+
+from mizdb_tomselect.events import aversion_events, format_event, get_models, version_events
+from mizdb_tomselect.versions import bump_version, get_version
+from tests.testapp.models import City, Person
+
+urlpatterns = [
+    path("mizdb_tomselect/", include("mizdb_tomselect.urls")),
+]
+
+
+def parse_events(chunks):
+    """Return the (event, data) tuples of the given stream chunks."""
+    events = []
+    for chunk in chunks:
+        lines = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture(autouse=True)
+def tracked_models(settings):
+    settings.MIZDB_TOMSELECT_TRACKED_MODELS = ["testapp.person", "testapp.city"]
+
+
+def test_get_models():
+    assert get_models("testapp.person, testapp.City,testapp.nomodel,foo,,testapp.person") == [Person, City]
+
+
+def test_get_models_untracked():
+    """Assert that the versions of untracked models cannot be requested."""
+    assert get_models("testapp.person,testapp.genre,auth.user") == [Person]
+
+
+def test_format_event():
+    event = format_event("version", {"model": "testapp.person"})
+    assert event == 'event: version\ndata: {"model": "testapp.person"}\n\n'
+
+
+def test_version_events_initial_versions():
+    """Assert that the stream starts with the current versions of the models."""
+    chunks = list(version_events([Person, City], interval=0.01, max_age=0))
+    assert chunks[0].startswith("retry: ")
+    assert parse_events(chunks) == [
+        ("version", {"model": "testapp.person", "version": get_version(Person)}),
+        ("version", {"model": "testapp.city", "version": get_version(City)}),
+    ]
+
+
+def test_version_events_change():
+    """Assert that a version change is sent to the client."""
+    stream = version_events([Person, City], interval=0.01, max_age=10)
+    for _ in range(3):  # retry and the initial versions
+        next(stream)
+    bump_version(Person)
+    assert parse_events([next(stream)]) == [("version", {"model": "testapp.person", "version": get_version(Person)})]
+    stream.close()
+
+
+def test_version_events_wakes_up_on_change():
+    """Assert that changes made in the same process are sent without waiting for the interval."""
+    stream = version_events([Person], interval=60, max_age=120)
+    for _ in range(2):
+        next(stream)
+    timer = threading.Timer(0.05, bump_version, args=(Person,))
+    timer.start()
+    assert parse_events([next(stream)])[0][1]["version"] == get_version(Person)
+    timer.join()
+    stream.close()
+
+
+def test_version_events_ping():
+    """Assert that a keep-alive comment is sent if nothing changed."""
+    stream = version_events([Person], interval=0.01, max_age=10)
+    for _ in range(2):
+        next(stream)
+    assert next(stream) == ": ping\n\n"
+    stream.close()
+
+
+def test_aversion_events():
+    """Assert that the asynchronous stream sends the same events as the synchronous one."""
+
+    async def inner():
+        stream = aversion_events([Person], interval=60, max_age=120)
+        chunks = [await stream.__anext__() for _ in range(2)]
+        # Bump from another thread, like a request handled in a worker thread.
+        timer = threading.Timer(0.05, bump_version, args=(Person,))
+        timer.start()
+        chunks.append(await asyncio.wait_for(stream.__anext__(), timeout=5))
+        await stream.aclose()
+        timer.join()
+        return chunks
+
+    chunks = async_to_sync(inner)()
+    assert chunks[0].startswith("retry: ")
+    assert parse_events(chunks[1:2])[0][0] == "version"
+    assert parse_events(chunks[2:]) == [("version", {"model": "testapp.person", "version": get_version(Person)})]
+
+
+def test_aversion_events_ping():
+    async def inner():
+        stream = aversion_events([Person], interval=0.01, max_age=10)
+        chunks = [await stream.__anext__() for _ in range(3)]
+        await stream.aclose()
+        return chunks
+
+    assert async_to_sync(inner)()[2] == ": ping\n\n"
+
+
+@pytest.mark.urls(__name__)
+class TestVersionStreamView:
+    @pytest.fixture(autouse=True)
+    def enable_events(self, settings):
+        settings.MIZDB_TOMSELECT_VERSION_EVENTS = True
+        settings.MIZDB_TOMSELECT_VERSION_EVENTS_MAX_AGE = 0
+
+    def test_stream(self, client):
+        response = client.get(reverse("mizdb_tomselect:version_events"), data={"models": "testapp.person"})
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        assert response["Cache-Control"] == "no-cache"
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        assert parse_events(chunks) == [("version", {"model": "testapp.person", "version": get_version(Person)})]
+
+    @pytest.mark.parametrize("models", ["", "testapp.nomodel"])
+    def test_no_models(self, client, models):
+        response = client.get(reverse("mizdb_tomselect:version_events"), data={"models": models})
+        assert response.status_code == 400
+
+    def test_disabled(self, client, settings):
+        settings.MIZDB_TOMSELECT_VERSION_EVENTS = False
+        response = client.get(reverse("mizdb_tomselect:version_events"), data={"models": "testapp.person"})
+        assert response.status_code == 404
+
+    def test_untracked_model(self, client):
+        response = client.get(reverse("mizdb_tomselect:version_events"), data={"models": "auth.user"})
+        assert response.status_code == 400
+
+    @pytest.fixture
+    def no_close_old_connections(self):
+        """Keep the handler from touching the database connection, like the test client does."""
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        yield
+        signals.request_started.connect(close_old_connections)
+        signals.request_finished.connect(close_old_connections)
+
+    def test_asgi_streams_events(self, settings, no_close_old_connections):
+        """
+        Assert that, under ASGI, events are sent as they happen instead of
+        when the stream ends.
+        """
+        settings.MIZDB_TOMSELECT_VERSION_EVENTS_MAX_AGE = 2
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": reverse("mizdb_tomselect:version_events"),
+            "query_string": b"models=testapp.person",
+            "headers": [],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 12345),
+        }
+
+        async def inner():
+            received = asyncio.Queue()
+            disconnect = asyncio.Event()
+
+            async def receive():
+                if received.empty() and not disconnect.is_set():
+                    await received.put(None)
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            bodies = []
+            first_event = asyncio.Event()
+
+            async def send(message):
+                if message["type"] == "http.response.body" and message.get("body"):
+                    bodies.append((time.monotonic(), message["body"].decode()))
+                    if "event: version" in message["body"].decode():
+                        first_event.set()
+
+            start = time.monotonic()
+            task = asyncio.ensure_future(ASGIHandler()(scope, receive, send))
+            await asyncio.wait_for(first_event.wait(), timeout=1)
+            bump_version(Person)
+            await asyncio.sleep(0.1)
+            disconnect.set()
+            await asyncio.wait_for(task, timeout=5)
+            return start, bodies
+
+        start, bodies = async_to_sync(inner)()
+        events = parse_events(body for _, body in bodies)
+        assert events[-1] == ("version", {"model": "testapp.person", "version": get_version(Person)})
+        assert len(events) == 2
+        # The first event was sent long before the stream would have ended.
+        assert bodies[0][0] - start < 1
@@ -0,0 +1,188 @@
+import http.client
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+from django.urls import path
+
+from mizdb_tomselect.loadtest import Client, Session, Stats, format_summary, get_parser, main, percentile
+from mizdb_tomselect.lookups import sign_config
+from mizdb_tomselect.views import AutocompleteView
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+]
+
+
+def get_options(*args):
+    return get_parser().parse_args(["http://testserver/autocomplete/", "--model", "testapp.person", *args])
+
+
+@pytest.mark.parametrize(
+    "values, p, expected",
+    [([], 50, None), ([5], 99, 5), ([1, 2, 3], 50, 2), (list(range(1, 101)), 99, 99.01)],
+)
+def test_percentile(values, p, expected):
+    assert percentile(values, p) == pytest.approx(expected)
+
+
+def test_stats_summary():
+    """Assert that the summary reports the error rate and the breakdown by kind."""
+    stats = Stats()
+    stats.add("type", 10, True)
+    stats.add("type", 30, False)
+    stats.add("page", 20, True)
+    stats.add("page", 5, False, throttled=True)
+    stats.finished = stats.started + 2
+    summary = stats.summary()
+    assert summary["requests"] == 4
+    assert summary["errors"] == 1
+    assert summary["error_rate"] == 0.25
+    assert summary["throttled"] == 1
+    assert summary["throughput_rps"] == 2
+    assert summary["p50_ms"] == 15
+    assert summary["by_kind"]["type"]["errors"] == 1
+    assert summary["by_kind"]["page"]["requests"] == 2
+    assert summary["by_kind"]["page"]["errors"] == 0
+    assert summary["by_kind"]["page"]["throttled"] == 1
+    assert "total" in format_summary(summary)
+
+
+def test_client_incomplete_read():
+    """Assert that an incomplete response is recorded as an error."""
+    stats = Stats()
+    client = Client("http://testserver/autocomplete/", stats, {})
+    with patch("mizdb_tomselect.loadtest.urlopen", side_effect=http.client.IncompleteRead(b"")):
+        assert client.fetch("type", "a") is None
+    assert stats.errors["type"] == 1
+
+
+class TestSession:
+    @pytest.fixture
+    def requests(self):
+        return []
+
+    @pytest.fixture
+    def fetch(self, requests):
+        """Record the requests and report more results for the first two pages."""
+
+        def inner(kind, q, page=1, filter_by=None):
+            requests.append((kind, q, page, filter_by))
+            return {"results": [], "page": page, "has_more": page < 3}
+
+        return inner
+
+    def run_session(self, fetch, *args):
+        options = get_options("--terms", "alice", *args)
+        Session(fetch, random.Random(0), options, sleep=lambda seconds: None).run()
+
+    def test_incremental_queries(self, fetch, requests):
+        """Assert that every keystroke sends a request if typing is slower than the throttle."""
+        self.run_session(fetch, "--throttle", "0", "--backspace-rate", "0", "--scroll-rate", "0")
+        assert [q for _kind, q, *_ in requests] == ["", "a", "al", "ali", "alic", "alice", "alice"]
+
+    def test_throttle(self, fetch, requests):
+        """Assert that only the final query is sent if typing is faster than the throttle."""
+        self.run_session(fetch, "--throttle", "1000", "--backspace-rate", "0", "--scroll-rate", "0")
+        assert [q for _kind, q, *_ in requests] == ["", "alice"]
+
+    def test_backspace(self, fetch, requests):
+        self.run_session(fetch, "--throttle", "0", "--backspace-rate", "1", "--scroll-rate", "0")
+        backspaces = [q for kind, q, *_ in requests if kind == "backspace"]
+        assert backspaces == ["a", "al", "ali", "alic"]
+
+    def test_scroll(self, fetch, requests):
+        """Assert that the session scrolls until there are no more results."""
+        self.run_session(fetch, "--throttle", "1000", "--scroll-rate", "1")
+        assert [(kind, page) for kind, _q, page, _f in requests][-2:] == [("page", 2), ("page", 3)]
+
+    def test_filter_change(self, fetch, requests):
+        self.run_session(
+            fetch,
+            *["--filter-lookup", "city_id", "--filter-values", "1", "2", "--filter-change-rate", "1"],
+            *["--throttle", "1000", "--scroll-rate", "0"],
+        )
+        kinds = [kind for kind, *_ in requests]
+        assert kinds == ["open", "filter", "type"]
+        assert all(f in ("city_id=1", "city_id=2") for *_, f in requests)
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+@pytest.mark.usefixtures("test_data")
+def test_main(live_server, capsys):
+    """Run a short load test against the live server."""
+    exit_code = main(
+        [
+            f"{live_server.url}/autocomplete/",
+            *["--model", "testapp.person", "--search-lookup", "full_name__icontains"],
+            *["--terms", "alice", "--users", "3", "--sessions", "2", "--keystroke-delay", "0"],
+            *["--scroll-rate", "1", "--json"],
+        ]
+    )
+    summary = json.loads(capsys.readouterr().out)
+    assert exit_code == 0
+    assert summary["errors"] == 0
+    # Each session: open, type and two further pages of the three pages of test data.
+    assert summary["requests"] == 3 * 2 * 4
+    assert summary["by_kind"]["page"]["requests"] == 3 * 2 * 2
+    assert summary["p99_ms"] is not None
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+def test_main_reports_errors(live_server, capsys):
+    exit_code = main(
+        [f"{live_server.url}/autocomplete/", "--model", "testapp.nomodel", "--users", "1", "--sessions", "1"]
+    )
+    assert exit_code == 1
+    assert "errors" in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+@pytest.mark.usefixtures("test_data")
+def test_main_reports_throttled(live_server, capsys, settings):
+    """Assert that throttled requests are reported separately from the errors."""
+    settings.MIZDB_TOMSELECT_THROTTLE_RATE = 0.001
+    settings.MIZDB_TOMSELECT_THROTTLE_BURST = 1
+    exit_code = main(
+        [
+            f"{live_server.url}/autocomplete/",
+            *["--model", "testapp.person", "--search-lookup", "full_name__icontains"],
+            *["--terms", "alice", "--users", "1", "--sessions", "1", "--keystroke-delay", "0", "--json"],
+        ]
+    )
+    summary = json.loads(capsys.readouterr().out)
+    assert exit_code == 0
+    assert summary["errors"] == 0
+    assert summary["throttled"] == summary["requests"] - 1
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+@pytest.mark.usefixtures("test_data")
+def test_main_config(live_server, capsys, settings):
+    """Assert that the signed widget configuration is sent with the requests."""
+    settings.MIZDB_TOMSELECT_REQUIRE_CONFIG = True
+    args = [
+        f"{live_server.url}/autocomplete/",
+        *["--model", "testapp.person", "--search-lookup", "full_name__icontains", "--values", "id", "full_name"],
+        *["--terms", "alice", "--users", "1", "--sessions", "1", "--keystroke-delay", "0", "--json"],
+    ]
+    assert main(args) == 1
+    capsys.readouterr()
+    config = sign_config(
+        {
+            "model": "testapp.person",
+            "sl": "full_name__icontains",
+            "f": None,
+            "vs": ["id", "full_name"],
+            "cf": None,
+            "mq": 0,
+            "x": False,
+        }
+    )
+    assert main([*args, "--config", config]) == 0
+    assert json.loads(capsys.readouterr().out)["errors"] == 0
@@ -0,0 +1,81 @@
+import pytest
+from django.core import signing
+
+from mizdb_tomselect.lookups import InvalidLookup, check_lookup, get_lookup_cost, load_config, sign_config
+from tests.testapp.models import Person
+
+
+@pytest.mark.parametrize(
+    "lookup, expected",
+    [
+        ("first_name", (0, [])),
+        ("first_name__icontains", (0, ["icontains"])),
+        ("dob__year", (0, ["year"])),
+        ("dob__year__gte", (0, ["year", "gte"])),
+        ("pk", (0, [])),
+        ("city", (0, [])),
+        ("city_id", (0, [])),
+        ("city__in", (0, ["in"])),
+        ("city__isnull", (0, ["isnull"])),
+        ("city__pk", (1, [])),
+        ("city__name", (1, [])),
+        ("city__name__iregex", (1, ["iregex"])),
+        ("city__person__first_name__icontains", (2, ["icontains"])),
+    ],
+)
+def test_get_lookup_cost(lookup, expected):
+    assert get_lookup_cost(Person, lookup) == expected
+
+
+@pytest.mark.parametrize(
+    "lookup",
+    [
+        "foo",
+        "foo__icontains",
+        "",
+        "first_name__foo",
+        "first_name__icontains__exact",
+        "dob__year__foo",
+        "city__foo",
+        "city__persons__full_name__icontains",
+    ],
+)
+def test_get_lookup_cost_invalid(lookup):
+    """Assert that lookups that do not resolve to fields, lookups or transforms are rejected."""
+    with pytest.raises(InvalidLookup):
+        get_lookup_cost(Person, lookup)
+
+
+@pytest.mark.parametrize("lookup", ["first_name__icontains", "city__name__istartswith"])
+def test_check_lookup(lookup):
+    check_lookup(Person, lookup)
+
+
+@pytest.mark.parametrize("lookup", ["first_name__regex", "city__name__iregex"])
+def test_check_lookup_expensive(lookup):
+    with pytest.raises(InvalidLookup):
+        check_lookup(Person, lookup)
+    # Unless it is explicitly allowed:
+    check_lookup(Person, lookup, allowed=[lookup])
+
+
+def test_check_lookup_max_joins(settings):
+    # No limit by default:
+    check_lookup(Person, "city__person__city__person__first_name")
+    settings.MIZDB_TOMSELECT_MAX_JOINS = 1
+    with pytest.raises(InvalidLookup):
+        check_lookup(Person, "city__person__first_name")
+    check_lookup(Person, "city__person__first_name", allowed=["city__person__first_name"])
+    settings.MIZDB_TOMSELECT_MAX_JOINS = 2
+    check_lookup(Person, "city__person__first_name")
+    settings.MIZDB_TOMSELECT_MAX_JOINS = 0
+    with pytest.raises(InvalidLookup):
+        check_lookup(Person, "city__name")
+
+
+def test_config_signature():
+    config = {"model": "testapp.person", "sl": "first_name__icontains"}
+    token = sign_config(config)
+    assert load_config(token) == config
+    with pytest.raises(signing.BadSignature):
+        load_config(token[:-1] + ("A" if token[-1] != "A" else "B"))
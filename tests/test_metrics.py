@@ -0,0 +1,199 @@
+import json
+
+import pytest
+from django.urls import include, path, reverse
+
+from mizdb_tomselect.metrics import BUCKETS, MAX_SAMPLES, Metrics, metrics, page_bucket, record_request
+from mizdb_tomselect.signals import autocomplete_request_finished
+from mizdb_tomselect.views import SEARCH_LOOKUP_VAR, VALUES_VAR, AutocompleteView
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("mizdb_tomselect/", include("mizdb_tomselect.urls")),
+]
+
+
+@pytest.mark.parametrize(
+    "page, expected",
+    [(None, ""), (1, "1"), (2, "2-5"), (5, "2-5"), (6, "6+"), ("last", "other")],
+)
+def test_page_bucket(page, expected):
+    """Assert that page_bucket returns the expected bucket label."""
+    assert page_bucket(page) == expected
+
+
+class TestMetrics:
+    @pytest.fixture
+    def store(self):
+        return Metrics()
+
+    def test_observe_request(self, store):
+        """Assert that observe counts the request and its queries."""
+        store.observe("testapp.person", "GET", 200, 0.02, page=1, queries=2)
+        store.observe("testapp.person", "GET", 200, 0.02, page=1, queries=3)
+        assert store.requests[("testapp.person", "GET", "200")] == 2
+        assert store.queries["testapp.person"] == 5
+
+    def test_observe_duration(self, store):
+        """Assert that observe adds the duration to the histogram buckets."""
+        store.observe("testapp.person", "GET", 200, 0.02, page=1)
+        histogram = store.durations[("testapp.person", "GET", "1")]
+        for bound, count in zip(BUCKETS, histogram):
+            assert count == (1 if bound >= 0.02 else 0)
+        assert histogram[-2] == 0.02
+        assert histogram[-1] == 1
+
+    def test_observe_outcome(self, store):
+        """Assert that observe counts the outcomes of create requests."""
+        store.observe("testapp.person", "POST", 200, 0.01, outcome="unique")
+        assert store.creates[("testapp.person", "unique")] == 1
+
+    def test_observe_cache(self, store):
+        """Assert that observe counts cache hits and misses."""
+        store.observe("testapp.person", "GET", 200, 0.01, page=1, cache="hit")
+        store.observe("testapp.person", "GET", 200, 0.01, page=1)
+        assert store.cache == {("testapp.person", "hit"): 1}
+
+    def test_render(self, store):
+        """Assert that render returns the metrics in the Prometheus text format."""
+        store.observe("testapp.person", "GET", 200, 0.02, page=1, queries=2, cache="miss")
+        store.observe("testapp.person", "POST", 200, 0.01, outcome="created")
+        text = store.render()
+        assert "# TYPE mizdb_tomselect_request_duration_seconds histogram" in text
+        assert 'mizdb_tomselect_requests_total{model="testapp.person",method="GET",status="200"} 1' in text
+        assert (
+            'mizdb_tomselect_request_duration_seconds_bucket{model="testapp.person",method="GET",page="1",le="+Inf"} 1'
+            in text
+        )
+        assert 'mizdb_tomselect_request_duration_seconds_count{model="testapp.person",method="GET",page="1"} 1' in text
+        assert 'mizdb_tomselect_queries_total{model="testapp.person"} 2' in text
+        assert 'mizdb_tomselect_creates_total{model="testapp.person",outcome="created"} 1' in text
+        assert 'mizdb_tomselect_cache_total{model="testapp.person",result="miss"} 1' in text
+
+    def test_observe_client(self, store):
+        """Assert that observe_client adds the duration to the client histogram."""
+        store.observe_client("testapp.person", "load", 0.02)
+        histogram = store.client_durations[("testapp.person", "load")]
+        assert histogram[-2] == 0.02
+        assert histogram[-1] == 1
+        text = store.render()
+        assert "# TYPE mizdb_tomselect_client_duration_seconds histogram" in text
+        assert 'mizdb_tomselect_client_duration_seconds_count{model="testapp.person",phase="load"} 1' in text
+
+    def test_render_escapes_labels(self, store):
+        """Assert that quotes in label values are escaped."""
+        store.observe('foo"bar', "GET", 200, 0.01)
+        assert 'model="foo\\"bar"' in store.render()
+
+    def test_reset(self, store):
+        """Assert that reset discards the collected metrics."""
+        store.observe("testapp.person", "GET", 200, 0.01)
+        store.reset()
+        assert not store.requests
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestMetricsView:
+    @pytest.fixture(autouse=True)
+    def enable_metrics(self, settings):
+        settings.MIZDB_TOMSELECT_METRICS = True
+        metrics.reset()
+        autocomplete_request_finished.connect(record_request, dispatch_uid="test_metrics")
+        yield
+        autocomplete_request_finished.disconnect(dispatch_uid="test_metrics")
+        metrics.reset()
+
+    def test_metrics_view(self, client, admin_client, random_person):
+        """Assert that the metrics view reports the autocomplete requests."""
+        client.get(
+            reverse("autocomplete"),
+            data={
+                "model": "testapp.person",
+                SEARCH_LOOKUP_VAR: "full_name__icontains",
+                VALUES_VAR: json.dumps(["id", "full_name"]),
+            },
+        )
+        response = admin_client.get(reverse("mizdb_tomselect:metrics"))
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        text = response.content.decode()
+        assert 'mizdb_tomselect_requests_total{model="testapp.person",method="GET",status="200"} 1' in text
+
+    def test_metrics_view_post_outcome(self, admin_client):
+        """Assert that the metrics view reports the outcomes of create requests."""
+        request_data = {"model": "testapp.person", "full_name": "Bob Testman", "create-field": "full_name"}
+        admin_client.post(reverse("autocomplete"), data=request_data)
+        text = admin_client.get(reverse("mizdb_tomselect:metrics")).content.decode()
+        assert 'mizdb_tomselect_creates_total{model="testapp.person",outcome="created"} 1' in text
+
+    def test_metrics_view_not_staff(self, client, noperms_user):
+        """Assert that the metrics cannot be read by anonymous users or users without staff status."""
+        assert client.get(reverse("mizdb_tomselect:metrics")).status_code == 403
+        client.force_login(noperms_user)
+        assert client.get(reverse("mizdb_tomselect:metrics")).status_code == 403
+
+    @pytest.mark.parametrize(
+        "header, status_code",
+        [("Bearer secret", 200), ("bearer secret", 200), ("Bearer wrong", 403), ("secret", 403), ("Bearer ", 403)],
+    )
+    def test_metrics_view_token(self, client, settings, header, status_code):
+        """Assert that the metrics can be read with the bearer token."""
+        settings.MIZDB_TOMSELECT_METRICS_TOKEN = "secret"
+        response = client.get(reverse("mizdb_tomselect:metrics"), headers={"Authorization": header})
+        assert response.status_code == status_code
+
+    def test_metrics_view_no_token(self, client):
+        """Assert that an empty bearer token is not accepted if no token is set."""
+        response = client.get(reverse("mizdb_tomselect:metrics"), headers={"Authorization": "Bearer "})
+        assert response.status_code == 403
+
+    def test_metrics_view_disabled(self, client, settings):
+        """Assert that the metrics view returns a 404 if metrics are not enabled."""
+        settings.MIZDB_TOMSELECT_METRICS = False
+        assert client.get(reverse("mizdb_tomselect:metrics")).status_code == 404
+
+    def test_telemetry_view(self, client):
+        """Assert that the telemetry view aggregates the valid samples."""
+        samples = [
+            {"name": "load", "model": "testapp.Person", "duration": 12.5},
+            {"name": "render", "model": "testapp.person", "duration": 3},
+            # Invalid samples:
+            {"name": "foo", "model": "testapp.person", "duration": 1},
+            {"name": "load", "model": "testapp.nomodel", "duration": 1},
+            {"name": "load", "model": "testapp.person", "duration": -1},
+            {"name": "load", "model": "testapp.person", "duration": "1"},
+            {"name": "load", "model": "testapp.person", "duration": 10**9},
+            "load",
+        ]
+        response = client.post(
+            reverse("mizdb_tomselect:telemetry"),
+            data=json.dumps({"samples": samples}),
+            content_type="text/plain",
+        )
+        assert response.status_code == 204
+        assert metrics.client_durations[("testapp.person", "load")][-2:] == [0.0125, 1]
+        assert metrics.client_durations[("testapp.person", "render")][-1] == 1
+        assert len(metrics.client_durations) == 2
+
+    @pytest.mark.parametrize("body", ["foo", "{}", '{"samples": "foo"}', "[]"])
+    def test_telemetry_view_bad_request(self, client, body):
+        response = client.post(reverse("mizdb_tomselect:telemetry"), data=body, content_type="application/json")
+        assert response.status_code == 400
+
+    def test_telemetry_view_limits_samples(self, client):
+        samples = [{"name": "load", "model": "testapp.person", "duration": 1}] * (MAX_SAMPLES + 1)
+        client.post(
+            reverse("mizdb_tomselect:telemetry"),
+            data=json.dumps({"samples": samples}),
+            content_type="application/json",
+        )
+        assert metrics.client_durations[("testapp.person", "load")][-1] == MAX_SAMPLES
+
+    def test_telemetry_view_get(self, client):
+        assert client.get(reverse("mizdb_tomselect:telemetry")).status_code == 405
+
+    def test_telemetry_view_disabled(self, client, settings):
+        settings.MIZDB_TOMSELECT_METRICS = False
+        response = client.post(reverse("mizdb_tomselect:telemetry"), data="{}", content_type="application/json")
+        assert response.status_code == 404
@@ -0,0 +1,196 @@
+import pstats
+import threading
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.urls import include, path, reverse
+
+from mizdb_tomselect.profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    PROFILE_TOKEN_SALT,
+    PROFILE_VAR,
+    make_token,
+    profile,
+    should_profile,
+)
+from mizdb_tomselect.views import AutocompleteView
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("mizdb_tomselect/", include("mizdb_tomselect.urls")),
+]
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls(__name__)]
+
+HEADERS = {f"HTTP_{PROFILE_HEADER.upper().replace('-', '_')}": "1"}
+
+
+@pytest.fixture
+def profile_dir(settings, tmp_path):
+    settings.MIZDB_TOMSELECT_PROFILE_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def get(test_data):
+    """Make an autocomplete request with the given client."""
+
+    def inner(client, **kwargs):
+        request_data = {"model": "testapp.person", "q": "Alice", "sl": "first_name"}
+        return client.get(reverse("autocomplete"), data=request_data, **kwargs)
+
+    return inner
+
+
+class TestShouldProfile:
+    def test_header_staff(self, rf, admin_user):
+        request = rf.get("/", headers={PROFILE_HEADER: "1"})
+        request.user = admin_user
+        assert should_profile(request)
+
+    def test_header_not_staff(self, rf, noperms_user):
+        request = rf.get("/", headers={PROFILE_HEADER: "1"})
+        request.user = noperms_user
+        assert not should_profile(request)
+
+    def test_token(self, rf, noperms_user):
+        request = rf.get("/", data={PROFILE_VAR: make_token(noperms_user)})
+        request.user = noperms_user
+        assert should_profile(request)
+
+    def test_token_other_user(self, rf, admin_user, noperms_user):
+        request = rf.get("/", data={PROFILE_VAR: make_token(admin_user)})
+        request.user = noperms_user
+        assert not should_profile(request)
+
+    def test_token_anonymous(self, rf, admin_user):
+        request = rf.get("/", data={PROFILE_VAR: make_token(admin_user)})
+        request.user = AnonymousUser()
+        assert not should_profile(request)
+
+    def test_token_invalid(self, rf, noperms_user):
+        request = rf.get("/", data={PROFILE_VAR: "foo:bar"})
+        request.user = noperms_user
+        assert not should_profile(request)
+
+    def test_token_expired(self, rf, monkeypatch, noperms_user):
+        signer = signing.TimestampSigner(salt=PROFILE_TOKEN_SALT)
+        monkeypatch.setattr(signer, "timestamp", lambda: signing.b62_encode(0))
+        request = rf.get("/", data={PROFILE_VAR: signer.sign(f"{noperms_user.pk}:foo")})
+        request.user = noperms_user
+        assert not should_profile(request)
+
+    def test_no_trigger(self, rf, admin_user):
+        request = rf.get("/")
+        request.user = admin_user
+        assert not should_profile(request)
+
+
+def test_profile_header(profile_dir, get, admin_client):
+    """Assert that a profiled request stores the profile and returns its name."""
+    response = get(admin_client, **HEADERS)
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 20
+    name = response[PROFILE_ID_HEADER]
+    assert "testapp.person" in name
+    stats = pstats.Stats(str(profile_dir / f"{name}.prof"))
+    assert any(func_name == "get" for _file, _line, func_name in stats.stats)
+    summary = (profile_dir / f"{name}.txt").read_text()
+    assert "Functions" in summary
+    assert "Allocations" in summary
+
+
+def test_profile_token(profile_dir, test_data, client, noperms_user):
+    client.force_login(noperms_user)
+    data = {"model": "testapp.person", PROFILE_VAR: make_token(noperms_user)}
+    response = client.get(reverse("autocomplete"), data=data)
+    assert PROFILE_ID_HEADER in response
+    assert (profile_dir / f"{response[PROFILE_ID_HEADER]}.prof").exists()
+
+
+def test_no_profile_token_anonymous(profile_dir, test_data, client, admin_user):
+    data = {"model": "testapp.person", PROFILE_VAR: make_token(admin_user)}
+    response = client.get(reverse("autocomplete"), data=data)
+    assert PROFILE_ID_HEADER not in response
+    assert not list(profile_dir.iterdir())
+
+
+def test_profile_overlapping(profile_dir):
+    """
+    Assert that a profiled call that ends while another one is running does not
+    stop the tracing of the other one.
+    """
+    first_running, second_running, first_done = threading.Event(), threading.Event(), threading.Event()
+    errors = []
+
+    def first():
+        first_running.set()
+        # Give the second call the chance to start while this one is running.
+        second_running.wait(0.5)
+        return "first"
+
+    def second():
+        second_running.set()
+        first_done.wait(1)
+        return "second"
+
+    def run(func, done=None):
+        try:
+            profile(func, func.__name__)
+        except Exception as e:
+            errors.append(e)
+        if done:
+            done.set()
+
+    threads = [threading.Thread(target=run, args=(first, first_done)), threading.Thread(target=run, args=(second,))]
+    threads[0].start()
+    first_running.wait(1)
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(list(profile_dir.glob("*.prof"))) == 2
+
+
+def test_no_profile_not_staff(profile_dir, get, client, noperms_user):
+    client.force_login(noperms_user)
+    response = get(client, **HEADERS)
+    assert PROFILE_ID_HEADER not in response
+    assert not list(profile_dir.iterdir())
+
+
+def test_no_profile_disabled(settings, get, admin_client):
+    """Assert that requests are not profiled if no profile directory is set."""
+    settings.MIZDB_TOMSELECT_PROFILE_DIR = None
+    response = get(admin_client, **HEADERS)
+    assert PROFILE_ID_HEADER not in response
+
+
+class TestDownloadView:
+    @pytest.fixture
+    def name(self, profile_dir, get, admin_client):
+        return get(admin_client, **HEADERS)[PROFILE_ID_HEADER]
+
+    @pytest.mark.parametrize("suffix", [".prof", ".txt"])
+    def test_download(self, admin_client, name, suffix):
+        response = admin_client.get(reverse("mizdb_tomselect:profile", kwargs={"name": name + suffix}))
+        assert response.status_code == 200
+        assert f'filename="{name}{suffix}"' in response["Content-Disposition"]
+
+    def test_download_not_staff(self, client, noperms_user, name):
+        client.force_login(noperms_user)
+        response = client.get(reverse("mizdb_tomselect:profile", kwargs={"name": f"{name}.prof"}))
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize("filename", ["foo.prof", "..", "settings.py"])
+    def test_download_not_found(self, admin_client, profile_dir, filename):
+        (profile_dir / "settings.py").touch()
+        response = admin_client.get(reverse("mizdb_tomselect:profile", kwargs={"name": filename}))
+        assert response.status_code == 404
+
+    def test_download_disabled(self, settings, admin_client):
+        settings.MIZDB_TOMSELECT_PROFILE_DIR = None
+        response = admin_client.get(reverse("mizdb_tomselect:profile", kwargs={"name": "foo.prof"}))
+        assert response.status_code == 404
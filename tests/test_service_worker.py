@@ -0,0 +1,19 @@
+import pytest
+from django.urls import include, path, reverse
+
+from mizdb_tomselect.service_worker import SCRIPT_PATH
+
+urlpatterns = [
+    path("mizdb_tomselect/", include("mizdb_tomselect.urls")),
+]
+
+
+@pytest.mark.urls(__name__)
+def test_service_worker_view(client):
+    """Assert that the script is served with a header that allows it to control the whole site."""
+    response = client.get(reverse("mizdb_tomselect:service_worker"))
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/javascript"
+    assert response["Service-Worker-Allowed"] == "/"
+    assert "no-cache" in response["Cache-Control"]
+    assert b"".join(response.streaming_content) == SCRIPT_PATH.read_bytes()
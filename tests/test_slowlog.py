@@ -0,0 +1,137 @@
+import json
+import logging
+from unittest.mock import patch
+
+import pytest
+from django.urls import path, reverse
+
+from mizdb_tomselect.slowlog import is_full_scan
+from mizdb_tomselect.views import (
+    FILTERBY_VAR,
+    PAGE_VAR,
+    SEARCH_LOOKUP_VAR,
+    SEARCH_VAR,
+    VALUES_VAR,
+    AutocompleteView,
+)
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+]
+
+
+@pytest.mark.parametrize(
+    "plan, vendor, expected",
+    [
+        ("2 0 216 SCAN testapp_person", "sqlite", True),
+        ("3 0 0 SCAN TABLE testapp_person", "sqlite", True),
+        ("2 0 0 SCAN testapp_person USING INDEX testapp_person_city_id", "sqlite", False),
+        ("2 0 0 SEARCH testapp_person USING INTEGER PRIMARY KEY (rowid=?)", "sqlite", False),
+        ("2 0 0 SCAN CONSTANT ROW", "sqlite", False),
+        ("Seq Scan on testapp_person  (cost=0.00..1.01 rows=1 width=40)", "postgresql", True),
+        ("Index Scan using testapp_person_pkey on testapp_person", "postgresql", False),
+        ("1 SIMPLE testapp_person None ALL None None None None 100 11.11 Using where", "mysql", True),
+        ("1 SIMPLE testapp_person None ref city_id city_id 8 const 1 100.0 None", "mysql", False),
+        ("SCAN testapp_person", "unknown", False),
+    ],
+)
+def test_is_full_scan(plan, vendor, expected):
+    """Assert that is_full_scan detects full table scans in query plans."""
+    assert is_full_scan(plan, vendor) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestSlowLog:
+    @pytest.fixture
+    def threshold(self):
+        return 0
+
+    @pytest.fixture(autouse=True)
+    def set_threshold(self, settings, threshold):
+        settings.MIZDB_TOMSELECT_SLOW_THRESHOLD = threshold
+
+    @pytest.fixture
+    def slow_records(self, caplog, client, test_data):
+        """Make an autocomplete request and return the records of the slow log."""
+
+        def inner(request_data=None):
+            if request_data is None:
+                request_data = {
+                    "model": "testapp.person",
+                    SEARCH_VAR: "Alice",
+                    SEARCH_LOOKUP_VAR: "full_name__icontains",
+                    FILTERBY_VAR: f"city_id={test_data[0].city_id}",
+                    VALUES_VAR: json.dumps(["id", "full_name"]),
+                }
+            caplog.set_level(logging.WARNING, logger="mizdb_tomselect.slow")
+            client.get(reverse("autocomplete"), data=request_data)
+            return [r for r in caplog.records if r.name == "mizdb_tomselect.slow"]
+
+        return inner
+
+    @pytest.fixture
+    def explain(self):
+        return True
+
+    @pytest.fixture(autouse=True)
+    def set_explain(self, settings, explain):
+        settings.MIZDB_TOMSELECT_SLOW_EXPLAIN = explain
+
+    def test_logs_slow_request(self, slow_records):
+        """Assert that requests above the threshold are logged with the query plan."""
+        records = slow_records()
+        assert len(records) == 1
+        record = records[0]
+        assert record.sql.startswith("SELECT")
+        assert record.plan
+        assert record.queries > 0
+
+    def test_sql_without_params(self, slow_records, test_data):
+        """Assert that the logged SQL does not contain the search term or the filter value."""
+        record = slow_records()[0]
+        assert "%s" in record.sql
+        assert "Alice" not in record.sql
+        assert "Alice" not in record.getMessage()
+        assert f"= {test_data[0].city_id}" not in record.sql
+
+    @pytest.mark.parametrize("explain", [False])
+    def test_explain_disabled(self, slow_records):
+        """Assert that the query plan is not fetched unless enabled."""
+        with patch("mizdb_tomselect.slowlog.explain") as explain_mock:
+            record = slow_records()[0]
+        explain_mock.assert_not_called()
+        assert record.sql.startswith("SELECT")
+        assert record.plan is None
+        assert not record.full_scan
+        assert "plan:" not in record.getMessage()
+
+    def test_normalized_params(self, slow_records):
+        """Assert that the logged parameters do not contain the search term or filter value."""
+        assert slow_records()[0].params == {
+            "model": "testapp.person",
+            "method": "GET",
+            "search_lookup": "full_name__icontains",
+            "filter_by": "city_id",
+            "values": ["id", "full_name"],
+            "page": "1",
+            "query_length": len("Alice"),
+        }
+
+    def test_flags_full_scan(self, slow_records):
+        """Assert that plans that scan the whole table are flagged."""
+        request_data = {"model": "testapp.person", SEARCH_VAR: "Alice", SEARCH_LOOKUP_VAR: "full_name__icontains"}
+        record = slow_records(request_data)[0]
+        assert record.full_scan
+        assert "FULL TABLE SCAN" in record.getMessage()
+
+    @pytest.mark.parametrize("threshold", [None, 60_000])
+    def test_fast_request_not_logged(self, slow_records, threshold):
+        """Assert that requests are not logged if they are below the threshold or if logging is disabled."""
+        assert not slow_records()
+
+    def test_logs_failed_request(self, slow_records):
+        """Assert that requests that raise an exception are logged as well."""
+        records = slow_records({"model": "testapp.person", PAGE_VAR: "99"})
+        assert len(records) == 1
+        assert records[0].sql is None
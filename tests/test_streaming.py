@@ -0,0 +1,299 @@
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import urlencode
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import path
+
+from mizdb_tomselect import streaming
+from mizdb_tomselect.streaming import (
+    AutocompleteSocket,
+    format_response,
+    get_meta,
+    is_same_origin,
+    websocket_application,
+)
+from mizdb_tomselect.versions import get_cache
+from mizdb_tomselect.views import AutocompleteView
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("other/", lambda request: HttpResponse("foo"), name="other"),
+]
+
+
+def get_url(**params):
+    params = {"model": "testapp.person", "sl": "first_name", "vs": '["id", "first_name"]', **params}
+    return f"/autocomplete/?{urlencode(params)}"
+
+
+def communicate(*messages, count=None, headers=(), application=None):
+    """
+    Open a WebSocket connection, send the given messages and return the events
+    sent by the application once `count` messages were sent back.
+    """
+    scope = {
+        "type": "websocket",
+        "path": "/mizdb_tomselect/ws/",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 12345),
+    }
+    if count is None:
+        count = len(messages)
+
+    async def inner():
+        queue = asyncio.Queue()
+        sent = []
+        done = asyncio.Event()
+
+        async def send(event):
+            sent.append(event)
+            replies = [e for e in sent if e["type"] == "websocket.send"]
+            if event["type"] == "websocket.close" or len(replies) == count:
+                done.set()
+
+        await queue.put({"type": "websocket.connect"})
+        for message in messages:
+            text = message if isinstance(message, str) else json.dumps(message)
+            await queue.put({"type": "websocket.receive", "text": text})
+        app = application or AutocompleteSocket()
+        task = asyncio.ensure_future(app(scope, queue.get, send))
+        await asyncio.wait_for(done.wait(), timeout=5)
+        await queue.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(task, timeout=5)
+        return sent
+
+    return async_to_sync(inner)()
+
+
+def replies(events):
+    return [json.loads(event["text"]) for event in events if event["type"] == "websocket.send"]
+
+
+def test_get_meta():
+    scope = {
+        "headers": [(b"host", b"example.com"), (b"x-forwarded-for", b"a"), (b"x-forwarded-for", b"b")],
+        "server": ("example.com", 443),
+        "client": ("10.0.0.1", 1234),
+    }
+    meta = get_meta(scope)
+    assert meta["HTTP_HOST"] == "example.com"
+    assert meta["HTTP_X_FORWARDED_FOR"] == "a,b"
+    assert meta["SERVER_PORT"] == "443"
+    assert meta["REMOTE_ADDR"] == "10.0.0.1"
+
+
+@pytest.mark.parametrize(
+    "origin, expected",
+    [(None, True), ("https://example.com", True), ("https://evil.com", False), ("https://example.com:8000", False)],
+)
+def test_is_same_origin(origin, expected):
+    meta = {"HTTP_HOST": "example.com"}
+    if origin:
+        meta["HTTP_ORIGIN"] = origin
+    assert is_same_origin(meta) is expected
+
+
+def test_format_response():
+    assert json.loads(format_response(3, 200, '{"results": []}')) == {"id": 3, "status": 200, "body": {"results": []}}
+    assert json.loads(format_response(None, 400)) == {"id": None, "status": 400, "body": None}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.urls(__name__)
+class TestAutocompleteSocket:
+    def test_search(self, new_york_people):
+        person = new_york_people[0]
+        events = communicate({"id": 1, "key": "id_person", "url": get_url(q=person.first_name)})
+        assert events[0] == {"type": "websocket.accept"}
+        (reply,) = replies(events)
+        assert reply["id"] == 1
+        assert reply["status"] == 200
+        assert {"id": person.pk, "first_name": person.first_name} in reply["body"]["results"]
+        assert reply["body"]["page"] == 1
+
+    def test_superseded_request_is_cancelled(self, new_york_people):
+        """Assert that a new request for the same key cancels the previous one."""
+        events = communicate(
+            {"id": 1, "key": "id_person", "url": get_url(q="a")},
+            {"id": 2, "key": "id_person", "url": get_url(q="ab")},
+            {"id": 3, "key": "id_other", "url": get_url(q="a")},
+            count=2,
+        )
+        assert sorted(reply["id"] for reply in replies(events)) == [2, 3]
+
+    def test_concurrent_requests(self, monkeypatch):
+        """Assert that the requests of a connection are handled at the same time."""
+        # Both requests must be running to pass the barrier.
+        barrier = threading.Barrier(2, timeout=2)
+
+        def handle(meta, url):
+            barrier.wait()
+            return 200, "{}"
+
+        monkeypatch.setattr(streaming, "handle", handle)
+        events = communicate({"id": 1, "key": "a", "url": get_url()}, {"id": 2, "key": "b", "url": get_url()})
+        assert sorted((reply["id"], reply["status"]) for reply in replies(events)) == [(1, 200), (2, 200)]
+
+    def test_superseded_running_request(self, monkeypatch):
+        """Assert that the response of a superseded request is dropped if its query already runs."""
+        first_running, superseded = threading.Event(), threading.Event()
+
+        def handle(meta, url):
+            if "first" in url:
+                first_running.set()
+                superseded.wait(2)
+            return 200, "{}"
+
+        monkeypatch.setattr(streaming, "handle", handle)
+
+        def message(request_id, url):
+            return {"type": "websocket.receive", "text": json.dumps({"id": request_id, "key": "k", "url": url})}
+
+        async def inner():
+            queue = asyncio.Queue()
+            sent = []
+
+            async def send(event):
+                sent.append(event)
+
+            scope = {"type": "websocket", "path": "/mizdb_tomselect/ws/", "headers": []}
+            task = asyncio.ensure_future(AutocompleteSocket()(scope, queue.get, send))
+            await queue.put({"type": "websocket.connect"})
+            await queue.put(message(1, "first"))
+            await asyncio.get_running_loop().run_in_executor(None, first_running.wait, 2)
+            await queue.put(message(2, "second"))
+            while not replies(sent):
+                await asyncio.sleep(0.01)
+            superseded.set()
+            # Give the first request the chance to reply.
+            await asyncio.sleep(0.1)
+            await queue.put({"type": "websocket.disconnect", "code": 1000})
+            await asyncio.wait_for(task, timeout=5)
+            return sent
+
+        assert [reply["id"] for reply in replies(async_to_sync(inner)())] == [2]
+
+    def test_user_from_session(self, client, perms_user):
+        """Assert that requests are made as the user of the session."""
+        client.force_login(perms_user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        events = communicate({"id": 1, "key": "k", "url": get_url()}, headers=[("cookie", cookie)])
+        assert replies(events)[0]["body"]["show_create_option"] is True
+
+    def test_user_logged_out(self, client, perms_user):
+        """Assert that the session is checked for every request, not just when the WebSocket is opened."""
+        client.force_login(perms_user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+        async def inner():
+            queue = asyncio.Queue()
+            sent = []
+
+            async def send(event):
+                sent.append(event)
+
+            async def request(request_id):
+                text = json.dumps({"id": request_id, "key": "k", "url": get_url()})
+                await queue.put({"type": "websocket.receive", "text": text})
+                while len(replies(sent)) < request_id:
+                    await asyncio.sleep(0.01)
+                return replies(sent)[-1]
+
+            scope = {"type": "websocket", "path": "/mizdb_tomselect/ws/", "headers": [(b"cookie", cookie.encode())]}
+            task = asyncio.ensure_future(AutocompleteSocket()(scope, queue.get, send))
+            await queue.put({"type": "websocket.connect"})
+            before = await request(1)
+            await sync_to_async(client.logout)()
+            after = await request(2)
+            await queue.put({"type": "websocket.disconnect", "code": 1000})
+            await asyncio.wait_for(task, timeout=5)
+            return before, after
+
+        before, after = async_to_sync(inner)()
+        assert before["body"]["show_create_option"] is True
+        assert after["body"]["show_create_option"] is False
+
+    def test_bounded_workers(self, monkeypatch, settings):
+        """Assert that the requests of all connections share a limited number of worker threads."""
+        settings.MIZDB_TOMSELECT_STREAMING_WORKERS = 2
+        monkeypatch.setattr(streaming, "_executor", None)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def handle(meta, url):
+            with lock:
+                running.append(url)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(url)
+            return 200, "{}"
+
+        monkeypatch.setattr(streaming, "handle", handle)
+        try:
+            events = communicate(*({"id": i, "key": str(i), "url": f"/autocomplete/?{i}"} for i in range(6)))
+        finally:
+            streaming.get_executor().shutdown()
+        assert len(replies(events)) == 6
+        assert max(peak) == 2
+
+    def test_anonymous_user(self):
+        events = communicate({"id": 1, "key": "k", "url": get_url()})
+        assert replies(events)[0]["body"]["show_create_option"] is False
+
+    def test_cross_origin_rejected(self):
+        events = communicate(headers=[("host", "testserver"), ("origin", "https://evil.com")], count=1)
+        assert events == [{"type": "websocket.close", "code": 4003}]
+
+    @pytest.mark.parametrize("url", ["/other/", "/nothing/"])
+    def test_not_an_autocomplete_view(self, url):
+        events = communicate({"id": 1, "key": "k", "url": url})
+        assert replies(events) == [{"id": 1, "status": 404, "body": None}]
+
+    def test_throttled(self, settings):
+        """Assert that throttled requests report when to retry."""
+        settings.MIZDB_TOMSELECT_THROTTLE_RATE = 0.5
+        settings.MIZDB_TOMSELECT_THROTTLE_BURST = 1
+        get_cache().clear()
+        try:
+            events = communicate(
+                {"id": 1, "key": "a", "url": get_url()}, {"id": 2, "key": "b", "url": get_url()}, count=2
+            )
+        finally:
+            get_cache().clear()
+        assert sorted((reply["id"], reply["status"]) for reply in replies(events)) == [(1, 200), (2, 429)]
+        assert [reply["body"] for reply in replies(events) if reply["id"] == 2] == [{"retry_after": 2}]
+
+    @pytest.mark.parametrize("message", ["foo", {"id": 1}, "x" * 5000])
+    def test_bad_message(self, message):
+        events = communicate(message)
+        assert replies(events) == [{"id": None, "status": 400, "body": None}]
+
+    def test_websocket_application(self):
+        """Assert that the router passes the socket path to the socket."""
+
+        async def application(scope, receive, send):  # pragma: no cover
+            raise AssertionError("WebSocket was routed to the application.")
+
+        events = communicate({"id": 1, "key": "k", "url": get_url()}, application=websocket_application(application))
+        assert replies(events)[0]["status"] == 200
+
+    def test_websocket_application_other_scopes(self):
+        """Assert that other requests are passed to the wrapped application."""
+        calls = []
+
+        async def application(scope, receive, send):
+            calls.append(scope)
+
+        router = websocket_application(application)
+        async_to_sync(router)({"type": "http", "path": "/mizdb_tomselect/ws/"}, None, None)
+        async_to_sync(router)({"type": "websocket", "path": "/other/"}, None, None)
+        assert len(calls) == 2
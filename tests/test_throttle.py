@@ -0,0 +1,97 @@
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.urls import path, reverse
+
+from mizdb_tomselect.throttle import get_client_id, take_token
+from mizdb_tomselect.versions import get_cache
+from mizdb_tomselect.views import SEARCH_LOOKUP_VAR, SEARCH_VAR, VALUES_VAR, AutocompleteView
+from tests.testapp.models import City, Person
+
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+@pytest.fixture
+def now():
+    """Freeze the time used by the throttle; advance it by setting `now.value`."""
+    clock = Mock(value=1000.0)
+    with patch("mizdb_tomselect.throttle.time.time", new=lambda: clock.value):
+        yield clock
+
+
+def test_take_token_burst(now):
+    """Assert that a client can make `burst` requests at once."""
+    assert [take_token("client", Person, rate=1, burst=3) for _ in range(3)] == [None, None, None]
+    assert take_token("client", Person, rate=1, burst=3) == pytest.approx(1)
+
+
+def test_take_token_refill(now):
+    for _ in range(2):
+        take_token("client", Person, rate=2, burst=2)
+    assert take_token("client", Person, rate=2, burst=2) == pytest.approx(0.5)
+    now.value += 0.5
+    assert take_token("client", Person, rate=2, burst=2) is None
+    assert take_token("client", Person, rate=2, burst=2) is not None
+
+
+def test_take_token_per_client_and_model(now):
+    take_token("client", Person, rate=1, burst=1)
+    assert take_token("client", Person, rate=1, burst=1) is not None
+    assert take_token("other", Person, rate=1, burst=1) is None
+    assert take_token("client", City, rate=1, burst=1) is None
+
+
+@pytest.mark.django_db
+def test_get_client_id(rf, noperms_user):
+    request = rf.get("/", REMOTE_ADDR="10.0.0.1")
+    assert get_client_id(request) == "ip:10.0.0.1"
+    request.user = AnonymousUser()
+    request.session = Mock(session_key="abc")
+    assert get_client_id(request) == "session:abc"
+    request.user = noperms_user
+    assert get_client_id(request) == f"user:{noperms_user.pk}"
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestThrottledView:
+    @pytest.fixture
+    def get_response(self, client):
+        data = {
+            "model": "testapp.person",
+            SEARCH_VAR: "a",
+            SEARCH_LOOKUP_VAR: "full_name__icontains",
+            VALUES_VAR: json.dumps(["id", "full_name"]),
+        }
+        return lambda: client.get(reverse("autocomplete"), data=data)
+
+    def test_throttled(self, settings, get_response, now):
+        settings.MIZDB_TOMSELECT_THROTTLE_RATE = 0.5
+        settings.MIZDB_TOMSELECT_THROTTLE_BURST = 2
+        assert [get_response().status_code for _ in range(2)] == [200, 200]
+        response = get_response()
+        assert response.status_code == 429
+        assert response["Retry-After"] == "2"
+        now.value += 2
+        assert get_response().status_code == 200
+
+    def test_not_throttled_by_default(self, get_response):
+        assert all(get_response().status_code == 200 for _ in range(30))
+
+    def test_throttled_request_is_not_run(self, settings, get_response, django_assert_num_queries, now):
+        settings.MIZDB_TOMSELECT_THROTTLE_RATE = 1
+        settings.MIZDB_TOMSELECT_THROTTLE_BURST = 1
+        get_response()
+        with django_assert_num_queries(0):
+            assert get_response().status_code == 429
@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+
+from mizdb_tomselect.timing import NULL_TIMER, PhaseTimer
+
+
+class TestPhaseTimer:
+    def test_phase(self):
+        """Assert that phase records the duration of the enclosed block."""
+        timer = PhaseTimer()
+        with timer.phase("foo"):
+            pass
+        assert "foo" in timer.phases
+        assert timer.phases["foo"] >= 0
+
+    def test_phase_accumulates(self):
+        """Assert that the durations of a phase entered multiple times are added up."""
+        timer = PhaseTimer()
+        with timer.phase("foo"):
+            pass
+        first = timer.phases["foo"]
+        with timer.phase("foo"):
+            pass
+        assert timer.phases["foo"] >= first
+
+    @pytest.mark.django_db
+    def test_count_queries(self):
+        """Assert that count_queries counts the queries made in the enclosed block."""
+        timer = PhaseTimer()
+        with timer.count_queries():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.execute("SELECT 2")
+        assert timer.queries == 2
+
+    def test_header(self):
+        """Assert that header returns the phases and the query count in Server-Timing format."""
+        timer = PhaseTimer()
+        timer.phases = {"foo": 1.234, "bar": 2}
+        timer.queries = 3
+        assert timer.header() == 'foo;dur=1.23, bar;dur=2.00, queries;desc="3"'
+
+    def test_add_header(self):
+        """Assert that add_header sets the Server-Timing header of the response."""
+        response = HttpResponse()
+        PhaseTimer().add_header(response)
+        assert "Server-Timing" in response
+
+
+class TestNullTimer:
+    def test_records_nothing(self):
+        """Assert that the null timer does not record phases or add a header."""
+        with NULL_TIMER.phase("foo"), NULL_TIMER.count_queries():
+            pass
+        assert not NULL_TIMER.phases
+        response = HttpResponse()
+        NULL_TIMER.add_header(response)
+        assert "Server-Timing" not in response
@@ -0,0 +1,71 @@
+import pytest
+
+from mizdb_tomselect.versions import bump_version, get_version, is_tracked
+from tests.testapp.models import City, Person
+
+
+@pytest.fixture(autouse=True)
+def tracked_models(settings):
+    settings.MIZDB_TOMSELECT_TRACKED_MODELS = ["testapp.Person"]
+
+
+def test_is_tracked():
+    assert is_tracked(Person)
+    assert not is_tracked(City)
+
+
+def test_get_version():
+    assert get_version(Person) == get_version(Person)
+    assert get_version(Person) != get_version(City)
+
+
+def test_bump_version():
+    version = get_version(Person)
+    bump_version(Person)
+    assert get_version(Person) != version
+
+
+@pytest.mark.django_db
+def test_save_bumps_tracked_model(random_person):
+    """Assert that saving or deleting an object changes the version of a tracked model."""
+    version = get_version(Person)
+    random_person.save()
+    assert get_version(Person) != version
+    version = get_version(Person)
+    random_person.delete()
+    assert get_version(Person) != version
+
+
+@pytest.mark.django_db
+def test_save_ignores_untracked_model(random_city):
+    version = get_version(City)
+    random_city.save()
+    assert get_version(City) == version
+
+
+@pytest.mark.django_db
+def test_save_bumps_all_models(settings, random_city):
+    """Assert that the versions of all models are bumped if the version header is enabled."""
+    settings.MIZDB_TOMSELECT_VERSION_HEADER = True
+    version = get_version(City)
+    random_city.save()
+    assert get_version(City) != version
+
+
+@pytest.mark.django_db
+def test_save_version_events_untracked_model(settings, random_city):
+    """Assert that enabling the version events does not version untracked models."""
+    settings.MIZDB_TOMSELECT_VERSION_EVENTS = True
+    version = get_version(City)
+    random_city.save()
+    assert get_version(City) == version
+
+
+def test_get_version_dummy_cache(settings):
+    """Assert that get_version returns a version even if the cache does not store anything."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "dummy": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    }
+    settings.MIZDB_TOMSELECT_CACHE = "dummy"
+    assert get_version(Person)
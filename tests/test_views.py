@@ -1,4 +1,5 @@
 import json
+from contextlib import ExitStack, contextmanager
 from unittest.mock import Mock, patch
 from urllib.parse import urlencode
 
@@ -19,9 +20,18 @@ from django.urls import path, reverse
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.generic import CreateView, UpdateView
 
+from mizdb_tomselect.budget import BudgetExceeded
+from mizdb_tomselect.lookups import sign_config
+from mizdb_tomselect.signals import autocomplete_request_finished, autocomplete_request_started
+from mizdb_tomselect.versions import get_version
 from mizdb_tomselect.views import (
+    CONFIG_VAR,
     FILTERBY_VAR,
     IS_POPUP_VAR,
+    LOAD_ALL_VAR,
+    MIN_QUERY_LENGTH_VAR,
+    MODEL_VERSION_HEADER,
+    PAGE_SIZE,
     PAGE_VAR,
     SEARCH_LOOKUP_VAR,
     SEARCH_VAR,
@@ -54,6 +64,11 @@ class PersonUpdateView(PopupResponseMixin, UpdateView):
 
 urlpatterns = [
     path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path(
+        "autocomplete_regex/",
+        AutocompleteView.as_view(allowed_lookups=["first_name__iregex"]),
+        name="autocomplete_regex",
+    ),
     path("csrf/", csrf_cookie_view, name="csrf"),
     path("add/", PersonCreateView.as_view(), name="add_person"),
     path("edit/<path:pk>", PersonUpdateView.as_view(), name="edit_person"),
@@ -450,6 +465,567 @@ class TestAutocompleteViewUnitTests:
                     assert isinstance(response, HttpResponseServerError)
 
 
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestServerTiming:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.url = reverse("autocomplete")
+        self.model_label = f"{Person._meta.app_label}.{Person._meta.model_name}"
+
+    @pytest.fixture
+    def server_timing(self, settings):
+        settings.MIZDB_TOMSELECT_SERVER_TIMING = True
+
+    @pytest.fixture
+    def get_response(self, admin_client):
+        return admin_client.get(self.url, data={"model": self.model_label, SEARCH_LOOKUP_VAR: "full_name__icontains"})
+
+    @pytest.fixture
+    def post_response(self, admin_client):
+        request_data = {"model": self.model_label, "full_name": "Bob Testman", "create-field": "full_name"}
+        return admin_client.post(self.url, data=request_data)
+
+    @pytest.mark.usefixtures("server_timing")
+    def test_get_header(self, get_response):
+        """Assert that GET responses include the Server-Timing header with the phases of the request."""
+        header = get_response["Server-Timing"]
+        for phase in ("setup", "get_queryset", "paginate", "get_result_values", "has_add_permission", "serialize"):
+            assert f"{phase};dur=" in header
+        assert 'queries;desc="' in header
+
+    @pytest.mark.usefixtures("server_timing")
+    def test_get_header_query_count(self, get_response):
+        """Assert that the Server-Timing header includes the number of queries."""
+        assert 'queries;desc="0"' not in get_response["Server-Timing"]
+
+    @pytest.mark.usefixtures("server_timing")
+    def test_post_header(self, post_response):
+        """Assert that POST responses include the Server-Timing header with the phases of the request."""
+        header = post_response["Server-Timing"]
+        for phase in ("setup", "has_add_permission", "create_object", "serialize"):
+            assert f"{phase};dur=" in header
+
+    def test_no_header_when_disabled(self, get_response):
+        """Assert that no Server-Timing header is added if the setting is not enabled."""
+        assert "Server-Timing" not in get_response
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestSignals:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.url = reverse("autocomplete")
+        self.model_label = f"{Person._meta.app_label}.{Person._meta.model_name}"
+
+    @pytest.fixture
+    def receiver(self):
+        """Connect a mock receiver to both lifecycle signals."""
+        receiver = Mock()
+        autocomplete_request_started.connect(receiver, dispatch_uid="test_started")
+        autocomplete_request_finished.connect(receiver, dispatch_uid="test_finished")
+        yield receiver
+        autocomplete_request_started.disconnect(dispatch_uid="test_started")
+        autocomplete_request_finished.disconnect(dispatch_uid="test_finished")
+
+    @pytest.fixture
+    def get_response(self, admin_client, receiver, test_data):
+        request_data = {
+            "model": self.model_label,
+            SEARCH_VAR: "Alice",
+            SEARCH_LOOKUP_VAR: "full_name__icontains",
+            FILTERBY_VAR: "first_name=Alice",
+            PAGE_VAR: "2",
+        }
+        return admin_client.get(self.url, data=request_data)
+
+    def test_started(self, get_response, receiver):
+        """Assert that the started signal is sent with the request data."""
+        kwargs = receiver.call_args_list[0].kwargs
+        assert kwargs["signal"] == autocomplete_request_started
+        assert kwargs["sender"] == AutocompleteView
+        assert kwargs["model"] == "testapp.person"
+        assert kwargs["method"] == "GET"
+        assert kwargs["query_length"] == len("Alice")
+        assert kwargs["filtered"]
+        assert kwargs["page"] == 2
+
+    def test_finished(self, get_response, receiver):
+        """Assert that the finished signal is sent with the result data."""
+        kwargs = receiver.call_args_list[1].kwargs
+        assert kwargs["signal"] == autocomplete_request_finished
+        assert kwargs["response"] == get_response
+        assert kwargs["status_code"] == 200
+        assert kwargs["row_count"] == PAGE_SIZE
+        assert "get_result_values" in kwargs["phases"]
+        assert kwargs["queries"] > 0
+        assert kwargs["cache"] is None
+
+    def test_finished_exception(self, admin_client, receiver, test_data):
+        """Assert that the finished signal is sent if the view raises an exception."""
+        response = admin_client.get(self.url, data={"model": self.model_label, PAGE_VAR: "99"})
+        assert response.status_code == 404
+        kwargs = receiver.call_args_list[1].kwargs
+        assert kwargs["signal"] == autocomplete_request_finished
+        assert kwargs["response"] is None
+        assert kwargs["status_code"] == 404
+
+    def test_finished_post(self, admin_client, receiver):
+        """Assert that the finished signal is sent for POST requests."""
+        request_data = {"model": self.model_label, "full_name": "Bob Testman", "create-field": "full_name"}
+        admin_client.post(self.url, data=request_data)
+        kwargs = receiver.call_args_list[1].kwargs
+        assert kwargs["method"] == "POST"
+        assert kwargs["page"] is None
+        assert kwargs["row_count"] == 1
+        assert "create_object" in kwargs["phases"]
+
+    def test_no_header_with_receivers(self, get_response):
+        """
+        Assert that the Server-Timing header is not added just because there
+        are receivers for the finished signal.
+        """
+        assert "Server-Timing" not in get_response
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestLoadAll:
+    @pytest.fixture(autouse=True)
+    def tracked_models(self, settings):
+        settings.MIZDB_TOMSELECT_TRACKED_MODELS = ["testapp.person"]
+
+    @pytest.fixture
+    def request_data(self):
+        return {
+            "model": "testapp.person",
+            LOAD_ALL_VAR: "1",
+            SEARCH_LOOKUP_VAR: "full_name__icontains",
+            VALUES_VAR: json.dumps(["id", "full_name"]),
+        }
+
+    @pytest.fixture
+    def get_response(self, client, test_data, request_data):
+        def inner(etag=None):
+            headers = {"If-None-Match": etag} if etag else {}
+            return client.get(reverse("autocomplete"), data=request_data, headers=headers)
+
+        return inner
+
+    def test_returns_all_results(self, get_response, test_data):
+        response = get_response()
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["results"]) == len(test_data)
+        assert not data["has_more"]
+        assert data["version"] == get_version(Person)
+        assert response[MODEL_VERSION_HEADER] == data["version"]
+        assert response["Cache-Control"] == "private, no-cache"
+        assert response["ETag"].startswith(f'"{data["version"]}-')
+
+    def test_not_modified(self, get_response, django_assert_num_queries):
+        """Assert that a matching ETag is answered with a 304 without querying the results."""
+        etag = get_response()["ETag"]
+        with django_assert_num_queries(0):
+            response = get_response(etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+    def test_modified_after_save(self, get_response, test_data):
+        """Assert that saving an object changes the ETag."""
+        etag = get_response()["ETag"]
+        test_data[0].save()
+        response = get_response(etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_etag_depends_on_parameters(self, client, get_response, request_data, test_data):
+        etag = get_response()["ETag"]
+        request_data[FILTERBY_VAR] = f"city_id={test_data[0].city_id}"
+        response = client.get(reverse("autocomplete"), data=request_data, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_untracked_model(self, settings, get_response, test_data):
+        """Assert that the results of a model without a tracked version are not stored."""
+        settings.MIZDB_TOMSELECT_TRACKED_MODELS = []
+        response = get_response()
+        assert len(response.json()["results"]) == len(test_data)
+        assert response.json()["version"] is None
+        assert response["Cache-Control"] == "no-store"
+        assert "ETag" not in response
+        assert MODEL_VERSION_HEADER not in response
+
+    def test_limit(self, settings, get_response):
+        settings.MIZDB_TOMSELECT_LOAD_ALL_LIMIT = 10
+        data = get_response().json()
+        assert len(data["results"]) == 10
+        assert data["has_more"]
+
+    def test_cache_status(self, get_response):
+        """Assert that the cache status of the request is reported to the finished signal."""
+        receiver = Mock()
+        autocomplete_request_finished.connect(receiver, dispatch_uid="test_load_all")
+        try:
+            etag = get_response()["ETag"]
+            get_response(etag)
+        finally:
+            autocomplete_request_finished.disconnect(dispatch_uid="test_load_all")
+        assert [call.kwargs["cache"] for call in receiver.call_args_list] == ["miss", "hit"]
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestVersionHeader:
+    @pytest.fixture
+    def get_response(self, client, random_person):
+        return lambda: client.get(reverse("autocomplete"), data={"model": "testapp.person"})
+
+    def test_version_header(self, settings, get_response):
+        settings.MIZDB_TOMSELECT_VERSION_HEADER = True
+        assert get_response()[MODEL_VERSION_HEADER] == get_version(Person)
+
+    def test_version_header_changes(self, settings, get_response, random_person):
+        settings.MIZDB_TOMSELECT_VERSION_HEADER = True
+        version = get_response()[MODEL_VERSION_HEADER]
+        random_person.save()
+        assert get_response()[MODEL_VERSION_HEADER] != version
+
+    def test_no_version_header(self, get_response):
+        assert MODEL_VERSION_HEADER not in get_response()
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestMinQueryLength:
+    @pytest.fixture(autouse=True)
+    def tracked_models(self, settings):
+        settings.MIZDB_TOMSELECT_TRACKED_MODELS = ["testapp.person"]
+
+    @pytest.fixture
+    def get_response(self, client, test_data):
+        def inner(q, **params):
+            data = {
+                "model": "testapp.person",
+                SEARCH_VAR: q,
+                SEARCH_LOOKUP_VAR: "full_name__icontains",
+                VALUES_VAR: json.dumps(["id", "full_name"]),
+                **params,
+            }
+            return client.get(reverse("autocomplete"), data=data)
+
+        return inner
+
+    @pytest.fixture
+    def first_page(self, client):
+        """Return the results for an empty search term."""
+        data = {"model": "testapp.person", VALUES_VAR: json.dumps(["id", "full_name"])}
+        return client.get(reverse("autocomplete"), data=data).json()["results"]
+
+    @pytest.fixture
+    def finished(self):
+        receiver = Mock()
+        autocomplete_request_finished.connect(receiver, dispatch_uid="test_min_query_length")
+        yield receiver
+        autocomplete_request_finished.disconnect(dispatch_uid="test_min_query_length")
+
+    def test_short_query_returns_first_page(self, get_response, first_page):
+        """Assert that a short search term is answered with the results for an empty search term."""
+        data = get_response("#", **{MIN_QUERY_LENGTH_VAR: "3"}).json()
+        assert data["results"] == first_page
+        assert data["page"] == 1
+        assert not data["has_more"]
+
+    def test_short_query_cached(self, get_response, django_assert_num_queries, finished):
+        get_response("#", **{MIN_QUERY_LENGTH_VAR: "3"})
+        with django_assert_num_queries(0):
+            get_response("%", **{MIN_QUERY_LENGTH_VAR: "3"})
+        assert [call.kwargs["cache"] for call in finished.call_args_list] == ["miss", "hit"]
+        # The length of the actual search term is reported:
+        assert finished.call_args.kwargs["query_length"] == 1
+
+    def test_short_query_untracked_model(self, settings, get_response, django_assert_num_queries, finished):
+        """Assert that the results are not cached if the version of the model is not tracked."""
+        settings.MIZDB_TOMSELECT_TRACKED_MODELS = []
+        get_response("#", **{MIN_QUERY_LENGTH_VAR: "3"})
+        with django_assert_num_queries(1):
+            get_response("%", **{MIN_QUERY_LENGTH_VAR: "3"})
+        assert [call.kwargs["cache"] for call in finished.call_args_list] == [None, None]
+
+    def test_short_query_cache_invalidated(self, get_response, test_data):
+        get_response("#", **{MIN_QUERY_LENGTH_VAR: "3"})
+        test_data[0].delete()
+        results = get_response("#", **{MIN_QUERY_LENGTH_VAR: "3"}).json()["results"]
+        assert test_data[0].pk not in [result["id"] for result in results]
+
+    def test_long_enough_query_is_searched(self, get_response):
+        data = get_response("#%&", **{MIN_QUERY_LENGTH_VAR: "3"}).json()
+        assert data["results"] == []
+
+    def test_setting(self, settings, get_response, first_page):
+        """Assert that the setting enforces a minimum length that requests cannot lower."""
+        settings.MIZDB_TOMSELECT_MIN_QUERY_LENGTH = 3
+        assert get_response("#").json()["results"] == first_page
+        assert get_response("#", **{MIN_QUERY_LENGTH_VAR: "0"}).json()["results"] == first_page
+
+    def test_no_minimum(self, get_response):
+        assert get_response("#").json()["results"] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestCheckRequest:
+    @pytest.fixture
+    def config(self):
+        return {
+            "model": "testapp.person",
+            "sl": "full_name__icontains",
+            "f": "city_id",
+            "vs": ["id", "full_name"],
+            "cf": "full_name",
+            "mq": 0,
+            "x": False,
+        }
+
+    @pytest.fixture
+    def get_response(self, client, random_person):
+        def inner(config=None, url="autocomplete", **params):
+            data = {
+                "model": "testapp.person",
+                SEARCH_VAR: "a",
+                SEARCH_LOOKUP_VAR: "full_name__icontains",
+                VALUES_VAR: json.dumps(["id", "full_name"]),
+                **params,
+            }
+            if config is not None:
+                data[CONFIG_VAR] = sign_config(config)
+            return client.get(reverse(url), data=data)
+
+        return inner
+
+    def test_declared(self, get_response, config, random_person):
+        response = get_response(config, **{FILTERBY_VAR: f"city_id={random_person.city_id}"})
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"model": "testapp.city", SEARCH_LOOKUP_VAR: "name__icontains", VALUES_VAR: '["id"]'},
+            {SEARCH_LOOKUP_VAR: "first_name__icontains"},
+            {FILTERBY_VAR: "city__name=foo"},
+            {VALUES_VAR: json.dumps(["id", "full_name", "dob"])},
+        ],
+    )
+    def test_not_declared(self, get_response, config, params):
+        """Assert that lookups and values that the widget did not declare are rejected."""
+        assert get_response(config, **params).status_code == 400
+
+    def test_declared_values_subset(self, get_response, config):
+        assert get_response(config, **{VALUES_VAR: json.dumps(["id"])}).status_code == 200
+
+    def test_invalid_signature(self, get_response):
+        response = get_response(**{CONFIG_VAR: sign_config({"model": "testapp.person"})[:-2]})
+        assert response.status_code == 400
+
+    def test_config_required(self, settings, get_response, config):
+        settings.MIZDB_TOMSELECT_REQUIRE_CONFIG = True
+        assert get_response().status_code == 400
+        assert get_response(config).status_code == 200
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {SEARCH_LOOKUP_VAR: "first_name__iregex"},
+            {SEARCH_LOOKUP_VAR: "city__person__first_name__icontains"},
+            {FILTERBY_VAR: "city__person__city__name=foo"},
+            {VALUES_VAR: json.dumps(["id", "city__person__first_name"])},
+            {SEARCH_LOOKUP_VAR: "no_such_field__icontains"},
+            {SEARCH_LOOKUP_VAR: "city__persons__full_name__icontains"},
+        ],
+    )
+    def test_cost_policy(self, settings, get_response, params):
+        """Assert that lookups that break the cost policy are rejected."""
+        settings.MIZDB_TOMSELECT_MAX_JOINS = 1
+        assert get_response(**params).status_code == 400
+
+    def test_no_join_limit(self, get_response):
+        """Assert that lookups may traverse any number of relations unless MIZDB_TOMSELECT_MAX_JOINS is set."""
+        assert get_response(**{SEARCH_LOOKUP_VAR: "city__person__first_name__icontains"}).status_code == 200
+
+    @pytest.mark.parametrize("values", ["[[1]]", "[1]", '{"id": 1}', '"id"', "[", ""])
+    def test_invalid_values(self, get_response, values):
+        """Assert that values that are not a JSON list of strings are rejected."""
+        assert get_response(**{VALUES_VAR: values}).status_code == 400
+
+    def test_allowed_lookups(self, get_response):
+        """Assert that views can allow lookups that break the cost policy."""
+        params = {SEARCH_LOOKUP_VAR: "first_name__iregex"}
+        assert get_response(url="autocomplete_regex", **params).status_code == 200
+
+    def test_widget_opt_in(self, get_response, config):
+        """Assert that widgets can opt in to lookups that break the cost policy."""
+        config.update(sl="first_name__iregex", x=True)
+        assert get_response(config, **{SEARCH_LOOKUP_VAR: "first_name__iregex"}).status_code == 200
+        config["x"] = False
+        assert get_response(config, **{SEARCH_LOOKUP_VAR: "first_name__iregex"}).status_code == 400
+
+    def test_min_query_length(self, settings, get_response, config):
+        """Assert that the request cannot lower the minimum query length of the widget."""
+        settings.MIZDB_TOMSELECT_TRACKED_MODELS = ["testapp.person"]
+        config["mq"] = 3
+        receiver = Mock()
+        autocomplete_request_finished.connect(receiver, dispatch_uid="test_check_request")
+        try:
+            get_response(config, **{MIN_QUERY_LENGTH_VAR: "0"})
+        finally:
+            autocomplete_request_finished.disconnect(dispatch_uid="test_check_request")
+        assert receiver.call_args.kwargs["cache"] == "miss"
+
+    def test_create_field(self, client, perms_user, config):
+        client.force_login(perms_user)
+        data = {"model": "testapp.person", CONFIG_VAR: sign_config(config)}
+        undeclared = {**data, "create-field": "first_name", "first_name": "Bob"}
+        assert client.post(reverse("autocomplete"), data=undeclared).status_code == 400
+        declared = {**data, "create-field": "full_name", "full_name": "Bob"}
+        assert client.post(reverse("autocomplete"), data=declared).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestTimeBudget:
+    @pytest.fixture
+    def people(self):
+        return [Person.objects.create(full_name=name) for name in ["Alice Smith", "Malice Jones", "Bob Alison"]]
+
+    @pytest.fixture
+    def get_response(self, client, people):
+        def inner(q="ali", **params):
+            data = {
+                "model": "testapp.person",
+                SEARCH_VAR: q,
+                SEARCH_LOOKUP_VAR: "full_name__icontains",
+                VALUES_VAR: json.dumps(["id", "full_name"]),
+                **params,
+            }
+            return client.get(reverse("autocomplete"), data=data)
+
+        return inner
+
+    @pytest.fixture
+    def time_limits(self):
+        """The time limits of the blocks made by `exceeded`."""
+        return []
+
+    @pytest.fixture
+    def exceeded(self, time_limits):
+        """Make the given number of time-limited searches exceed the budget."""
+
+        def inner(count):
+            clock = [0.0]
+
+            @contextmanager
+            def fake_time_limit(connection, seconds):
+                time_limits.append(seconds)
+                yield
+                if len(time_limits) <= count:
+                    # The queries of the block were aborted after the limit.
+                    clock[0] += seconds
+                    raise BudgetExceeded
+
+            stack = ExitStack()
+            stack.enter_context(patch("mizdb_tomselect.views.time_limit", new=fake_time_limit))
+            stack.enter_context(patch("mizdb_tomselect.views.time", new=Mock(monotonic=lambda: clock[0])))
+            return stack
+
+        return inner
+
+    @pytest.fixture(autouse=True)
+    def time_budget(self, settings):
+        settings.MIZDB_TOMSELECT_TIME_BUDGET = 0.5
+
+    def get_names(self, response):
+        return sorted(result["full_name"] for result in response.json()["results"])
+
+    def test_within_budget(self, get_response):
+        response = get_response()
+        assert self.get_names(response) == ["Alice Smith", "Bob Alison", "Malice Jones"]
+        assert "partial" not in response.json()
+
+    def test_prefix_fallback(self, get_response, exceeded):
+        """Assert that only prefixes are matched if the search exceeds the budget."""
+        with exceeded(1):
+            response = get_response()
+        data = response.json()
+        assert self.get_names(response) == ["Alice Smith"]
+        assert data["partial"] is True
+        assert data["page"] == 1
+        assert not data["has_more"]
+
+    def test_scan_fallback(self, settings, get_response, exceeded, people):
+        """Assert that only the first rows are searched if matching prefixes exceeds the budget."""
+        settings.MIZDB_TOMSELECT_SCAN_LIMIT = 2
+        with exceeded(2):
+            response = get_response()
+        expected = sorted(p.full_name for p in Person.objects.order_by("pk")[:2] if "ali" in p.full_name.lower())
+        assert self.get_names(response) == expected
+        assert response.json()["partial"] is True
+
+    def test_no_prefix_fallback_for_other_lookups(self, get_response, exceeded):
+        """Assert that the scan is the only fallback if the search lookup is not 'icontains'."""
+        with exceeded(1):
+            response = get_response(q="Alice Smith", sl="full_name__iexact")
+        assert self.get_names(response) == ["Alice Smith"]
+
+    def test_all_fallbacks_exceed(self, get_response, exceeded):
+        with exceeded(3):
+            response = get_response()
+        assert response.json()["results"] == []
+        assert response.json()["partial"] is True
+
+    def test_fallbacks_share_budget(self, get_response, exceeded, time_limits):
+        """Assert that the search and its fallbacks together stay within the budget."""
+        with exceeded(3):
+            get_response()
+        # The search, the prefix and the scan fallback.
+        assert time_limits[:3] == [0.25, 0.125, 0.0625]
+        assert sum(time_limits) <= 0.5
+
+    def test_budget_used_up(self, get_response, exceeded, time_limits):
+        """Assert that no fallback is tried once the budget is used up."""
+        with exceeded(1), patch("mizdb_tomselect.views.time", new=Mock(monotonic=Mock(side_effect=[0, 0.5]))):
+            response = get_response()
+        assert time_limits == [0.25]
+        assert response.json()["results"] == []
+
+    def test_database_limit(self, settings, monkeypatch, get_response):
+        """Assert that the database aborts the queries that exceed the budget."""
+        monkeypatch.setattr("mizdb_tomselect.budget.SQLITE_PROGRESS_STEPS", 1)
+        settings.MIZDB_TOMSELECT_TIME_BUDGET = 0
+        data = get_response().json()
+        assert data["results"] == []
+        assert data["partial"] is True
+
+    @pytest.mark.parametrize("budget, q", [(None, "ali"), (0.5, "")])
+    def test_no_time_limit(self, settings, get_response, budget, q):
+        """Assert that the search is not limited without a budget or a search term."""
+        settings.MIZDB_TOMSELECT_TIME_BUDGET = budget
+        with patch("mizdb_tomselect.views.time_limit") as time_limit_mock:
+            response = get_response(q=q)
+        time_limit_mock.assert_not_called()
+        assert "partial" not in response.json()
+
+    def test_signal(self, get_response, exceeded):
+        """Assert that partial responses are reported to the finished signal."""
+        receiver = Mock()
+        autocomplete_request_finished.connect(receiver, dispatch_uid="test_time_budget")
+        try:
+            with exceeded(1):
+                get_response()
+        finally:
+            autocomplete_request_finished.disconnect(dispatch_uid="test_time_budget")
+        assert receiver.call_args.kwargs["partial"] is True
+
+
 @pytest.mark.django_db
 @pytest.mark.urls(__name__)
 class TestPopupResponseMixin:
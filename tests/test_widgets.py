@@ -1,3 +1,4 @@
+import copy
 from unittest.mock import Mock, patch
 
 import pytest
@@ -6,6 +7,7 @@ from django.db import models
 from django.forms.models import ModelChoiceIterator
 from django.urls import path
 
+from mizdb_tomselect.lookups import load_config, sign_config
 from mizdb_tomselect.widgets import MIZSelect, MIZSelectMultiple, MIZSelectTabular, MIZSelectTabularMultiple
 from tests.testapp.models import Person
 
@@ -135,6 +137,64 @@ class TestMIZSelect:
         assert attrs["data-add-url"] == "/test/add/"
         assert attrs["data-edit-url"] == "/test/edit/{pk}/"
 
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_build_attrs_prefetch(self, make_widget, prefetch):
+        """Assert that the 'prefetch' attribute is set according to the argument."""
+        widget = make_widget(model=Person, prefetch=prefetch)
+        assert widget.build_attrs({})["prefetch"] == prefetch
+
+    @pytest.mark.parametrize("load_all", [True, False])
+    def test_build_attrs_load_all(self, make_widget, load_all):
+        """Assert that the 'load-all' attribute is set according to the argument."""
+        widget = make_widget(model=Person, load_all=load_all)
+        assert widget.build_attrs({})["load-all"] == load_all
+
+    def test_build_attrs_min_query_length(self, make_widget):
+        widget = make_widget(model=Person, min_query_length=3)
+        assert widget.build_attrs({})["data-min-query-length"] == 3
+
+    def test_build_attrs_no_min_query_length(self, make_widget):
+        """Assert that the attribute is omitted if there is no minimum length."""
+        assert "data-min-query-length" not in make_widget(model=Person).build_attrs({})
+
+    def test_build_attrs_config(self, make_widget):
+        """Assert that the signed configuration of the widget is added."""
+        widget = make_widget(
+            model=Person,
+            label_field="full_name",
+            create_field="full_name",
+            filter_by=("city", "city_id"),
+            min_query_length=2,
+            allow_expensive_lookups=True,
+        )
+        assert load_config(widget.build_attrs({})["data-config"]) == {
+            "model": "testapp.person",
+            "sl": "full_name__icontains",
+            "f": "city_id",
+            "vs": ["id", "full_name"],
+            "cf": "full_name",
+            "mq": 2,
+            "x": True,
+        }
+
+    def test_signed_config_cached(self, make_widget):
+        """Assert that the configuration is signed once for a widget and its copies."""
+        widget = make_widget(model=Person)
+        with patch("mizdb_tomselect.widgets.sign_config", wraps=sign_config) as sign_mock:
+            token = widget.build_attrs({})["data-config"]
+            assert copy.deepcopy(widget).build_attrs({})["data-config"] == token
+            assert widget.build_attrs({})["data-config"] == token
+        sign_mock.assert_called_once()
+
+    def test_signed_config_changed(self, make_widget):
+        """Assert that the configuration is signed again if it changed."""
+        widget = make_widget(model=Person)
+        widget.build_attrs({})
+        other = copy.deepcopy(widget)
+        other.create_field = "full_name"
+        assert load_config(other.build_attrs({})["data-config"])["cf"] == "full_name"
+        assert load_config(widget.build_attrs({})["data-config"])["cf"] is None
+
     @pytest.mark.parametrize(
         "static_file",
         ("mizselect.css", "tom-select.bootstrap5.css", "mizselect.js"),
@@ -179,6 +239,11 @@ class TestTabularMIZSelect:
         assert attrs["data-extra-headers"] == '["Date of Birth", "City"]'
         assert attrs["data-extra-columns"] == '["dob", "city"]'
 
+    def test_config_values(self, make_widget):
+        """Assert that the extra columns are declared as values in the configuration."""
+        widget = make_widget(model=Person, label_field="full_name", extra_columns={"dob": "Date of Birth"})
+        assert load_config(widget.build_attrs({})["data-config"])["vs"] == ["id", "full_name", "dob"]
+
 
 @pytest.mark.parametrize("widget_class", [MIZSelectMultiple])
 class TestMIZSelectMultiple: